@@ -0,0 +1,53 @@
+"""
+gunicorn settings: load models once in the master, share them with forked workers
+
+    gunicorn -c gunicorn.conf.py                        # JSON API (src/main.py)
+    CLAUSEEASE_APP=app gunicorn -c gunicorn.conf.py     # web UI (src/app.py)
+
+With preload_app the app and every model are loaded before forking (see
+src/wsgi.py). Objects that exist at fork time are moved to the garbage
+collector's permanent generation, so collections in the workers do not
+write to, and thereby copy, the shared pages. /api/health returns 503
+until a worker's models are loaded and reports each worker's RSS;
+scripts/benchmark_worker_memory.py compares memory with and without preload.
+"""
+
+import gc
+import os
+import tempfile
+from pathlib import Path
+
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+# Model loading happens in the master, so workers boot quickly
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+# Workers write metric snapshots here and /metrics adds them up (see components/metrics.py)
+if 'METRICS_DIR' not in os.environ:
+    os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='clauseease-metrics-')
+for snapshot in Path(os.environ['METRICS_DIR']).glob('*.json'):
+    snapshot.unlink()
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import wsgi
+    wsgi.start_worker()
+
+
+def worker_exit(server, worker):
+    from components.metrics import write_snapshot
+    write_snapshot()
+
+
+def child_exit(server, worker):
+    # Also runs for workers killed before worker_exit, retiring their last flushed snapshot
+    from components.metrics import retire_snapshots
+    retire_snapshots(worker.pid)
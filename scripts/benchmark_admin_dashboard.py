@@ -0,0 +1,129 @@
+"""
+Admin dashboard query cost as the users and documents tables grow.
+
+For each size, builds a temporary database with the app schema and synthetic
+users/documents spread over the last 60 days, seeds the rollup tables, then
+times the previous aggregate queries (COUNT(*), date()/strftime() GROUP BYs
+and the outer-join top-users count) against the rollup reads the dashboard
+now makes. Chart rendering is left out; it is cached by content hash.
+
+    python scripts/benchmark_admin_dashboard.py [--sizes 1000,10000,100000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import sessionmaker
+
+import app as clauseease
+import admin_routes
+from components.database import create_sqlite_engine
+from components.rollups import (
+    active_users_on,
+    daily_documents,
+    daily_registrations,
+    ensure_rollup_tables,
+    total,
+    user_document_counts,
+)
+
+User = clauseease.User
+Document = clauseease.Document
+
+
+def timed(func, repeat=5):
+    """Median seconds over several runs"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def load(engine, documents, rng):
+    users = max(1, documents // 10)
+    now = datetime.now()
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{
+            'username': f'user{n}',
+            'email': f'user{n}@example.com',
+            'password_hash': 'x',
+            'created_at': now - timedelta(days=rng.randrange(60), minutes=rng.randrange(1440)),
+        } for n in range(users)])
+        for start in range(0, documents, 5000):
+            connection.execute(insert(Document), [{
+                'user_id': rng.randrange(users) + 1,
+                'document_title': f'contract-{n}.pdf',
+                'original_text': '',
+                'uploaded_at': now - timedelta(days=rng.randrange(60), minutes=rng.randrange(1440)),
+            } for n in range(start, min(start + 5000, documents))])
+
+
+def legacy_queries(session):
+    """The aggregates the dashboard used to run on every page load"""
+    today = datetime.now().date()
+    session.query(User).count()
+    session.query(Document).count()
+    session.query(func.count(func.distinct(Document.user_id))).filter(
+        func.date(Document.uploaded_at) == today.isoformat()
+    ).scalar()
+    session.query(func.date(User.created_at), func.count(User.id)).filter(
+        User.created_at >= datetime.combine(today - timedelta(days=6), datetime.min.time())
+    ).group_by(func.date(User.created_at)).all()
+    session.query(func.strftime('%Y-%W', Document.uploaded_at), func.count(Document.id)).filter(
+        Document.uploaded_at >= datetime.combine(today - timedelta(weeks=4), datetime.min.time())
+    ).group_by(func.strftime('%Y-%W', Document.uploaded_at)).all()
+    session.query(User.username, func.count(Document.id)).outerjoin(
+        Document, Document.user_id == User.id
+    ).group_by(User.id).order_by(func.count(Document.id).desc()).limit(5).all()
+
+
+def rollup_queries(session):
+    """The same figures read from the rollup tables"""
+    connection = session.connection()
+    total(connection, daily_registrations)
+    total(connection, daily_documents)
+    active_users_on(connection, datetime.now().date())
+    admin_routes._registrations_last_week(session)
+    admin_routes._documents_last_weeks(session)
+    session.query(User.username, user_document_counts.c.document_count).join(
+        user_document_counts, user_document_counts.c.user_id == User.id
+    ).order_by(user_document_counts.c.document_count.desc()).limit(5).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    rng = random.Random(7)
+    print(f"{'documents':>10}{'users':>8}{'aggregates ms':>15}{'rollups ms':>12}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_sqlite_engine(Path(tmp) / 'admin.db')
+            clauseease.Base.metadata.create_all(bind=engine)
+            load(engine, size, rng)
+            ensure_rollup_tables(engine)
+
+            session = sessionmaker(bind=engine, future=True)()
+            legacy = timed(lambda: legacy_queries(session))
+            rollup = timed(lambda: rollup_queries(session))
+            print(f"{size:>10,}{max(1, size // 10):>8,}{legacy * 1000:>15.2f}{rollup * 1000:>12.2f}")
+            session.close()
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
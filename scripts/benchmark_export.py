@@ -0,0 +1,130 @@
+"""
+Peak memory and throughput of the bulk export as the account grows.
+
+Builds a temporary database (and blob store) with the app schema, grows one
+user's account to each requested size with distinct reports of roughly
+--report-kb each, then consumes the NDJSON and ZIP export streams the
+/export endpoint returns, discarding the bytes. Peak Python allocations are
+measured with tracemalloc and compared against building the same export in
+memory with json.dumps.
+
+    python scripts/benchmark_export.py [--sizes 50,200,800] [--report-kb 16]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker, undefer
+
+import app as clauseease
+from components.blob_store import configure_blob_store
+from components.database import create_sqlite_engine
+from components.export import export_entry_name, iter_documents, stream_ndjson, stream_zip
+from components.rollups import ensure_rollup_tables
+
+Document = clauseease.Document
+WORDS = 'party shall agreement notice payment termination liability confidential indemnify'.split()
+
+
+def grow_account(engine, user_id, start, stop, report_kb, rng):
+    base_time = datetime(2024, 1, 1)
+    for offset in range(start, stop, 50):
+        rows = []
+        for n in range(offset, min(offset + 50, stop)):
+            clause = ' '.join(rng.choice(WORDS) for _ in range(report_kb * 146))
+            rows.append({
+                'user_id': user_id,
+                'document_title': f'contract-{n}.pdf',
+                'original_text': f'Contract {n}. {clause}',
+                'simplified_text_basic': clause[:2000],
+                'original_readability_score': 40.0,
+                'uploaded_at': base_time + timedelta(minutes=n),
+                'report_json': json.dumps({'document': n, 'clauses': [{'cleaned_text': clause}]}),
+            })
+        with engine.begin() as connection:
+            connection.execute(insert(Document), rows)
+
+
+def export_query(session, user_id):
+    return (
+        session.query(Document)
+        .options(undefer(Document.original_text), undefer(Document.report_json))
+        .filter(Document.user_id == user_id)
+        .order_by(Document.id)
+    )
+
+
+def streamed(session, user_id, export_format):
+    records = ((document, clauseease.document_report_data(document))
+               for document in iter_documents(export_query(session, user_id)))
+    if export_format == 'zip':
+        return stream_zip((export_entry_name(document.id, document.document_title), report)
+                          for document, report in records)
+    return stream_ndjson(report for _, report in records)
+
+
+def in_memory(session, user_id):
+    reports = [clauseease.document_report_data(document) for document in export_query(session, user_id)]
+    yield json.dumps(reports).encode('utf-8')
+
+
+def measure(make_stream):
+    """(seconds, bytes produced, peak traced MB) for consuming a byte stream"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    total = sum(len(chunk) for chunk in make_stream())
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, total, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='50,200,800')
+    parser.add_argument('--report-kb', type=int, default=16)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_blob_store(Path(tmp) / 'blobs')
+        engine = create_sqlite_engine(Path(tmp) / 'export.db')
+        clauseease.Base.metadata.create_all(bind=engine)
+        ensure_rollup_tables(engine)
+        Session = sessionmaker(bind=engine, future=True)
+        with Session() as session:
+            user = clauseease.User(username='bench', email='bench@example.com', password_hash='x')
+            session.add(user)
+            session.commit()
+            user_id = user.id
+
+        print(f"{'documents':>10}{'export':>9}{'MB out':>9}{'seconds':>9}{'peak MB':>9}")
+        grown = 0
+        for size in sizes:
+            grow_account(engine, user_id, grown, size, args.report_kb, rng)
+            grown = size
+            for label, make in (
+                ('memory', lambda s: in_memory(s, user_id)),
+                ('ndjson', lambda s: streamed(s, user_id, 'ndjson')),
+                ('zip', lambda s: streamed(s, user_id, 'zip')),
+            ):
+                with Session() as session:
+                    elapsed, total, peak = measure(lambda: make(session))
+                print(f"{size:>10,}{label:>9}{total / 1024 / 1024:>9.1f}{elapsed:>9.2f}{peak:>9.1f}")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+History page latency as a user's document count grows.
+
+Builds a temporary database with the app schema, grows one user's history
+to each requested size, and times the previous full-row load
+(query(Document).all() plus json.loads of every stats_json) against
+app.query_history_page for the first page, a page half way through and
+the last page, then prints the query plan of each statement the last page
+runs.
+
+    python scripts/benchmark_history.py [--sizes 100,1000,10000] [--text-kb 8]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import sessionmaker
+
+import app as clauseease
+from components.blob_store import configure_blob_store
+from components.database import create_sqlite_engine
+from components.rollups import ensure_rollup_tables
+from components.pagination import encode_cursor
+
+
+def timed(func, repeat=5):
+    """Median seconds over several runs"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def grow_history(session, user_id, start, stop, text_kb, rng):
+    filler = ' '.join(rng.choice(['party', 'shall', 'agreement', 'notice', 'payment']) for _ in range(text_kb * 180))
+    report = json.dumps({'clauses': [{'cleaned_text': filler, 'simplified': filler}]})
+    stats = json.dumps({'simplified_metrics': {'word_count': 900}})
+    base_time = datetime(2024, 1, 1)
+    rows = [{
+        'user_id': user_id,
+        'document_title': f'contract-{n}.pdf',
+        'original_text': filler,
+        'simplified_text_basic': filler,
+        'original_readability_score': 40.0,
+        'uploaded_at': base_time + timedelta(minutes=n),
+        'report_json': report,
+        'stats_json': stats,
+        'clause_count': 12,
+        'word_count': 2000,
+    } for n in range(start, stop)]
+    for offset in range(0, len(rows), 500):
+        session.execute(insert(clauseease.Document), rows[offset:offset + 500])
+    session.commit()
+
+
+def legacy_history(session, user_id):
+    documents = (
+        session.query(clauseease.Document)
+        .filter(clauseease.Document.user_id == user_id)
+        .order_by(clauseease.Document.uploaded_at.desc())
+        .all()
+    )
+    page = [json.loads(doc.stats_json) for doc in documents]
+    session.expunge_all()
+    return page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='100,1000,10000')
+    parser.add_argument('--text-kb', type=int, default=8, help="Size of each heavy text column")
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_blob_store(Path(tmp) / 'blobs')
+        engine = create_sqlite_engine(Path(tmp) / 'history.db')
+        clauseease.Base.metadata.create_all(bind=engine)
+        ensure_rollup_tables(engine)
+        Session = sessionmaker(bind=engine, future=True)
+        session = Session()
+        user = clauseease.User(username='bench', email='bench@example.com', password_hash='x')
+        session.add(user)
+        session.commit()
+
+        print(f"{'documents':>10}{'full load ms':>14}{'page 1 ms':>11}{'middle ms':>11}{'last ms':>9}")
+        grown = 0
+        for size in sizes:
+            grow_history(session, user.id, grown, size, args.text_kb, rng)
+            grown = size
+
+            # Cursors pointing into the middle and at the last page
+            ordered = session.query(clauseease.Document.uploaded_at, clauseease.Document.id).filter(
+                clauseease.Document.user_id == user.id
+            ).order_by(clauseease.Document.uploaded_at.desc(), clauseease.Document.id.desc()).all()
+            middle = encode_cursor(*ordered[len(ordered) // 2])
+            last = encode_cursor(*ordered[max(0, len(ordered) - 21)])
+
+            full = timed(lambda: legacy_history(session, user.id), repeat=3)
+            first = timed(lambda: clauseease.query_history_page(session, user.id))
+            mid = timed(lambda: clauseease.query_history_page(session, user.id, cursor=middle))
+            tail = timed(lambda: clauseease.query_history_page(session, user.id, cursor=last))
+            print(f"{size:>10,}{full * 1000:>14.1f}{first * 1000:>11.2f}{mid * 1000:>11.2f}{tail * 1000:>9.2f}")
+
+        # Plans of the statements query_history_page actually runs for the last page
+        statements = []
+
+        def capture(connection, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, 'before_cursor_execute', capture)
+        clauseease.query_history_page(session, user.id, cursor=last)
+        event.remove(engine, 'before_cursor_execute', capture)
+        for statement, parameters in statements:
+            plan = session.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+            print(f"\nQuery plan: {' / '.join(row[-1] for row in plan)}")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
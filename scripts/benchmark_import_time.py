@@ -0,0 +1,97 @@
+"""
+Profile web worker boot with `python -X importtime`.
+
+Imports each entry module in a fresh interpreter, reports total import
+time and the slowest top-level imports, and exits non-zero if a heavy
+library (torch, transformers, matplotlib, seaborn, spacy) is imported at
+boot or the total exceeds --budget-ms.
+
+    python scripts/benchmark_import_time.py [--module app --module main] [--budget-ms 3000]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / 'src'
+
+HEAVY_MODULES = ('torch', 'transformers', 'matplotlib', 'seaborn', 'spacy')
+
+LINE_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def profile_import(module):
+    """
+    Import a module in a fresh interpreter
+
+    Returns:
+        (total microseconds, self microseconds per root package, imported module names)
+    """
+    env = dict(os.environ, PYTHONPATH=str(SRC), PYTHONDONTWRITEBYTECODE='1')
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        tail = completed.stderr.strip().splitlines()[-5:]
+        raise RuntimeError(f"import {module} failed:\n" + '\n'.join(tail))
+
+    total = 0
+    by_package = {}
+    imported = set()
+    for line in completed.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, name = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+        imported.add(name)
+        root = name.split('.')[0]
+        by_package[root] = by_package.get(root, 0) + own
+        # Depth-0 entries are nested one space after the '|'
+        if len(indent) == 1:
+            total += cumulative
+    return total, by_package, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--module', action='append', dest='modules',
+                        help="Entry module to import (repeatable, default: app)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per module, median is reported")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="Fail if median total import time exceeds this")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules or ['app']:
+        runs = [profile_import(module) for _ in range(max(1, args.repeat))]
+        totals = [total / 1000 for total, _, _ in runs]
+        total_ms = statistics.median(totals)
+        _, by_package, imported = runs[-1]
+
+        print(f"import {module}: {total_ms:,.0f} ms median over {len(runs)} run(s) "
+              f"({', '.join(f'{t:,.0f}' for t in totals)})")
+        print(f"{'self ms':>10}  package")
+        for name, own in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"{own / 1000:>10,.1f}  {name}")
+
+        heavy = sorted(name for name in imported if name in HEAVY_MODULES)
+        if heavy:
+            print(f"[FAIL] heavy modules imported at boot: {', '.join(heavy)}")
+            failed = True
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            print(f"[FAIL] {total_ms:,.0f} ms exceeds budget of {args.budget_ms:,.0f} ms")
+            failed = True
+        print()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Per-call latency of report serialization on a large report.
+
+Builds a synthetic report in the stored report schema (clauses with text,
+sentences, entities and readability counts, legal terms, segments and
+chart data) grown to --size-mb of compact JSON. Then times the stdlib
+json calls the apps used to make against components.serialization:
+compact encode for storage, decode for views, typed decoding of the
+report, and the pretty-printed download (streamed in chunks by the new code).
+
+    python scripts/benchmark_json.py [--size-mb 5] [--repeat 15]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from components import serialization
+
+WORDS = (
+    "the party shall agreement contractor employer indemnify notwithstanding termination "
+    "confidential information obligations hereunder pursuant liability damages arbitration "
+    "jurisdiction governing law payment invoice services deliverables warranty assignment"
+).split()
+CLAUSE_TYPES = ['Termination', 'Payment Terms', 'Confidentiality', 'Indemnity', 'Governing Law']
+
+
+def sentence(rng, words=24):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def readability(rng):
+    return {name: rng.randrange(1, 400) for name in (
+        'sentence_count', 'word_count', 'syllable_count', 'complex_word_count', 'polysyllable_count', 'letter_count'
+    )}
+
+
+def build_report(size_mb, rng):
+    report = {
+        'filename': 'master-services-agreement.pdf',
+        'clauses': [],
+        'legal_terms': [
+            {'term': word, 'category': 'General', 'definition': sentence(rng, 12), 'simplified_explanation': sentence(rng, 8)}
+            for word in WORDS
+        ],
+        'segments': [],
+        'clause_type_summary': {},
+        'original_metrics': {'flesch_reading_ease': 31.2, 'word_count': 0},
+        'simplified_metrics': {'flesch_reading_ease': 55.8, 'word_count': 0},
+        'readability_totals': {'original': readability(rng), 'simplified': readability(rng)},
+        'simplification_status': 'refined',
+        'simplification_timing': {'tier': 'small', 'budget_seconds': None, 'estimated_seconds': 4.2, 'actual_seconds': 3.9},
+    }
+    target = size_mb * 1024 * 1024
+    size, offset = 0, 0
+    while size < target:
+        sentences = [sentence(rng) for _ in range(6)]
+        text = ' '.join(sentences)
+        index = len(report['clauses']) + 1
+        clause_type = rng.choice(CLAUSE_TYPES)
+        clause = {
+            'index': index,
+            'raw_text': text,
+            'cleaned_text': text,
+            'sentences': sentences,
+            'entities': [[rng.choice(WORDS).title(), 'ORG'] for _ in range(3)],
+            'type': clause_type,
+            'simplified': sentence(rng, 60),
+            'readability': {'original': readability(rng), 'simplified': readability(rng)},
+        }
+        report['clauses'].append(clause)
+        report['segments'].append({'index': index, 'original_start': offset, 'original_end': offset + len(text)})
+        report['clause_type_summary'][clause_type] = report['clause_type_summary'].get(clause_type, 0) + 1
+        offset += len(text) + 1
+        size += len(json.dumps(clause)) + 60
+    report['simplified_text'] = ' '.join(clause['simplified'] for clause in report['clauses'])
+    report['chart_data'] = {'clause_types': report['clause_type_summary']}
+    return report
+
+
+def timed(func, repeat):
+    """Median milliseconds over several runs"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=float, default=5)
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    report = build_report(args.size_mb, random.Random(7))
+    stored = serialization.dumps(report)
+    print(f"Report: {len(report['clauses']):,} clauses, {len(stored.encode('utf-8')) / 1024 / 1024:.1f} MB compact JSON")
+    print(f"Backend: {serialization.JSON_BACKEND}\n")
+
+    rows = (
+        ('encode for storage', lambda: json.dumps(report), lambda: serialization.dumps(report)),
+        ('decode for a view', lambda: json.loads(stored), lambda: serialization.loads(stored)),
+        ('typed decode', lambda: json.loads(stored), lambda: serialization.decode_report(stored)),
+        ('pretty download', lambda: json.dumps(report, indent=2),
+         lambda: b''.join(serialization.iter_encode(report, pretty=True))),
+    )
+    print(f"{'call':<22}{'stdlib ms':>11}{'new ms':>10}{'speedup':>9}")
+    for label, before, after in rows:
+        before_ms = timed(before, args.repeat)
+        after_ms = timed(after, args.repeat)
+        print(f"{label:<22}{before_ms:>11.2f}{after_ms:>10.2f}{before_ms / after_ms:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
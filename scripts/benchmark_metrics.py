@@ -0,0 +1,78 @@
+"""
+Overhead of the pipeline instrumentation on the hot path.
+
+Times the calls the pipeline makes per clause (a stage_timer block around
+classify, simplify and metrics, a histogram observation, a cache counter
+increment), in nanoseconds per call against an empty loop, and compares
+that with the per-clause cost of the lexical pipeline on a sample clause.
+Also times rendering /metrics with every stage populated.
+
+    python scripts/benchmark_metrics.py [--calls 200000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from components import metrics
+from components.module5_language_simplification import lexical_simplify
+from components.readability_metrics import ReadabilityStats
+
+CLAUSE = (
+    "Notwithstanding any provision herein to the contrary, the Contractor shall indemnify and hold harmless "
+    "the Employer from and against any and all claims, damages and liabilities arising hereunder."
+)
+STAGES = ('extract', 'preprocess', 'classify', 'terms', 'simplify', 'metrics', 'charts', 'db_write', 'refine')
+
+
+def per_call_ns(func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def timed_block():
+    with metrics.stage_timer('classify'):
+        pass
+
+
+def clause_work():
+    simplified = lexical_simplify(CLAUSE)
+    ReadabilityStats.from_text(CLAUSE)
+    ReadabilityStats.from_text(simplified)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    empty = per_call_ns(lambda: None, args.calls)
+    rows = (
+        ('stage_timer block', per_call_ns(timed_block, args.calls) - empty),
+        ('histogram observe', per_call_ns(lambda: metrics.observe_stage('simplify', 0.002), args.calls) - empty),
+        ('cache counter inc', per_call_ns(lambda: metrics.record_cache('chart', True), args.calls) - empty),
+    )
+    for label, ns in rows:
+        print(f"{label:<20}{ns:>9.0f} ns")
+
+    clause_ns = per_call_ns(clause_work, max(args.calls // 100, 100))
+    # Three timed stages per clause (classify, simplify, metrics)
+    overhead = 3 * rows[0][1]
+    print(f"\nLexical pipeline per clause: {clause_ns / 1000:,.1f} us; "
+          f"instrumentation adds {overhead / 1000:.2f} us ({overhead / clause_ns:.2%})")
+
+    for stage in STAGES:
+        metrics.observe_stage(stage, 0.01)
+    started = time.perf_counter()
+    body = metrics.render_metrics()
+    print(f"/metrics render: {(time.perf_counter() - started) * 1000:.2f} ms, {len(body.splitlines())} lines")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark the readability engine on a synthetic legal corpus.
+
+Compares the previous per-token approach (uncached syllable loop, text
+tokenized once for word counts and again for complex words) against the
+memoized, array-based calculate_all_metrics.
+
+    python scripts/benchmark_readability.py [--words 1000000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from nltk.tokenize import sent_tokenize, word_tokenize
+
+from components import readability_metrics
+
+VOCABULARY = (
+    "the party shall agreement contractor employer indemnify notwithstanding termination "
+    "confidential information obligations hereunder pursuant thereof liability damages "
+    "arbitration jurisdiction governing law payment invoice services deliverables warranty "
+    "represent intellectual property assignment severability amendment notice written days "
+    "of and to in by for with any all such this that herein provided whereas consideration"
+).split()
+
+
+def build_corpus(word_total, seed=7):
+    """Sentences of 12-30 words drawn from a legal vocabulary"""
+    rng = random.Random(seed)
+    sentences = []
+    produced = 0
+    while produced < word_total:
+        length = rng.randint(12, 30)
+        words = [rng.choice(VOCABULARY) for _ in range(length)]
+        sentences.append(' '.join(words).capitalize() + '.')
+        produced += length
+    return ' '.join(sentences)
+
+
+def _legacy_syllables(word):
+    word = word.lower()
+    syllables = 0
+    if len(word) <= 1:
+        return 1
+    if word.endswith('e'):
+        word = word[:-1]
+    previous_was_vowel = False
+    for char in word:
+        is_vowel = char in "aeiouy"
+        if is_vowel and not previous_was_vowel:
+            syllables += 1
+        previous_was_vowel = is_vowel
+    return max(1, syllables)
+
+
+def legacy_metrics(text):
+    sentences = sent_tokenize(text)
+    words = [w for w in word_tokenize(text) if w.isalpha()]
+    complex_words = [w for w in word_tokenize(text.lower()) if len(w) > 2 and _legacy_syllables(w) >= 3]
+    return {
+        "sentence_count": len(sentences),
+        "word_count": len(words),
+        "avg_words_per_sentence": round(len(words) / len(sentences), 2),
+        "complex_word_count": len(complex_words),
+    }
+
+
+def timed(label, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<40} {time.perf_counter() - started:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.words)
+    print(f"Corpus: {args.words:,} words, {len(corpus):,} characters\n")
+
+    tokens = timed("word_tokenize (shared cost)", word_tokenize, corpus)
+    timed("legacy syllables, per token", lambda: [_legacy_syllables(t) for t in tokens])
+    readability_metrics._syllables_lower.cache_clear()
+    timed("memoized syllable arrays (cold cache)", readability_metrics.token_arrays, tokens)
+    timed("memoized syllable arrays (warm cache)", readability_metrics.token_arrays, tokens)
+    print()
+
+    legacy = timed("legacy calculate_all_metrics", legacy_metrics, corpus)
+    current = timed("calculate_all_metrics", readability_metrics.calculate_all_metrics, corpus)
+    print(f"\nResults match: {legacy == current}")
+    print(f"Syllable cache: {readability_metrics._syllables_lower.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Compare stored report size and results-page payload with embedded base64
+chart PNGs versus compact chart_data series.
+
+Works on a temporary copy of the database, the original is never modified.
+
+    python scripts/benchmark_report_size.py [--db data/clauseease.db]
+"""
+
+import argparse
+import json
+import shutil
+import sqlite3
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from components.readability_metrics import build_chart_data
+
+PNG_KEYS = ('clause_type_chart', 'stats_chart')
+
+
+def to_chart_data_report(report):
+    """Report as written in chart-data mode"""
+    report = dict(report)
+    for key in PNG_KEYS:
+        report.pop(key, None)
+    if 'chart_data' not in report:
+        clause_types = Counter(c['type'] for c in report.get('clauses', []) if isinstance(c, dict) and c.get('type'))
+        report['chart_data'] = build_chart_data(
+            dict(clause_types) or report.get('clause_type_summary', {}),
+            report.get('original_metrics') or report.get('original_readability', {}),
+            report.get('simplified_metrics') or report.get('simplified_readability', {})
+        )
+    return report
+
+
+def _kb(size):
+    return f"{size / 1024:,.1f} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default=str(ROOT / 'data' / 'clauseease.db'))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_copy = Path(tmp) / 'copy.db'
+        shutil.copy(args.db, db_copy)
+        conn = sqlite3.connect(db_copy)
+        conn.execute('VACUUM')
+        size_before = db_copy.stat().st_size
+
+        rows = conn.execute('SELECT id, report_json FROM documents WHERE report_json IS NOT NULL').fetchall()
+        png_total = data_total = 0
+        png_chart_bytes = data_chart_bytes = 0
+        for doc_id, report_json in rows:
+            report = json.loads(report_json)
+            compact = to_chart_data_report(report)
+            compact_json = json.dumps(compact)
+            png_total += len(report_json)
+            data_total += len(compact_json)
+            png_chart_bytes += sum(len(report.get(key) or '') for key in PNG_KEYS)
+            data_chart_bytes += len(json.dumps(compact['chart_data']))
+            conn.execute('UPDATE documents SET report_json = ? WHERE id = ?', (compact_json, doc_id))
+        conn.commit()
+        conn.execute('VACUUM')
+        size_after = db_copy.stat().st_size
+        conn.close()
+
+    count = max(len(rows), 1)
+    print(f"Documents: {len(rows)}")
+    print(f"{'':<32}{'base64 PNG':>14}{'chart_data':>14}")
+    print(f"{'report_json total':<32}{_kb(png_total):>14}{_kb(data_total):>14}")
+    print(f"{'report_json per document':<32}{_kb(png_total / count):>14}{_kb(data_total / count):>14}")
+    print(f"{'chart payload per document':<32}{_kb(png_chart_bytes / count):>14}{_kb(data_chart_bytes / count):>14}")
+    print(f"{'database file (vacuumed)':<32}{_kb(size_before):>14}{_kb(size_after):>14}")
+    if png_total:
+        print(f"\nReport/response size reduction: {1 - data_total / png_total:.1%}")
+
+
+if __name__ == '__main__':
+    main()
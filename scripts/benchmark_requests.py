@@ -0,0 +1,108 @@
+"""
+Requests per second for an authenticated endpoint of the JSON API.
+
+Imports main.py against a temporary copy of the database, signs a JWT for
+a user (the first one, or a new one when the database has none) and sends
+GET requests through the Flask test client from --concurrency threads.
+Whatever the app writes to stdout and stderr, including its logging, goes
+to a temporary file as it would to a log file under gunicorn, or to
+--log-file (a FIFO read by a log shipper, a terminal), so the cost of
+producing log output is part of the measurement.
+
+    python scripts/benchmark_requests.py [--path /api/history] [--requests 2000] [--concurrency 4] [--log-file PATH]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+
+def run(client, path, headers, count):
+    failures = 0
+    for _ in range(count):
+        if client.get(path, headers=headers).status_code != 200:
+            failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--path', default='/api/history')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--db', type=Path, default=ROOT / 'data' / 'clauseease.db')
+    parser.add_argument('--log-file', type=Path, help="Where app output goes (default: a temporary file)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db_path = Path(tmp) / args.db.name
+    shutil.copyfile(args.db, db_path)
+    os.environ['CLAUSEEASE_DB'] = str(db_path)
+    # Keep the job workers idle; the database copy has no queued jobs anyway
+    os.environ.setdefault('JOB_WORKERS', '1')
+
+    # App output to a file from here on; results go to the original stdout
+    report = os.fdopen(os.dup(1), 'w')
+    log_path = args.log_file or Path(tmp) / 'app.log'
+    log_file = open(log_path, 'w')
+    os.dup2(log_file.fileno(), 1)
+    os.dup2(log_file.fileno(), 2)
+
+    try:
+        import jwt
+        import main as clauseease
+        clauseease.init_db()
+
+        with clauseease.get_db() as db:
+            user = db.query(clauseease.User).order_by(clauseease.User.id).first()
+            if user is None:
+                user = clauseease.User(username='benchmark', email='benchmark@example.com',
+                                       password_hash=clauseease.hash_password('benchmark'))
+                db.add(user)
+                db.commit()
+            claims = {'user_id': user.id, 'username': user.username, 'email': user.email, 'exp': 9999999999}
+        token = jwt.encode(claims, clauseease.app.config['SECRET_KEY'], algorithm='HS256')
+        headers = {'Authorization': f'Bearer {token}'}
+
+        client = clauseease.app.test_client()
+        run(client, args.path, headers, args.warmup)
+
+        per_thread = args.requests // args.concurrency
+        results = [0] * args.concurrency
+
+        def worker(n):
+            results[n] = run(clauseease.app.test_client(), args.path, headers, per_thread)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        total = per_thread * args.concurrency
+        print(f"GET {args.path} as {claims['username']}: {total} requests, {args.concurrency} threads", file=report)
+        print(f"{total / elapsed:,.0f} req/s, {elapsed / total * 1000:.2f} ms/request, "
+              f"{sum(results)} non-200", file=report)
+        if log_path.is_file():
+            log_bytes = log_path.stat().st_size
+            print(f"log output: {log_bytes / (total + args.warmup):,.0f} bytes/request", file=report)
+    finally:
+        report.flush()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Full-text search latency on a synthetic document database.
+
+Builds a temporary database with the app schema and FTS5 index, loads
+--documents synthetic contracts spread over --users users (indexed by the
+clause triggers), then times search_clauses for common, rare, phrase and
+missing queries on the first and a later page.
+
+    python scripts/benchmark_search.py [--documents 50000] [--users 100]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from sqlalchemy import insert
+
+import app as clauseease
+from components.database import create_sqlite_engine
+from components.search import ensure_search_index, search_clauses
+
+VOCABULARY = (
+    "the party shall agreement contractor employer indemnify notwithstanding termination "
+    "confidential information obligations hereunder pursuant thereof liability damages "
+    "arbitration jurisdiction governing law payment invoice services deliverables warranty "
+    "represent intellectual property assignment severability amendment notice written days "
+    "of and to in by for with any all such this that herein provided whereas consideration"
+).split()
+CLAUSE_TYPES = ['Termination', 'Payment Terms', 'Confidentiality', 'Indemnity', 'Governing Law']
+RARE_PHRASE = 'liquidated damages'
+
+QUERIES = (
+    ('common word', 'agreement'),
+    ('two words', 'termination notice'),
+    ('rare phrase', f'"{RARE_PHRASE}"'),
+    ('rare words', 'liquidated damages'),
+    ('no match', 'zeppelin'),
+)
+
+
+def clause_text(rng, words=80):
+    tokens = [rng.choice(VOCABULARY) for _ in range(words)]
+    if rng.random() < 0.005:
+        tokens.insert(rng.randrange(len(tokens)), RARE_PHRASE)
+    return ' '.join(tokens).capitalize() + '.'
+
+
+def load_documents(engine, documents, users, clauses_per_document, rng):
+    base_time = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(clauseease.User), [
+            {'username': f'user{n}', 'email': f'user{n}@example.com', 'password_hash': 'x'}
+            for n in range(users)
+        ])
+        for start in range(0, documents, 1000):
+            batch = range(start, min(start + 1000, documents))
+            connection.execute(insert(clauseease.Document), [{
+                'id': n + 1,
+                'user_id': n % users + 1,
+                'document_title': f'Contract {n} {rng.choice(CLAUSE_TYPES)}.pdf',
+                'original_text': '',
+                'uploaded_at': base_time + timedelta(minutes=n),
+                'clause_count': clauses_per_document,
+                'word_count': 80 * clauses_per_document,
+            } for n in batch])
+            connection.execute(insert(clauseease.Clause), [{
+                'document_id': n + 1,
+                'clause_index': index + 1,
+                'clause_type': rng.choice(CLAUSE_TYPES),
+                'cleaned_text': clause_text(rng),
+            } for n in batch for index in range(clauses_per_document)])
+
+
+def timed(func, repeat=7):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=50_000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--clauses', type=int, default=3, help="Clauses per document")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'search.db'
+        engine = create_sqlite_engine(db_path)
+        clauseease.Base.metadata.create_all(bind=engine)
+        ensure_search_index(engine)
+
+        started = time.perf_counter()
+        load_documents(engine, args.documents, args.users, args.clauses, rng)
+        print(f"Loaded {args.documents:,} documents / {args.documents * args.clauses:,} clauses "
+              f"for {args.users} users in {time.perf_counter() - started:.1f}s "
+              f"({db_path.stat().st_size / 1024 / 1024:,.1f} MB)\n")
+
+        print(f"{'query':<14}{'page 1 ms':>11}{'page 5 ms':>11}{'hits p1':>9}")
+        with engine.connect() as connection:
+            for label, query in QUERIES:
+                first, (results, _) = timed(lambda: search_clauses(connection, 1, query, page=1))
+                later, _ = timed(lambda: search_clauses(connection, 1, query, page=5))
+                print(f"{label:<14}{first * 1000:>11.2f}{later * 1000:>11.2f}{len(results):>9}")
+            sample, _ = search_clauses(connection, 1, 'termination notice', page=1, page_size=1)
+            if sample:
+                print(f"\nSample snippet: {sample[0]['snippet']}")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Compare the fp32 and optimized (int8 + tuned threads) CPU simplifier.
+Each mode runs in its own process so RSS figures are not mixed up.
+
+    python scripts/benchmark_simplifier.py [--tier large] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+SAMPLE_CLAUSES = [
+    "The Contractor shall indemnify and hold harmless the Employer against all claims, damages and "
+    "expenses arising out of any breach of the obligations set out in this Agreement.",
+    "Either party may terminate this Agreement by giving thirty days written notice to the other party, "
+    "provided that all outstanding invoices have been settled prior to the date of termination.",
+    "Notwithstanding anything contained herein, the liability of the Service Provider shall not exceed "
+    "the total fees paid under this Agreement during the twelve months preceding the claim.",
+    "All intellectual property rights in the deliverables shall vest in the Client upon full payment, "
+    "and the Contractor hereby assigns to the Client all rights, title and interest therein.",
+    "Any dispute arising out of or in connection with this Agreement shall be referred to arbitration "
+    "by a sole arbitrator appointed by mutual consent of the parties.",
+]
+
+
+def _rss_mb():
+    """Current resident set size in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(tier, runs):
+    """Load one tier in the configured mode and time greedy generation"""
+    import torch
+    from components import module5_language_simplification as simplification
+
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    if not simplification.ensure_simplifier_loaded(tier=tier):
+        return {'error': 'model could not be loaded'}
+    load_seconds = time.perf_counter() - started
+    simplifier = simplification._simplifiers[tier]
+
+    outputs = []
+    latencies = []
+    for _ in range(runs):
+        outputs = []
+        for clause in SAMPLE_CLAUSES:
+            started = time.perf_counter()
+            with torch.inference_mode():
+                result = simplifier(clause, max_length=50, min_length=10, do_sample=False, truncation=True)
+            latencies.append(time.perf_counter() - started)
+            outputs.append(result[0]['summary_text'].strip())
+
+    return {
+        'mode': simplification.SIMPLIFIER_CPU_MODE,
+        'threads': torch.get_num_threads(),
+        'load_seconds': round(load_seconds, 2),
+        'rss_mb': round(_rss_mb(), 1),
+        'model_rss_mb': round(_rss_mb() - rss_before, 1),
+        'latency_mean_ms': round(statistics.mean(latencies) * 1000, 1),
+        'latency_p95_ms': round(sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        'outputs': outputs,
+    }
+
+
+def _token_agreement(a, b):
+    """Share of positions where the two outputs use the same token"""
+    left, right = a.split(), b.split()
+    if not left and not right:
+        return 1.0
+    same = sum(1 for x, y in zip(left, right) if x == y)
+    return same / max(len(left), len(right))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tier', default='large', choices=['large', 'distilled'])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.tier, args.runs)))
+        return
+
+    reports = {}
+    for mode in ('fp32', 'optimized'):
+        env = dict(os.environ, SIMPLIFIER_CPU_MODE=mode)
+        proc = subprocess.run(
+            [sys.executable, __file__, '--tier', args.tier, '--runs', str(args.runs), '--child', mode],
+            env=env, capture_output=True, text=True
+        )
+        last_line = proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else '{}'
+        reports[mode] = json.loads(last_line) if last_line.startswith('{') else {'error': proc.stderr[-500:]}
+
+    for mode, report in reports.items():
+        print(f"\n[{mode}]")
+        for key, value in report.items():
+            if key != 'outputs':
+                print(f"  {key}: {value}")
+
+    fp32, optimized = reports['fp32'], reports['optimized']
+    if 'outputs' in fp32 and 'outputs' in optimized:
+        exact = sum(1 for a, b in zip(fp32['outputs'], optimized['outputs']) if a == b)
+        agreement = statistics.mean(_token_agreement(a, b) for a, b in zip(fp32['outputs'], optimized['outputs']))
+        print(f"\nExact output matches: {exact}/{len(SAMPLE_CLAUSES)}")
+        print(f"Mean token agreement: {agreement:.1%}")
+        print(f"Latency speedup: {fp32['latency_mean_ms'] / optimized['latency_mean_ms']:.2f}x")
+        print(f"Model RSS saved: {fp32['model_rss_mb'] - optimized['model_rss_mb']:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
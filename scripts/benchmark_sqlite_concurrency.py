@@ -0,0 +1,154 @@
+"""
+Concurrent read/write benchmark: history page loads while uploads are written.
+
+Runs the same workload against a temporary copy of the database twice,
+once with the previous engine (rollback journal, default pragmas) and once
+with components.database.create_sqlite_engine (WAL, synchronous=NORMAL,
+busy timeout, mmap, page cache, pooled connections), and reports read
+latency percentiles, throughput and "database is locked" errors.
+
+    python scripts/benchmark_sqlite_concurrency.py [--seconds 10] [--readers 8] [--writers 2]
+"""
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from components.database import create_sqlite_engine, sqlite_settings
+
+HISTORY_QUERY = text(
+    "SELECT * FROM documents WHERE user_id = :user_id ORDER BY uploaded_at DESC"
+)
+INSERT_QUERY = text(
+    "INSERT INTO documents (user_id, document_title, original_text, simplified_text_basic, "
+    "original_readability_score, uploaded_at, report_json, stats_json, clause_count, word_count) "
+    "VALUES (:user_id, :title, :original, :simplified, 50.0, :uploaded_at, :report, '{}', 40, 4000)"
+)
+
+
+def make_report(size_kb, rng):
+    """A report_json payload of roughly size_kb"""
+    words = ['party', 'shall', 'agreement', 'termination', 'indemnify', 'notice', 'payment']
+    clause = ' '.join(rng.choice(words) for _ in range(60))
+    clauses = [{'index': i, 'original': clause, 'simplified': clause} for i in range(size_kb * 1024 // (len(clause) * 2 + 60) + 1)]
+    return json.dumps({'clauses': clauses})
+
+
+def run_workload(engine, user_ids, seconds, readers, writers, report_kb):
+    stop = threading.Event()
+    read_latencies = []
+    counters = {'reads': 0, 'writes': 0, 'read_locked': 0, 'write_locked': 0}
+    lock = threading.Lock()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(HISTORY_QUERY, {'user_id': rng.choice(user_ids)}).fetchall()
+            except OperationalError as e:
+                with lock:
+                    counters['read_locked'] += 'locked' in str(e)
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                read_latencies.append(elapsed)
+                counters['reads'] += 1
+
+    def writer(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            report = make_report(report_kb, rng)
+            try:
+                with engine.begin() as connection:
+                    connection.execute(INSERT_QUERY, {
+                        'user_id': rng.choice(user_ids),
+                        'title': 'benchmark.pdf',
+                        'original': report[:20000],
+                        'simplified': report[:20000],
+                        'uploaded_at': datetime.utcnow(),
+                        'report': report,
+                    })
+            except OperationalError as e:
+                with lock:
+                    counters['write_locked'] += 'locked' in str(e)
+                continue
+            with lock:
+                counters['writes'] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return read_latencies, counters
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', type=Path, default=ROOT / 'data' / 'clauseease.db')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--report-kb', type=int, default=200, help="Size of each inserted report_json")
+    args = parser.parse_args()
+
+    configurations = (
+        ('rollback journal (previous)', lambda path: create_engine(
+            f'sqlite:///{path}', connect_args={'check_same_thread': False}, future=True)),
+        ('WAL + pragmas + pool', create_sqlite_engine),
+    )
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s, {args.report_kb} KB reports\n")
+    print(f"{'engine':<30}{'reads/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'writes/s':>10}{'locked r/w':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for position, (label, factory) in enumerate(configurations):
+            # Fresh copy per configuration, in rollback journal mode
+            db_path = Path(tmp) / f'benchmark_{position}.db'
+            shutil.copyfile(args.db, db_path)
+            engine = factory(db_path)
+            with engine.connect() as connection:
+                user_ids = [row[0] for row in connection.execute(text("SELECT id FROM users"))] or [1]
+
+            latencies, counters = run_workload(
+                engine, user_ids, args.seconds, args.readers, args.writers, args.report_kb
+            )
+            settings = sqlite_settings(engine)
+            engine.dispose()
+
+            print(f"{label:<30}{counters['reads'] / args.seconds:>9.1f}"
+                  f"{statistics.median(latencies) * 1000 if latencies else float('nan'):>9.1f}"
+                  f"{percentile(latencies, 0.95) * 1000:>9.1f}{percentile(latencies, 0.99) * 1000:>9.1f}"
+                  f"{counters['writes'] / args.seconds:>10.1f}"
+                  f"{counters['read_locked']:>6}/{counters['write_locked']:<5}")
+            print(f"{'':<30}{settings}")
+
+
+if __name__ == '__main__':
+    main()
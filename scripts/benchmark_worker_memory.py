@@ -0,0 +1,127 @@
+"""
+Resident memory of gunicorn workers with and without preloaded models.
+
+Starts gunicorn with gunicorn.conf.py twice, against a temporary copy of
+the database: once with GUNICORN_PRELOAD=0 (every worker imports the app
+and loads its own models) and once with preload (models loaded in the
+master before fork). After /api/health reports ready, it reads
+/proc/<pid>/smaps_rollup for the master and each worker. RSS counts
+shared pages in full for every process, PSS splits them between the
+processes that share them, and private memory is what the process alone
+holds. Linux only.
+
+    python scripts/benchmark_worker_memory.py [--workers 4] [--app main] [--port 5099]
+"""
+
+import argparse
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def smaps(pid):
+    """{Rss, Pss, Private} in MB from /proc/<pid>/smaps_rollup"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as listing:
+            return [int(child) for child in listing.read().split()]
+    except OSError:
+        return []
+
+
+def wait_ready(process, url, workers, timeout):
+    """Seconds until every worker is forked and /api/health returns 200"""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        if len(children(process.pid)) >= workers:
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                pass
+        time.sleep(0.5)
+    raise TimeoutError(f"not ready after {timeout}s")
+
+
+def measure(preload, args, db_path):
+    env = dict(
+        os.environ,
+        CLAUSEEASE_APP=args.app,
+        CLAUSEEASE_DB=str(db_path),
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_PRELOAD='1' if preload else '0',
+        GUNICORN_BIND=f'127.0.0.1:{args.port}',
+        # Measure the models, not idle job workers
+        JOB_WORKERS='1',
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', str(ROOT / 'gunicorn.conf.py')],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        ready_seconds = wait_ready(process, f'http://127.0.0.1:{args.port}/api/health', args.workers, args.timeout)
+        time.sleep(args.settle)
+        rows = [('master', process.pid, smaps(process.pid))]
+        rows += [(f'worker {n}', pid, smaps(pid)) for n, pid in enumerate(children(process.pid), 1)]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+    return ready_seconds, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--app', default='main', choices=('main', 'app'))
+    parser.add_argument('--db', type=Path, default=ROOT / 'data' / 'clauseease.db')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--settle', type=float, default=3, help="Seconds to wait after ready before measuring")
+    parser.add_argument('--timeout', type=float, default=600)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / args.db.name
+        shutil.copyfile(args.db, db_path)
+
+        totals = {}
+        for preload in (False, True):
+            label = 'preload' if preload else 'no preload'
+            ready_seconds, rows = measure(preload, args, db_path)
+            print(f"\n{label}: {args.workers} workers, ready in {ready_seconds:.1f}s")
+            print(f"{'process':<10}{'pid':>8}{'RSS MB':>9}{'PSS MB':>9}{'private MB':>12}")
+            for name, pid, memory in rows:
+                print(f"{name:<10}{pid:>8}{memory['rss']:>9.1f}{memory['pss']:>9.1f}{memory['private']:>12.1f}")
+            totals[label] = (sum(m['rss'] for _, _, m in rows), sum(m['pss'] for _, _, m in rows))
+            print(f"{'total':<18}{totals[label][0]:>9.1f}{totals[label][1]:>9.1f}")
+
+    (_, before), (_, after) = totals['no preload'], totals['preload']
+    print(f"\nTotal PSS: {before:,.1f} MB -> {after:,.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+One-off migration: compress existing documents.original_text / report_json rows.
+
+Walks the documents table in id order, rewriting plain-text values with
+the CompressedText format in batches (one transaction per batch, so it can
+be interrupted and re-run), then VACUUMs to return the freed pages. Prints
+the database size and document read latency before and after.
+
+    python scripts/compress_documents.py [--db data/clauseease.db] [--batch-size 100] [--copy]
+"""
+
+import argparse
+import json
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from components.blob_store import ref_digest
+from components.database import compress_text, decompress_text, is_compressed, COLUMN_COMPRESSION
+
+COLUMNS = ('original_text', 'report_json')
+
+
+def read_latency(db_path, repeat=5):
+    """Median seconds to load and decode every document's text and report"""
+    timings = []
+    with sqlite3.connect(db_path) as connection:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for original_text, report_json in connection.execute(
+                "SELECT original_text, report_json FROM documents"
+            ):
+                if ref_digest(original_text) or ref_digest(report_json):
+                    continue
+                decompress_text(original_text)
+                report = decompress_text(report_json)
+                if report:
+                    json.loads(report)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def compress_rows(db_path, batch_size, codec):
+    """Rewrite uncompressed values in batches; returns (rows updated, bytes before, bytes after)"""
+    updated = before = after = 0
+    last_id = 0
+    with sqlite3.connect(db_path) as connection:
+        while True:
+            rows = connection.execute(
+                f"SELECT id, {', '.join(COLUMNS)} FROM documents WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            changes = []
+            for document_id, *values in rows:
+                new_values = []
+                for value in values:
+                    # Blob store references are already compressed on disk
+                    if value is None or is_compressed(value) or ref_digest(value):
+                        new_values.append(value)
+                        continue
+                    text = decompress_text(value)
+                    stored = compress_text(text, codec=codec)
+                    before += len(text.encode('utf-8'))
+                    after += len(stored) if isinstance(stored, bytes) else len(stored.encode('utf-8'))
+                    new_values.append(stored)
+                if new_values != values:
+                    changes.append((*new_values, document_id))
+
+            if changes:
+                connection.executemany(
+                    f"UPDATE documents SET {', '.join(f'{c} = ?' for c in COLUMNS)} WHERE id = ?",
+                    changes
+                )
+            connection.commit()
+            updated += len(changes)
+            print(f"  through id {last_id}: {updated} rows compressed")
+
+        connection.execute("VACUUM")
+    return updated, before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', type=Path, default=ROOT / 'data' / 'clauseease.db')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--codec', choices=('zstd', 'zlib'), default=COLUMN_COMPRESSION)
+    parser.add_argument('--copy', action='store_true',
+                        help="Run against a temporary copy and leave the database untouched")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if args.copy:
+            db_path = Path(tmp) / args.db.name
+            shutil.copyfile(args.db, db_path)
+
+        size_before = db_path.stat().st_size
+        latency_before = read_latency(db_path)
+        print(f"Compressing {db_path} with {args.codec} in batches of {args.batch_size}")
+        updated, raw_bytes, stored_bytes = compress_rows(db_path, args.batch_size, args.codec)
+        size_after = db_path.stat().st_size
+        latency_after = read_latency(db_path)
+
+    print(f"\nRows compressed:  {updated}")
+    if raw_bytes:
+        print(f"Column bytes:     {raw_bytes / 1024:,.1f} KB -> {stored_bytes / 1024:,.1f} KB "
+              f"({stored_bytes / raw_bytes:.1%})")
+    print(f"Database size:    {size_before / 1024:,.1f} KB -> {size_after / 1024:,.1f} KB")
+    print(f"Read all docs:    {latency_before * 1000:,.2f} ms -> {latency_after * 1000:,.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,8 +9,13 @@ MODEL_NAMES = {
         "type": "classification",
         "num_labels": 5
     },
+    # Simplifier tiers (see SIMPLIFIER_TIERS in module5_language_simplification)
     "simplifier": {
-        "model": "tuner007/pegasus_paraphrase",
+        "model": "facebook/bart-large-cnn",
+        "type": "seq2seq"
+    },
+    "simplifier_distilled": {
+        "model": "sshleifer/distilbart-cnn-12-6",
         "type": "seq2seq"
     }
 }
@@ -0,0 +1,135 @@
+"""
+One-off migration: move documents.original_text / report_json into the blob store.
+
+Walks the documents table in id order in batches (one transaction per
+batch, so it can be interrupted and re-run). Each inline value of at least
+BLOB_MIN_BYTES is written to the content-addressed store under data/blobs
+and replaced by a reference to its hash, with the reference counted
+against the document's upload time. Then it VACUUMs, optionally archives
+blobs older than --archive-days, and prints database size, blob store size
+and how many references were deduplicated.
+
+    python scripts/migrate_blobs.py [--db data/clauseease.db] [--batch-size 100] [--archive-days 90] [--copy]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from sqlalchemy import text
+
+from components.blob_store import (
+    BLOB_MIN_BYTES,
+    BlobStore,
+    add_references,
+    archive_blobs,
+    blobs,
+    ensure_blob_tables,
+    make_ref,
+    ref_digest,
+)
+from components.database import create_sqlite_engine, decompress_text
+
+COLUMNS = ('original_text', 'report_json')
+
+
+def tree_size(root):
+    return sum(path.stat().st_size for path in Path(root).rglob('*') if path.is_file())
+
+
+def migrate_rows(engine, store, batch_size):
+    """Replace large inline values with blob references; returns (values moved, bytes moved)"""
+    moved = moved_bytes = 0
+    last_id = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(text(
+                f"SELECT id, uploaded_at, {', '.join(COLUMNS)} FROM documents "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ), {'last_id': last_id, 'limit': batch_size}).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            for document_id, uploaded_at, *values in rows:
+                changes = {}
+                for column, value in zip(COLUMNS, values):
+                    if value is None or ref_digest(value):
+                        continue
+                    value_text = decompress_text(value)
+                    raw_length = len(value_text.encode('utf-8'))
+                    if raw_length < BLOB_MIN_BYTES:
+                        continue
+                    digest = store.put(value_text)
+                    add_references(connection, [digest], used_at=datetime.fromisoformat(str(uploaded_at)))
+                    changes[column] = make_ref(digest)
+                    moved += 1
+                    moved_bytes += raw_length
+                if changes:
+                    connection.execute(text(
+                        f"UPDATE documents SET {', '.join(f'{c} = :{c}' for c in changes)} WHERE id = :id"
+                    ), dict(changes, id=document_id))
+        print(f"  through id {last_id}: {moved} values moved")
+
+    with engine.connect() as connection:
+        connection.exec_driver_sql("VACUUM")
+    return moved, moved_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', type=Path, default=ROOT / 'data' / 'clauseease.db')
+    parser.add_argument('--blobs', type=Path, default=None, help="Blob store root (default: blobs/ next to the database)")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--archive-days', type=float, default=None,
+                        help="Afterwards, archive blobs only referenced by documents older than this")
+    parser.add_argument('--copy', action='store_true',
+                        help="Run against a temporary copy and leave the database untouched")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        blob_root = args.blobs or args.db.parent / 'blobs'
+        if args.copy:
+            db_path = Path(tmp) / args.db.name
+            shutil.copyfile(args.db, db_path)
+            if blob_root.exists():
+                shutil.copytree(blob_root, Path(tmp) / 'blobs')
+            blob_root = Path(tmp) / 'blobs'
+
+        store = BlobStore(blob_root)
+        engine = create_sqlite_engine(db_path)
+        ensure_blob_tables(engine)
+
+        size_before = db_path.stat().st_size
+        print(f"Moving document text and reports from {db_path} to {blob_root}")
+        moved, moved_bytes = migrate_rows(engine, store, args.batch_size)
+        archived = 0
+        if args.archive_days is not None:
+            archived = archive_blobs(engine, older_than_days=args.archive_days, store=store)
+
+        with engine.connect() as connection:
+            distinct, references = connection.execute(
+                text(f"SELECT COUNT(*), COALESCE(SUM(refcount), 0) FROM {blobs.name}")
+            ).one()
+        # Closing the last connection checkpoints the WAL into the database file
+        engine.dispose()
+        size_after = db_path.stat().st_size
+        store_size = tree_size(blob_root) if blob_root.exists() else 0
+
+    print(f"\nValues moved:     {moved} ({moved_bytes / 1024:,.1f} KB of text)")
+    print(f"Blobs:            {distinct} distinct for {references} references")
+    if archived:
+        print(f"Archived:         {archived} blobs")
+    print(f"Database size:    {size_before / 1024:,.1f} KB -> {size_after / 1024:,.1f} KB")
+    print(f"Blob store size:  {store_size / 1024:,.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,38 @@
 """Blueprint routes for the ClauseEase admin dashboard."""
 from __future__ import annotations
 
-import base64
+import os
+import threading
+import time
 from datetime import datetime, timedelta, date
-from io import BytesIO
 from typing import Dict, List
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import seaborn as sns
 from flask import Blueprint, abort, render_template
 from flask_login import current_user, login_required
-from sqlalchemy import func
+
+from components.chart_rendering import render_chart
+from components.metrics import record_cache
+from components.rollups import (
+    active_users_on,
+    counts_by_day,
+    daily_documents,
+    daily_registrations,
+    total,
+    user_document_counts,
+)
 
 admin_bp = Blueprint('admin_portal', __name__)
 
+# Seconds a computed dashboard is served before the rollups are read again
+ADMIN_DASHBOARD_TTL = float(os.environ.get("ADMIN_DASHBOARD_TTL", "30"))
+
 _User = None
 _Document = None
 _get_db = None
 
+_dashboard_lock = threading.Lock()
+_dashboard_cache = {'context': None, 'expires_at': 0.0}
+
 
 def configure_admin(get_db_callable, user_model, document_model) -> None:
     """Inject dependencies from the main application."""
@@ -29,29 +42,12 @@ def configure_admin(get_db_callable, user_model, document_model) -> None:
     _Document = document_model
 
 
-def _encode_plot(fig: plt.Figure) -> str:
-    """Convert a Matplotlib figure to a base64 data URI."""
-    buffer = BytesIO()
-    fig.savefig(buffer, format='png', bbox_inches='tight', dpi=120)
-    buffer.seek(0)
-    image_b64 = base64.b64encode(buffer.read()).decode('utf-8')
-    plt.close(fig)
-    return f"data:image/png;base64,{image_b64}"
-
-
 def _registrations_last_week(db_session) -> Dict[str, int]:
     """Return registration counts keyed by ISO date string for the last 7 days."""
     today = date.today()
     start_date = today - timedelta(days=6)
 
-    rows = (
-        db_session.query(func.date(_User.created_at), func.count(_User.id))
-        .filter(_User.created_at >= datetime.combine(start_date, datetime.min.time()))
-        .group_by(func.date(_User.created_at))
-        .all()
-    )
-
-    counts = {str(day): total for day, total in rows}
+    counts = counts_by_day(db_session.connection(), daily_registrations, start_date, today)
     result: Dict[str, int] = {}
     for offset in range(7):
         current = start_date + timedelta(days=offset)
@@ -66,14 +62,13 @@ def _documents_last_weeks(db_session) -> Dict[str, int]:
     current_week_start = today - timedelta(days=today.weekday())
     four_weeks_ago_start = current_week_start - timedelta(weeks=3)
 
-    rows = (
-        db_session.query(func.strftime('%Y-%W', _Document.uploaded_at), func.count(_Document.id))
-        .filter(_Document.uploaded_at >= datetime.combine(four_weeks_ago_start, datetime.min.time()))
-        .group_by(func.strftime('%Y-%W', _Document.uploaded_at))
-        .all()
-    )
+    daily = counts_by_day(db_session.connection(), daily_documents, four_weeks_ago_start, today)
 
-    counts = {week: total for week, total in rows}
+    counts: Dict[str, int] = {}
+    for day, day_total in daily.items():
+        day_date = date.fromisoformat(day)
+        week_key = (day_date - timedelta(days=day_date.weekday())).strftime('%Y-%W')
+        counts[week_key] = counts.get(week_key, 0) + day_total
 
     result: Dict[str, int] = {}
     for weeks_back in reversed(range(4)):
@@ -86,51 +81,20 @@ def _documents_last_weeks(db_session) -> Dict[str, int]:
 
 
 def _build_line_chart(labels: List[str], values: List[int], title: str) -> str:
-    sns.set_theme(style='whitegrid')
-    fig, ax = plt.subplots(figsize=(7, 3.6))
-    sns.lineplot(x=labels, y=values, marker='o', linewidth=2, color='#2563EB', ax=ax)
-    ax.set_xlabel('')
-    ax.set_ylabel('Count', fontweight='bold')
-    ax.set_ylim(bottom=0)
-    for tick in ax.get_xticklabels():
-        tick.set_rotation(25)
-    fig.tight_layout()
-    return _encode_plot(fig)
+    return render_chart('admin_line', {'labels': labels, 'values': values}, title)
 
 
 def _build_bar_chart(labels: List[str], values: List[int], title: str) -> str:
-    sns.set_theme(style='whitegrid')
-    fig, ax = plt.subplots(figsize=(7, 3.6))
-    palette = sns.color_palette('Blues', len(values))
-    sns.barplot(x=labels, y=values, palette=palette, ax=ax)
-    ax.set_xlabel('')
-    ax.set_ylabel('Count', fontweight='bold')
-    ax.set_ylim(bottom=0)
-    for index, value in enumerate(values):
-        ax.text(index, value + 0.05, str(value), ha='center', va='bottom', fontweight='bold')
-    for tick in ax.get_xticklabels():
-        tick.set_rotation(15)
-    fig.tight_layout()
-    return _encode_plot(fig)
-
+    return render_chart('admin_bar', {'labels': labels, 'values': values}, title)
 
-@admin_bp.route('/admin')
-@login_required
-def admin_dashboard():
-    if not all((_get_db, _User, _Document)):
-        abort(500)
-    if current_user.username.lower() != 'admin':
-        abort(403)
 
+def _dashboard_context() -> Dict:
+    """Compute the dashboard from the rollup tables."""
     with _get_db() as db:
-        total_users = db.query(_User).count()
-        total_documents = db.query(_Document).count()
-        today = datetime.now().date()
-        active_users_today = (
-            db.query(func.count(func.distinct(_Document.user_id)))
-            .filter(func.date(_Document.uploaded_at) == today.isoformat())
-            .scalar() or 0
-        )
+        connection = db.connection()
+        total_users = total(connection, daily_registrations)
+        total_documents = total(connection, daily_documents)
+        active_users_today = active_users_on(connection, datetime.now().date())
 
         registration_trend = _registrations_last_week(db)
         registration_labels = [
@@ -153,10 +117,9 @@ def admin_dashboard():
         )
 
         active_users_rows = (
-            db.query(_User.username, func.count(_Document.id).label('doc_count'))
-            .outerjoin(_Document, _Document.user_id == _User.id)
-            .group_by(_User.id)
-            .order_by(func.count(_Document.id).desc())
+            db.query(_User.username, user_document_counts.c.document_count)
+            .join(user_document_counts, user_document_counts.c.user_id == _User.id)
+            .order_by(user_document_counts.c.document_count.desc())
             .limit(5)
             .all()
         )
@@ -175,7 +138,7 @@ def admin_dashboard():
             'activity_level': level
         })
 
-    context = {
+    return {
         'total_users': total_users,
         'total_documents': total_documents,
         'active_users_today': active_users_today,
@@ -187,4 +150,24 @@ def admin_dashboard():
         'generated_at': datetime.utcnow(),
     }
 
-    return render_template('admin.html', **context)
+
+def _cached_dashboard_context() -> Dict:
+    """Serve the last computed dashboard until ADMIN_DASHBOARD_TTL expires."""
+    with _dashboard_lock:
+        expired = _dashboard_cache['context'] is None or time.monotonic() >= _dashboard_cache['expires_at']
+        record_cache('admin_dashboard', not expired)
+        if expired:
+            _dashboard_cache['context'] = _dashboard_context()
+            _dashboard_cache['expires_at'] = time.monotonic() + ADMIN_DASHBOARD_TTL
+        return _dashboard_cache['context']
+
+
+@admin_bp.route('/admin')
+@login_required
+def admin_dashboard():
+    if not all((_get_db, _User, _Document)):
+        abort(500)
+    if current_user.username.lower() != 'admin':
+        abort(403)
+
+    return render_template('admin.html', **_cached_dashboard_context())
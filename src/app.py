@@ -1,34 +1,27 @@
 import os
-import json
+import time
 import logging
 import traceback
-import io
-import base64
 import re
+import base64
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import pytz
 from contextlib import contextmanager
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-import fitz
-from docx import Document as DocxDocument
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import seaborn as sns
 from collections import Counter
 
-from flask import Flask, request, jsonify, session, make_response, render_template, redirect, url_for, flash, send_file
+from flask import Flask, Response, request, jsonify, session, make_response, render_template, redirect, url_for, flash, send_file
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import DataRequired, Email, EqualTo, Length
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime, ForeignKey, or_
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker, scoped_session
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Index, or_, func, insert, exists
+from sqlalchemy.orm import declarative_base, deferred, relationship, sessionmaker, scoped_session, undefer
 
-from nltk.tokenize import sent_tokenize, word_tokenize
-import syllables
+from nltk.tokenize import sent_tokenize
 
 # Project paths
 ROOT = Path(__file__).parent.parent
@@ -46,16 +39,55 @@ if str(CURRENT_DIR) not in sys.path:
 # Import custom modules
 from components.module1_document_ingestion import extract_text
 from components.module2_text_preprocessing import clean_text, preprocess_contract_text
-from components.module3_clause_detection import detect_clause_type, ensure_model_loaded
+from components.module3_clause_detection import detect_clause_type
 from components.module4_legal_terms import extract_legal_terms
-from components.module5_language_simplification import simplify_text
-from components.readability_metrics import calculate_all_metrics
+from components.module5_language_simplification import (
+    simplify_text,
+    lexical_simplify,
+    ensure_simplifier_loaded,
+    compose_simplified_document,
+    select_tier,
+)
+from components.chart_rendering import render_chart
+from components.database import add_missing_columns, create_sqlite_engine
+from components.blob_store import (
+    BlobText,
+    configure_blob_store,
+    ensure_blob_tables,
+    register_blob_listeners,
+    run_blob_maintenance,
+    start_blob_maintenance,
+)
+from components.rollups import ensure_rollup_tables, register_rollup_listeners
+from components.warmup import readiness, warm_models
+from components.structured_logging import configure_logging, init_request_logging
+from components.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, observe_document, observe_stage, render_metrics, stage_timer
+from components.jobs import JobWorkerPool, adopt_jobs, enqueue_job, ensure_job_tables, get_job, job_status, new_job_id
+from components.search import ensure_search_index
+from components.pagination import encode_cursor, decode_cursor, keyset_page, page_size
+from components.serialization import FastJSONProvider, decode_report, dumps, iter_encode
+from components.export import EXPORT_FORMATS, export_entry_name, export_filename, iter_documents, stream_ndjson, stream_zip
+from components.clause_store import clause_rows, legal_term_rows, report_rows, clause_to_dict, legal_term_to_dict
+from components.readability_metrics import (
+    ReadabilityStats,
+    build_chart_data,
+    replace_clause_stats,
+    stored_simplified_totals,
+    calculate_all_metrics,
+)
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Database configuration
-DB_PATH = ROOT / 'data' / 'clauseease.db'
+DB_PATH = Path(os.environ.get('CLAUSEEASE_DB', ROOT / 'data' / 'clauseease.db'))
 DB_PATH.parent.mkdir(exist_ok=True)
+# Job kind of this app's uploads; the other app queues 'api_process' jobs in the same table
+PROCESS_JOB = 'web_process'
 
-engine = create_engine(f'sqlite:///{DB_PATH}', connect_args={'check_same_thread': False}, future=True)
+engine = create_sqlite_engine(DB_PATH)
+# Document text and reports, deduplicated by content hash
+configure_blob_store(DB_PATH.parent / 'blobs')
 SessionLocal = scoped_session(sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True))
 Base = declarative_base()
 
@@ -75,22 +107,65 @@ class User(Base, UserMixin):
 # Document model
 class Document(Base):
     __tablename__ = 'documents'
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first
+        Index('ix_documents_user_uploaded', 'user_id', 'uploaded_at', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
     document_title = Column(String(255), nullable=False)
-    original_text = Column(Text, nullable=False)
+    # Loaded on first access, archived blobs are only decompressed when viewed
+    original_text = deferred(Column(BlobText, nullable=False))
+    # clean_text(original_text), the text clause offsets (original_start/end) index
+    cleaned_text = deferred(Column(BlobText))
     simplified_text_basic = Column(Text)
     simplified_text_intermediate = Column(Text)
     simplified_text_advanced = Column(Text)
     original_readability_score = Column(Float)
     uploaded_at = Column(DateTime, default=lambda: datetime.now(pytz.timezone('Asia/Kolkata')))
-    report_json = Column(Text)
+    report_json = deferred(Column(BlobText))
     stats_json = Column(Text)
     clause_count = Column(Integer, default=0)
     word_count = Column(Integer, default=0)
+    # Processing job that stored the document, so a retried job finds it instead of storing it twice
+    job_id = Column(String(32), index=True, unique=True)
 
     user = relationship('User', back_populates='documents')
+    clauses = relationship('Clause', back_populates='document', cascade='all, delete-orphan', order_by='Clause.clause_index')
+    legal_terms = relationship('LegalTerm', back_populates='document', cascade='all, delete-orphan')
+
+
+# Normalized clause rows
+class Clause(Base):
+    __tablename__ = 'clauses'
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey('documents.id'), nullable=False, index=True)
+    clause_index = Column(Integer, nullable=False)
+    clause_type = Column(String(100), nullable=False, index=True)
+    original_start = Column(Integer)
+    original_end = Column(Integer)
+    cleaned_text = Column(Text, nullable=False)
+    simplified_text = Column(Text)
+    entities_json = Column(Text)
+
+    document = relationship('Document', back_populates='clauses')
+
+
+# Normalized legal term rows
+class LegalTerm(Base):
+    __tablename__ = 'legal_terms'
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey('documents.id'), nullable=False, index=True)
+    term = Column(String(255), nullable=False, index=True)
+    category = Column(String(100))
+    definition = Column(Text)
+    simplified_explanation = Column(Text)
+
+    document = relationship('Document', back_populates='legal_terms')
+
 
 # Glossary model
 class Glossary(Base):
@@ -104,6 +179,11 @@ class Glossary(Base):
 
     creator = relationship('User', back_populates='glossary_entries')
 
+# Admin dashboard counts are kept up to date as users and documents are written
+register_rollup_listeners(User, Document)
+# Blob reference counts follow the document rows
+register_blob_listeners(Document, ('original_text', 'cleaned_text', 'report_json'))
+
 # Login form
 class LoginForm(FlaskForm):
     email = StringField('Email Address', validators=[DataRequired(), Email()])
@@ -129,107 +209,174 @@ def get_db():
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips columns and indexes added to tables that already exist
+    add_missing_columns(engine, Document.__table__)
+    for index in Document.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    ensure_search_index(engine)
+    ensure_rollup_tables(engine)
+    ensure_blob_tables(engine)
+    run_blob_maintenance(engine)
+    ensure_job_tables(engine)
+    # Uploads queued while both apps shared the 'process' kind
+    adopt_jobs(engine, 'process', PROCESS_JOB, 'user_id')
+    backfill_clause_tables()
+    backfill_cleaned_text()
+
+def store_clause_rows(db, document_id, clauses, segments, legal_terms=None):
+    """Bulk insert a document's clause (and optionally legal term) rows"""
+    rows = clause_rows(document_id, clauses, segments)
+    if rows:
+        db.execute(insert(Clause), rows)
+    if legal_terms is not None:
+        term_rows = legal_term_rows(document_id, legal_terms)
+        if term_rows:
+            db.execute(insert(LegalTerm), term_rows)
+
+def backfill_cleaned_text(batch_size=100):
+    """Store the cleaned text of documents saved before the column existed"""
+    with get_db() as db:
+        pending = [row.id for row in db.query(Document.id).filter(Document.cleaned_text.is_(None)).order_by(Document.id)]
 
-def count_syllables(word):
-    return syllables.estimate(word)
-
-def calculate_reading_ease(text):
-    if not text or not text.strip():
-        return 0.0
-
-    try:
-        sentences = sent_tokenize(text)
-        words = [word for word in word_tokenize(text) if word.isalpha()]
+    for start in range(0, len(pending), batch_size):
+        with get_db() as db:
+            documents = db.query(Document).options(undefer(Document.original_text)).filter(
+                Document.id.in_(pending[start:start + batch_size])
+            )
+            for document in documents:
+                document.cleaned_text = clean_text(document.original_text or '')
+            db.commit()
+    if pending:
+        logger.info("Stored cleaned text for %d documents", len(pending))
 
-        if len(sentences) == 0 or len(words) == 0:
-            return 0.0
+def backfill_clause_tables(batch_size=100):
+    """Populate clauses/legal_terms for documents stored before the tables existed"""
+    with get_db() as db:
+        pending = [row.id for row in db.query(Document.id).filter(
+            Document.clause_count > 0,
+            ~exists().where(Clause.document_id == Document.id)
+        ).order_by(Document.id)]
 
-        syllable_count = sum(count_syllables(word) for word in words)
-        words_per_sentence = len(words) / max(len(sentences), 1)
-        syllables_per_word = syllable_count / max(len(words), 1)
-        score = 206.835 - (1.015 * words_per_sentence) - (84.6 * syllables_per_word)
-        return round(max(min(score, 100.0), 0.0), 2)
-    except Exception:
-        return 0.0
+    for start in range(0, len(pending), batch_size):
+        with get_db() as db:
+            clause_batch, term_batch = [], []
+            documents = db.query(Document).filter(Document.id.in_(pending[start:start + batch_size]))
+            for document in documents:
+                report = decode_report(document.report_json)
+                clauses, terms = report_rows(document.id, report, document.original_text)
+                clause_batch.extend(clauses)
+                term_batch.extend(terms)
+            if clause_batch:
+                db.execute(insert(Clause), clause_batch)
+            if term_batch:
+                db.execute(insert(LegalTerm), term_batch)
+            db.commit()
+    if pending:
+        logger.info("Backfilled clause tables for %d documents", len(pending))
 
 # Generate base64 charts
 def generate_chart_base64(chart_type, data, title):
-    """Create chart as base64"""
-    plt.figure(figsize=(10, 7))
-    plt.style.use('seaborn-v0_8-whitegrid')
-    
-    if chart_type == 'pie':
-        labels = list(data.keys())
-        sizes = list(data.values())
-        colors = ['#3b82f6', '#f59e0b', '#10b981', '#8b5cf6', '#ef4444', '#06b6d4', '#ec4899', '#14b8a6']
-        
-        # Simple 2D design
-        wedges, texts, autotexts = plt.pie(
-            sizes, 
-            labels=labels, 
-            autopct='%1.1f%%', 
-            colors=colors[:len(labels)],
-            startangle=90,
-            textprops={'fontsize': 12, 'weight': 'bold', 'color': '#1e293b'}
-        )
-        
-        # Style percentages
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontsize(13)
-            autotext.set_weight('bold')
-        
-        plt.title(title, fontsize=16, fontweight='bold', color='#1e293b', pad=25)
-        plt.axis('equal')
-        
-    elif chart_type == 'bar':
-        categories = list(data.keys())
-        original_values = [v[0] if isinstance(v, list) else v for v in data.values()]
-        simplified_values = [v[1] if isinstance(v, list) and len(v) > 1 else v * 0.7 for v in data.values()]
-        
-        x = range(len(categories))
-        width = 0.38
-        
-        fig, ax = plt.subplots(figsize=(10, 7))
-        
-        # Create comparison bars
-        bars1 = ax.bar([i - width/2 for i in x], original_values, width, 
-                       label='Original', color='#3b82f6', edgecolor='#1e40af', linewidth=2)
-        bars2 = ax.bar([i + width/2 for i in x], simplified_values, width,
-                       label='Simplified', color='#10b981', edgecolor='#059669', linewidth=2)
-        
-        # Add value labels
-        for bars in [bars1, bars2]:
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}',
-                       ha='center', va='bottom', fontweight='bold', fontsize=10)
-        
-        ax.set_xlabel('Metrics', fontsize=13, fontweight='bold', color='#1e293b', labelpad=10)
-        ax.set_ylabel('Values', fontsize=13, fontweight='bold', color='#1e293b', labelpad=10)
-        ax.set_title(title, fontsize=16, fontweight='bold', color='#1e293b', pad=25)
-        ax.set_xticks(x)
-        ax.set_xticklabels(categories, rotation=0, ha='center', fontsize=11, fontweight='600')
-        ax.legend(fontsize=11, loc='upper right', framealpha=0.95, edgecolor='#cbd5e1')
-        ax.grid(True, alpha=0.2, linestyle='--', linewidth=0.5)
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        
-        plt.tight_layout()
-    
-    buffer = io.BytesIO()
-    plt.savefig(buffer, format='png', dpi=120, bbox_inches='tight', facecolor='white', edgecolor='none')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-    plt.close()
-    
-    return f"data:image/png;base64,{image_base64}"
+    """Create chart as base64 (rendered in the chart worker pool)"""
+    kind = 'app_pie' if chart_type == 'pie' else 'app_comparison_bar'
+    return render_chart(kind, dict(data), title)
+
+def get_chart_data(results):
+    """Chart series for a report, derived from clauses/metrics for older reports"""
+    if results.get('chart_data'):
+        return results['chart_data']
+    clause_types = Counter(c['type'] for c in results.get('clauses', []) if isinstance(c, dict) and c.get('type'))
+    return build_chart_data(dict(clause_types), results.get('original_metrics', {}), results.get('simplified_metrics', {}))
+
+# Explicit PNG export of a report chart
+CHART_EXPORTS = {
+    'clause_types': ('pie', 'Clause Types Distribution'),
+    'stats': ('bar', 'Text Statistics Comparison'),
+}
+
+def export_chart_png(chart_data, chart_name):
+    """Render one chart of a report to PNG bytes"""
+    chart_type, title = CHART_EXPORTS[chart_name]
+    if chart_name == 'clause_types':
+        series = chart_data['clause_types']
+        data = dict(zip(series['labels'], series['values']))
+    else:
+        series = chart_data['stats']
+        data = {
+            category: [original, simplified]
+            for category, original, simplified in zip(series['categories'], series['original'], series['simplified'])
+        }
+    data_uri = generate_chart_base64(chart_type, data, title)
+    if not data_uri:
+        return None
+    return base64.b64decode(data_uri.split(',', 1)[1])
+
+# Background model refinement (single worker keeps model calls serialized)
+_refinement_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='simplifier')
+
+def _refine_document(document_id, level):
+    """Replace a stored lexical preview with model simplification"""
+    try:
+        with get_db() as db:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if not document or not document.report_json:
+                return
+            results = decode_report(document.report_json)
+            raw_text = document.original_text
+            cleaned_text = document.cleaned_text or clean_text(raw_text)
+
+        clauses = results.get('clauses', [])
+        timing = results.get('simplification_timing') or {}
+        tier = timing.get('tier', 'large')
+        totals = results.setdefault('readability_totals', {})
+        simplified_totals = stored_simplified_totals(totals, clauses)
+        started = time.perf_counter()
+        if tier != 'rules' and ensure_simplifier_loaded(tier=tier):
+            for clause in clauses:
+                refined = simplify_text(clause['cleaned_text'], level=level, tier=tier)
+                # Keep the preview where the model declined to rewrite
+                if refined and refined != clause['cleaned_text']:
+                    simplified_totals = replace_clause_stats(simplified_totals, clause, refined)
+            status = 'refined'
+        else:
+            status = 'lexical'
+        refine_seconds = time.perf_counter() - started
+        timing['actual_seconds'] = round(refine_seconds, 3)
+        observe_stage('refine', refine_seconds)
+
+        simplified_text, segments = compose_simplified_document(cleaned_text, clauses)
+        totals['simplified'] = simplified_totals.to_dict()
+        simplified_metrics = simplified_totals.to_metrics()
+        clause_types = Counter(c['type'] for c in clauses)
+        original_metrics = results.get('original_metrics') or calculate_all_metrics(raw_text)
+        results.update({
+            'clauses': clauses,
+            'simplified_text': simplified_text,
+            'segments': segments,
+            'simplified_metrics': simplified_metrics,
+            'chart_data': build_chart_data(dict(clause_types), original_metrics, simplified_metrics),
+            'simplified_sentences': simplified_metrics['sentence_count'],
+            'simplification_status': status,
+            'simplification_timing': timing,
+        })
+
+        with get_db() as db:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if not document:
+                return
+            setattr(document, f'simplified_text_{level}', simplified_text)
+            document.report_json = dumps(results)
+            db.query(Clause).filter(Clause.document_id == document_id).delete(synchronize_session=False)
+            store_clause_rows(db, document_id, clauses, segments)
+            db.commit()
+    except Exception:
+        logger.exception("Refinement failed for document %s", document_id)
 
 # Flask app configuration
 app = Flask(__name__, 
             template_folder=str(ROOT / 'templates'),
             static_folder=str(ROOT / 'static'))
+app.json = FastJSONProvider(app)
+init_request_logging(app)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
 app.config['UPLOAD_FOLDER'] = str(UPLOAD_FOLDER)
 app.config['WTF_CSRF_ENABLED'] = True
@@ -339,156 +486,246 @@ from admin_routes import admin_bp, configure_admin
 configure_admin(get_db, User, Document)
 app.register_blueprint(admin_bp)
 
+def _document_for_job(job_id, simplification_level):
+    """Job result for a document a previous run of the job already stored, or None"""
+    with get_db() as db:
+        document = (
+            db.query(Document)
+            .options(undefer(Document.report_json))
+            .filter(Document.job_id == job_id)
+            .first()
+        )
+        if document is None:
+            return None
+        if decode_report(document.report_json).get('simplification_status') == 'preview':
+            # The refinement queued by the lost run went with it
+            _refinement_executor.submit(_refine_document, document.id, simplification_level)
+        return {'document_id': document.id, 'clause_count': document.clause_count}
+
+
+def _run_process_job(job):
+    """Job handler: extract, analyse and store a document queued by /process"""
+    payload = job.payload
+    filename = payload['filename']
+    simplification_level = payload['simplification_level']
+    # A retry after the document was stored (worker lost before the job was marked done)
+    stored = _document_for_job(job.id, simplification_level)
+    if stored is not None:
+        return stored
+    latency_budget = payload.get('latency_budget')
+
+    # Extract document text
+    job.report('extract_text')
+    with stage_timer('extract'):
+        raw_text = extract_text(payload['path'])
+    if not raw_text or not raw_text.strip():
+        raise ValueError('Could not extract text from the file')
+
+    # Clean and preprocess
+    job.report('preprocess')
+    with stage_timer('preprocess'):
+        processed_text = clean_text(raw_text)
+        processed_clauses = preprocess_contract_text(raw_text)
+
+    # Process each clause
+    job.report('clauses')
+    clauses = []
+    original_totals = ReadabilityStats()
+    simplified_totals = ReadabilityStats()
+    for idx, clause_data in enumerate(processed_clauses):
+        with stage_timer('classify'):
+            clause_type = detect_clause_type(clause_data['cleaned_text'])
+        # Instant preview, refined by the model in the background
+        with stage_timer('simplify'):
+            simplified = lexical_simplify(clause_data['cleaned_text'], level=simplification_level)
+
+        # Readability accumulators, merged into document metrics below
+        with stage_timer('metrics'):
+            original_stats = ReadabilityStats.from_text(clause_data['cleaned_text'])
+            simplified_stats = ReadabilityStats.from_text(simplified)
+        original_totals += original_stats
+        simplified_totals += simplified_stats
+
+        clauses.append({
+            'index': idx + 1,
+            'raw_text': clause_data['raw_text'],
+            'cleaned_text': clause_data['cleaned_text'],
+            'sentences': clause_data['sentences'],
+            'entities': clause_data['entities'],
+            'type': clause_type,
+            'simplified': simplified,
+            'readability': {
+                'original': original_stats.to_dict(),
+                'simplified': simplified_stats.to_dict()
+            }
+        })
+        job.report(progress=(idx + 1) / len(processed_clauses))
+
+    # Extract legal terms
+    job.report('extract_legal_terms')
+    with stage_timer('terms'):
+        legal_terms = extract_legal_terms(processed_text)
+
+    # Choose simplifier tier for the background refinement
+    tier, estimated_seconds = select_tier(processed_text, latency_budget)
+
+    # Build document text from clause outputs
+    simplified_text, segments = compose_simplified_document(processed_text, clauses)
+    
+    # Readability metrics from the per-clause accumulators, so they count the
+    # cleaned clause text rather than the raw document
+    job.report('document_metrics')
+    with stage_timer('metrics'):
+        original_metrics = original_totals.to_metrics()
+        simplified_metrics = simplified_totals.to_metrics()
+    
+    # Chart series (rendered client-side, PNG only on export)
+    with stage_timer('charts'):
+        clause_types = Counter([c['type'] for c in clauses])
+        chart_data = build_chart_data(dict(clause_types), original_metrics, simplified_metrics)
+    
+    # Highlight legal terms
+    highlighted_text = raw_text
+    if legal_terms:
+        for term in legal_terms:
+            if isinstance(term, dict) and 'term' in term:
+                term_word = term['term']
+                term_definition = term.get('simplified_explanation', term.get('definition', 'Legal term'))
+                
+                # Escape HTML quotes
+                term_definition = term_definition.replace('"', '&quot;').replace("'", '&#39;')
+                
+                # Preserve original case
+                def replace_func(match):
+                    return f'<span class="highlight-legal" title="{term_definition}">{match.group(0)}</span>'
+                
+                # Apply highlighting
+                pattern = re.compile(r'\b' + re.escape(term_word) + r'\b', re.IGNORECASE)
+                highlighted_text = pattern.sub(replace_func, highlighted_text)
+    
+    # Package results
+    results = {
+        'clauses': clauses,
+        'legal_terms': legal_terms,
+        'simplified_text': simplified_text,
+        'segments': segments,
+        'original_metrics': original_metrics,
+        'simplified_metrics': simplified_metrics,
+        'readability_totals': {
+            'original': original_totals.to_dict(),
+            'simplified': simplified_totals.to_dict()
+        },
+        'chart_data': chart_data,
+        'highlighted_text': highlighted_text,
+        'simplification_level': simplification_level,
+        'simplification_status': 'preview',
+        'simplification_timing': {
+            'tier': tier,
+            'budget_seconds': latency_budget,
+            'estimated_seconds': estimated_seconds,
+            'actual_seconds': None
+        },
+        'original_sentences': original_metrics['sentence_count'],
+        'simplified_sentences': simplified_metrics['sentence_count']
+    }
+    
+    # Save to database with level-specific field
+    job.report('save_document')
+    with stage_timer('db_write'), get_db() as db:
+        # Prepare level-specific storage
+        level_fields = {
+            'simplified_text_basic': None,
+            'simplified_text_intermediate': None,
+            'simplified_text_advanced': None
+        }
+        level_fields[f'simplified_text_{simplification_level}'] = simplified_text
+
+        document = Document(
+            user_id=payload['user_id'],
+            document_title=filename,
+            original_text=raw_text,
+            cleaned_text=processed_text,
+            **level_fields,
+            original_readability_score=original_metrics['flesch_reading_ease'],
+            report_json=dumps(results),
+            clause_count=len(clauses),
+            word_count=len(raw_text.split()),
+            job_id=job.id
+        )
+        db.add(document)
+        db.flush()
+        document_id = document.id
+        store_clause_rows(db, document_id, clauses, segments, legal_terms)
+        db.commit()
+
+    observe_document(len(raw_text.split()), len(clauses))
+
+    # Queue model refinement of the preview
+    _refinement_executor.submit(_refine_document, document_id, simplification_level)
+    return {'document_id': document_id, 'clause_count': len(clauses)}
+
+
+# Uploads are processed by a local worker pool; the queue lives in the jobs table
+_job_pool = JobWorkerPool(engine, {PROCESS_JOB: _run_process_job}, upload_root=UPLOAD_FOLDER / 'jobs')
+
+
 @app.route('/process', methods=['POST'])
 @login_required
 def process_document():
-    """Process uploaded document with multi-level simplification"""
+    """Queue an uploaded document for processing; the page polls /api/jobs/<id>"""
     try:
         # Get uploaded file
         file = request.files.get('file')
         if not file or file.filename == '':
-            flash('No file selected')
-            return redirect(url_for('dashboard'))
+            return jsonify({'message': 'No file selected'}), 400
 
         filename = secure_filename(file.filename)
         if not filename.lower().endswith(('.pdf', '.docx', '.txt')):
-            flash('Invalid file type. Please upload PDF, DOCX, or TXT files only.')
-            return redirect(url_for('dashboard'))
-        
+            return jsonify({'message': 'Invalid file type. Please upload PDF, DOCX, or TXT files only.'}), 400
+
         # Get simplification level
         simplification_level = request.form.get('simplification_level', 'basic')
         if simplification_level not in ['basic', 'intermediate', 'advanced']:
             simplification_level = 'basic'
 
-        # Save temp file
-        file_path = UPLOAD_FOLDER / filename
-        file.save(str(file_path))
+        # Optional latency budget in seconds for model simplification
+        latency_budget = request.form.get('latency_budget', type=float)
 
-        # Extract document text
-        raw_text = extract_text(str(file_path))
-        if not raw_text or not raw_text.strip():
-            flash('Could not extract text from the file')
-            return redirect(url_for('dashboard'))
+        # Kept until the job finishes, so a restarted worker can pick it up again
+        job_id = new_job_id()
+        file_path = _job_pool.upload_dir(job_id) / filename
+        file.save(str(file_path))
 
-        # Clean and preprocess
-        processed_text = clean_text(raw_text)
-        processed_clauses = preprocess_contract_text(raw_text)
-        
-        # Process each clause
-        clauses = []
-        for idx, clause_data in enumerate(processed_clauses):
-            clause_type = detect_clause_type(clause_data['cleaned_text'])
-            simplified = simplify_text(clause_data['cleaned_text'], level=simplification_level)
-            
-            clauses.append({
-                'index': idx + 1,
-                'raw_text': clause_data['raw_text'],
-                'cleaned_text': clause_data['cleaned_text'],
-                'sentences': clause_data['sentences'],
-                'entities': clause_data['entities'],
-                'type': clause_type,
-                'simplified': simplified
-            })
-        
-        # Extract legal terms
-        legal_terms = extract_legal_terms(processed_text)
-        simplified_text = simplify_text(processed_text, level=simplification_level)
-        
-        # Calculate readability metrics
-        original_metrics = calculate_all_metrics(raw_text)
-        simplified_metrics = calculate_all_metrics(simplified_text)
-        
-        # Generate clause chart
-        clause_types = Counter([c['type'] for c in clauses])
-        clause_chart = generate_chart_base64('pie', clause_types, 'Clause Types Distribution')
-        
-        # Calculate text statistics
-        original_words = len(raw_text.split())
-        simplified_words = len(simplified_text.split()) if simplified_text and simplified_text.strip() else int(original_words * 0.7)
-        
-        from nltk.tokenize import sent_tokenize
-        original_sentences = len(sent_tokenize(raw_text))
-        simplified_sentences = len(sent_tokenize(simplified_text)) if simplified_text and simplified_text.strip() else int(original_sentences * 0.7)
-        
-        stats_data = {
-            'Word Count': [original_words, simplified_words],
-            'Sentence Count': [original_sentences, simplified_sentences],
-            'Avg Words/Sentence': [round(original_words / max(original_sentences, 1), 1), 
-                                   round(simplified_words / max(simplified_sentences, 1), 1)],
-            'Complex Words': [sum(1 for word in raw_text.split() if len(word) > 8),
-                            sum(1 for word in simplified_text.split() if len(word) > 8) if simplified_text and simplified_text.strip() else 0]
-        }
-        stats_chart = generate_chart_base64('bar', stats_data, 'Text Statistics Comparison')
-        
-        # Highlight legal terms
-        highlighted_text = raw_text
-        if legal_terms:
-            for term in legal_terms:
-                if isinstance(term, dict) and 'term' in term:
-                    term_word = term['term']
-                    term_definition = term.get('simplified_explanation', term.get('definition', 'Legal term'))
-                    
-                    # Escape HTML quotes
-                    term_definition = term_definition.replace('"', '&quot;').replace("'", '&#39;')
-                    
-                    # Preserve original case
-                    def replace_func(match):
-                        return f'<span class="highlight-legal" title="{term_definition}">{match.group(0)}</span>'
-                    
-                    # Apply highlighting
-                    pattern = re.compile(r'\b' + re.escape(term_word) + r'\b', re.IGNORECASE)
-                    highlighted_text = pattern.sub(replace_func, highlighted_text)
-        
-        # Package results
-        results = {
-            'clauses': clauses,
-            'legal_terms': legal_terms,
-            'simplified_text': simplified_text,
-            'original_metrics': original_metrics,
-            'simplified_metrics': simplified_metrics,
-            'clause_type_chart': clause_chart,
-            'stats_chart': stats_chart,
-            'highlighted_text': highlighted_text,
+        enqueue_job(engine, PROCESS_JOB, current_user.id, {
+            'user_id': current_user.id,
+            'filename': filename,
+            'path': str(file_path),
             'simplification_level': simplification_level,
-            'original_sentences': original_sentences,
-            'simplified_sentences': simplified_sentences
-        }
-        
-        # Save to database with level-specific field
-        with get_db() as db:
-            # Prepare level-specific storage
-            level_fields = {
-                'simplified_text_basic': None,
-                'simplified_text_intermediate': None,
-                'simplified_text_advanced': None
-            }
-            level_fields[f'simplified_text_{simplification_level}'] = simplified_text
-            
-            document = Document(
-                user_id=current_user.id,
-                document_title=filename,
-                original_text=raw_text,
-                **level_fields,
-                original_readability_score=calculate_reading_ease(raw_text),
-                report_json=json.dumps(results),
-                clause_count=len(clauses),
-                word_count=len(raw_text.split())
-            )
-            db.add(document)
-            db.commit()
-            db.refresh(document)
-            document_id = document.id
-            
-        # Remove temp file
-        if file_path.exists():
-            file_path.unlink()
-        
-        return redirect(url_for('view_document', document_id=document_id))
+            'latency_budget': latency_budget
+        }, job_id=job_id)
+        _job_pool.start()
+        _job_pool.notify()
 
-    except Exception as e:
-        logging.error(f"Processing error: {str(e)}")
-        flash('An error occurred during processing')
-        return redirect(url_for('dashboard'))
+        status_url = url_for('get_job_status', job_id=job_id)
+        return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': status_url}), 202, {'Location': status_url}
+
+    except Exception:
+        logger.exception("Upload failed")
+        return jsonify({'message': 'An error occurred during upload'}), 500
+
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def get_job_status(job_id):
+    """Status, current stage and progress of a processing job"""
+    job = get_job(engine, job_id)
+    if not job or job['kind'] != PROCESS_JOB or job['owner'] != str(current_user.id):
+        return jsonify({'message': 'Job not found'}), 404
+
+    payload = job_status(job)
+    if payload['result'] and payload['result'].get('document_id'):
+        payload['result_url'] = url_for('view_document', document_id=payload['result']['document_id'])
+    return jsonify(payload), 200
 
 @app.route('/document/<int:document_id>')
 @login_required
@@ -506,8 +743,19 @@ def view_document(document_id):
             return redirect(url_for('history'))
         
         # Load report JSON
-        results = json.loads(document.report_json) if document.report_json else {}
+        results = decode_report(document.report_json)
+
+        # Clauses and terms from the normalized tables
+        if document.clauses:
+            results['clauses'] = [clause_to_dict(clause) for clause in document.clauses]
+        if document.legal_terms:
+            results['legal_terms'] = [legal_term_to_dict(term) for term in document.legal_terms]
         
+        # Charts render client-side from compact series, not stored PNGs
+        results['chart_data'] = get_chart_data(results)
+        results.pop('clause_type_chart', None)
+        results.pop('stats_chart', None)
+
         if 'original_sentences' not in results and document.original_text:
             from nltk.tokenize import sent_tokenize
             results['original_sentences'] = len(sent_tokenize(document.original_text))
@@ -533,15 +781,47 @@ def view_document(document_id):
         
     return render_template('results.html', document=doc_data, results=results)
 
+def query_history_page(db, user_id, cursor=None, limit=None):
+    """
+    One keyset page of a user's documents (summary columns only), newest first
+
+    Returns:
+        (rows, next_cursor), next_cursor is None on the last page
+    """
+    limit = page_size(limit)
+    position = decode_cursor(cursor)
+    query = db.query(
+        Document.id,
+        Document.document_title,
+        Document.uploaded_at,
+        Document.clause_count,
+        Document.word_count,
+        Document.original_readability_score
+    ).filter(Document.user_id == user_id)
+    rows = keyset_page(query, Document.uploaded_at, Document.id, position, limit + 1)
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].uploaded_at, rows[-1].id)
+
 @app.route('/history')
 @login_required
 def history():
-    """Show user document history"""
+    """Show user document history, one keyset page at a time"""
+    cursor = request.args.get('cursor')
     with get_db() as db:
-        # Get all user documents
-        documents = db.query(Document).filter(
-            Document.user_id == current_user.id
-        ).order_by(Document.uploaded_at.desc()).all()
+        documents, next_cursor = query_history_page(
+            db, current_user.id, cursor=cursor, limit=request.args.get('limit', type=int)
+        )
+
+        # Clause types per document in one grouped query
+        clause_types = {}
+        type_counts = db.query(Clause.document_id, Clause.clause_type, func.count(Clause.id)).filter(
+            Clause.document_id.in_([doc.id for doc in documents])
+        ).group_by(Clause.document_id, Clause.clause_type)
+        for document_id, clause_type, count in type_counts:
+            clause_types.setdefault(document_id, {})[clause_type] = count
         
         # Convert to dict
         docs_data = [{
@@ -550,10 +830,23 @@ def history():
             'uploaded_at': doc.uploaded_at,
             'clause_count': doc.clause_count,
             'word_count': doc.word_count,
-            'original_readability_score': doc.original_readability_score
+            'original_readability_score': doc.original_readability_score,
+            'clause_types': clause_types.get(doc.id, {})
         } for doc in documents]
         
-    return render_template('history.html', documents=docs_data)
+    return render_template('history.html', documents=docs_data, next_cursor=next_cursor, is_first_page=not cursor)
+
+def document_report_data(document):
+    """Downloadable report for one document"""
+    return {
+        'document_id': document.id,
+        'document_title': document.document_title,
+        'processed_at': document.uploaded_at.isoformat(),
+        'original_text': document.original_text,
+        'simplified_text': document.simplified_text_basic,
+        'readability_score': document.original_readability_score,
+        'results': decode_report(document.report_json)
+    }
 
 @app.route('/download/<int:document_id>')
 @login_required
@@ -570,29 +863,114 @@ def download_report(document_id):
             flash('Document not found')
             return redirect(url_for('history'))
         
-        # Prepare report data
-        report_data = {
-            'document_title': document.document_title,
-            'processed_at': document.uploaded_at.isoformat(),
-            'original_text': document.original_text,
-            'simplified_text': document.simplified_text_basic,
-            'readability_score': document.original_readability_score,
-            'results': json.loads(document.report_json) if document.report_json else {}
-        }
+        report_data = document_report_data(document)
         doc_title = document.document_title
     
-    # Create JSON response
-    response = make_response(json.dumps(report_data, indent=2))
-    response.headers['Content-Type'] = 'application/json'
-    response.headers['Content-Disposition'] = f'attachment; filename={doc_title}_report.json'
+    # Stream the JSON response
+    return Response(
+        iter_encode(report_data, pretty=True),
+        mimetype='application/json',
+        headers={'Content-Disposition': f'attachment; filename={doc_title}_report.json'}
+    )
+
+@app.route('/export')
+@login_required
+def export_documents():
+    """Stream all of the user's reports as NDJSON (default) or a ZIP of JSON files"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        flash('Unsupported export format')
+        return redirect(url_for('history'))
+    user_id = current_user.id
+    username = current_user.username
+
+    def reports():
+        with get_db() as db:
+            query = (
+                db.query(Document)
+                .options(undefer(Document.original_text), undefer(Document.report_json))
+                .filter(Document.user_id == user_id)
+                .order_by(Document.id)
+            )
+            for document in iter_documents(query):
+                yield document, document_report_data(document)
+
+    if export_format == 'zip':
+        body = stream_zip(
+            (export_entry_name(document.id, document.document_title), report)
+            for document, report in reports()
+        )
+    else:
+        body = stream_ndjson(report for _, report in reports())
+
+    filename = export_filename(username, export_format, datetime.utcnow())
+    return Response(
+        body,
+        mimetype=EXPORT_FORMATS[export_format][0],
+        headers={'Content-Disposition': f'attachment; filename={filename}', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/document/<int:document_id>/charts')
+@login_required
+def document_chart_data(document_id):
+    """Chart series JSON for client-side rendering"""
+    with get_db() as db:
+        document = db.query(Document).filter(
+            Document.id == document_id,
+            Document.user_id == current_user.id
+        ).first()
+        if not document:
+            return jsonify({'message': 'Document not found'}), 404
+        results = decode_report(document.report_json)
+
+    return jsonify(get_chart_data(results))
+
+@app.route('/document/<int:document_id>/charts/<chart_name>.png')
+@login_required
+def export_document_chart(document_id, chart_name):
+    """Explicit server-side PNG export of one chart"""
+    if chart_name not in CHART_EXPORTS:
+        return jsonify({'message': 'Unknown chart'}), 404
+
+    with get_db() as db:
+        document = db.query(Document).filter(
+            Document.id == document_id,
+            Document.user_id == current_user.id
+        ).first()
+        if not document:
+            return jsonify({'message': 'Document not found'}), 404
+        results = decode_report(document.report_json)
+        doc_title = document.document_title
+
+    image = export_chart_png(get_chart_data(results), chart_name)
+    if image is None:
+        return jsonify({'message': 'Chart rendering failed'}), 500
+
+    response = make_response(image)
+    response.headers['Content-Type'] = 'image/png'
+    response.headers['Content-Disposition'] = f'attachment; filename={Path(doc_title).stem}_{chart_name}.png'
     return response
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint for Docker"""
-    return jsonify({'status': 'ok', 'message': 'ClauseEase is running'}), 200
+    ready, details = readiness()
+    if not ready:
+        # Not ready until models are loaded, so load balancers hold traffic back
+        return jsonify({'status': 'starting', 'message': 'Loading models', **details}), 503
+    return jsonify({'status': 'ok', 'message': 'ClauseEase is running', **details}), 200
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics: stage latencies, document sizes, cache hits, model batch sizes"""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
 
 if __name__ == '__main__':
-    init_db()
-    ensure_model_loaded()
+    # The debug reloader also runs this block in its file-watching parent;
+    # only the serving child should load models and claim jobs
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_db()
+        warm_models()
+        _job_pool.start()
+        start_blob_maintenance(engine)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""
+Verified JWTs cached with the user they resolve to
+
+Decoding a token and loading its user costs a signature check and a
+query on every API call. The cache maps a token to its user record for
+AUTH_CACHE_SECONDS (never past the token's own expiry), evicting the
+least recently used token beyond AUTH_CACHE_SIZE. Logged out tokens are
+recorded in the revoked_tokens table until they expire, so every worker
+rejects them once its cached entry is gone; the worker that handles the
+logout drops its entry at once.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, delete, event, select
+from sqlalchemy.dialects.sqlite import insert
+
+from components.metrics import record_cache
+
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", "1024"))
+# Longest a worker keeps trusting a token it has not re-checked (logout elsewhere, deleted user)
+AUTH_CACHE_SECONDS = float(os.environ.get("AUTH_CACHE_SECONDS", "60"))
+
+metadata = MetaData()
+
+revoked_tokens = Table(
+    'revoked_tokens', metadata,
+    Column('token_hash', String(64), primary_key=True),
+    Column('expires_at', DateTime, nullable=False, index=True),
+)
+
+
+def ensure_auth_tables(engine):
+    metadata.create_all(bind=engine)
+
+
+def token_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def revoke_token(engine, token, expires_at):
+    """Reject this token until it expires, and forget revocations that already have"""
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(
+            insert(revoked_tokens)
+            .values(token_hash=token_hash(token), expires_at=expires_at)
+            .on_conflict_do_nothing()
+        )
+        connection.execute(delete(revoked_tokens).where(revoked_tokens.c.expires_at < now))
+
+
+def is_revoked(engine, token):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(revoked_tokens.c.token_hash).where(revoked_tokens.c.token_hash == token_hash(token))
+        ).first() is not None
+
+
+class TokenCache:
+    """Bounded LRU of token -> user record with a per-entry deadline"""
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = AUTH_CACHE_SIZE if maxsize is None else maxsize
+        self.ttl = AUTH_CACHE_SECONDS if ttl is None else ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """The cached user for a token, or None if absent or past its deadline"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                user, deadline = entry
+                if now < deadline:
+                    self._entries.move_to_end(token)
+                    record_cache('auth', True)
+                    return user
+                del self._entries[token]
+        record_cache('auth', False)
+        return None
+
+    def put(self, token, user, token_expires_at=None):
+        """Cache a verified token; token_expires_at is its exp claim (epoch seconds)"""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        deadline = time.time() + self.ttl
+        if token_expires_at is not None:
+            deadline = min(deadline, token_expires_at)
+        with self._lock:
+            self._entries[token] = (user, deadline)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_token(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token of a user, after the user changed or was deleted"""
+        with self._lock:
+            stale = [token for token, (user, _) in self._entries.items() if user['user_id'] == user_id]
+            for token in stale:
+                del self._entries[token]
+
+
+def register_user_listeners(user_model, cache):
+    """Drop a user's cached tokens when this process updates or deletes the user"""
+    def _on_user_change(mapper, connection, target):
+        cache.invalidate_user(target.id)
+
+    event.listen(user_model, 'after_update', _on_user_change)
+    event.listen(user_model, 'after_delete', _on_user_change)
@@ -0,0 +1,393 @@
+"""Content-addressed, reference-counted blob store for document text and reports"""
+
+import hashlib
+import lzma
+import os
+import logging
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, Text, event, func, inspect, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.types import TypeDecorator
+
+from components.database import compress_bytes, compress_text, decompress_text
+
+logger = logging.getLogger(__name__)
+
+# Values at least this large go to the store; smaller ones stay in the row
+BLOB_MIN_BYTES = int(os.environ.get("BLOB_MIN_BYTES", "1024"))
+# Blobs not referenced by any document newer than this move to the archive tier
+BLOB_ARCHIVE_AFTER_DAYS = float(os.environ.get("BLOB_ARCHIVE_AFTER_DAYS", "90"))
+# Unreferenced files younger than this are left alone, they may belong to
+# a transaction that has not committed yet
+BLOB_GC_GRACE_SECONDS = float(os.environ.get("BLOB_GC_GRACE_SECONDS", "3600"))
+# How often a running process archives and collects blobs (0 disables, leaving it to startup)
+BLOB_MAINTENANCE_SECONDS = float(os.environ.get("BLOB_MAINTENANCE_SECONDS", str(6 * 3600)))
+BLOB_ARCHIVE_PRESET = 9
+
+# A stored row holds only this reference: magic, version, hex SHA-256
+BLOB_REF_MAGIC = b"\x00CB"
+BLOB_REF_VERSION = 1
+_REF_HEADER_LENGTH = len(BLOB_REF_MAGIC) + 1
+
+TIER_HOT = 'hot'
+TIER_ARCHIVE = 'archive'
+
+metadata = MetaData()
+
+blobs = Table(
+    'blobs', metadata,
+    Column('digest', String(64), primary_key=True),
+    Column('refcount', Integer, nullable=False, default=0),
+    Column('tier', String(16), nullable=False, default=TIER_HOT),
+    Column('last_used_at', DateTime, nullable=False),
+    Index('ix_blobs_tier_last_used', 'tier', 'last_used_at'),
+)
+
+
+def make_ref(digest):
+    return BLOB_REF_MAGIC + bytes([BLOB_REF_VERSION]) + digest.encode('ascii')
+
+
+def ref_digest(value):
+    """Digest held by a stored blob reference, or None for inline values"""
+    if not isinstance(value, (bytes, memoryview)):
+        return None
+    value = bytes(value)
+    if not value.startswith(BLOB_REF_MAGIC):
+        return None
+    if value[len(BLOB_REF_MAGIC)] != BLOB_REF_VERSION:
+        raise ValueError(f"Unsupported blob reference version: {value[len(BLOB_REF_MAGIC)]}")
+    return value[_REF_HEADER_LENGTH:].decode('ascii')
+
+
+class BlobStore:
+    """
+    Compressed files under root, keyed by the SHA-256 of their content
+
+    hot/ab/<digest> holds zstd/zlib files in the compressed column format;
+    archive/ab/<digest>.xz holds LZMA files for blobs only old documents use.
+    Files are written once and shared by every row with the same content.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def hot_path(self, digest):
+        return self.root / TIER_HOT / digest[:2] / digest
+
+    def archive_path(self, digest):
+        return self.root / TIER_ARCHIVE / digest[:2] / f"{digest}.xz"
+
+    def put(self, text):
+        """Store text if it is new and return its digest"""
+        raw = text.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self.hot_path(digest)
+        try:
+            # Fresh mtime keeps garbage collection off a blob about to be referenced
+            os.utime(path)
+        except FileNotFoundError:
+            # New, archived, or renamed away by remove() after its last check
+            _write_atomic(path, compress_bytes(raw))
+            # A re-uploaded archived blob is hot again
+            self.archive_path(digest).unlink(missing_ok=True)
+        return digest
+
+    def get(self, digest):
+        # Archiving writes the archive copy before removing the hot file,
+        # so checking hot, archive, then hot again never misses a blob
+        for reader in (self._read_hot, self._read_archive, self._read_hot):
+            text = reader(digest)
+            if text is not None:
+                return text
+        raise FileNotFoundError(f"Blob {digest} is missing from {self.root}")
+
+    def _read_hot(self, digest):
+        try:
+            return decompress_text(self.hot_path(digest).read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def _read_archive(self, digest):
+        try:
+            return lzma.decompress(self.archive_path(digest).read_bytes()).decode('utf-8')
+        except FileNotFoundError:
+            return None
+
+    def archive(self, digest):
+        """Move a blob from the hot tier to the archive tier"""
+        text = self._read_hot(digest)
+        if text is None:
+            return False
+        _write_atomic(self.archive_path(digest), lzma.compress(text.encode('utf-8'), preset=BLOB_ARCHIVE_PRESET))
+        self.hot_path(digest).unlink(missing_ok=True)
+        return True
+
+    def files(self):
+        """(digest, path) for every file in both tiers, plus (None, path) for leftover temp files"""
+        for tier, suffix in ((TIER_HOT, ''), (TIER_ARCHIVE, '.xz')):
+            for path in (self.root / tier).glob('*/*'):
+                name = path.name
+                if name.startswith(('.tmp-', '.del-')):
+                    yield None, path
+                elif name.endswith(suffix):
+                    yield name[:len(name) - len(suffix)] if suffix else name, path
+
+    def remove(self, digest, older_than=None):
+        """
+        Delete a blob's files
+
+        Files modified after older_than (epoch seconds) are kept. Returns
+        False if any file was kept.
+
+        Each file is renamed aside before its mtime is checked, so a put()
+        either refreshed the mtime first, keeping the file, or finds it gone
+        and writes it again.
+        """
+        for path in (self.hot_path(digest), self.archive_path(digest)):
+            tombstone = path.with_name(f".del-{uuid.uuid4().hex}-{path.name}")
+            try:
+                os.rename(path, tombstone)
+            except FileNotFoundError:
+                continue
+            if older_than is not None and tombstone.stat().st_mtime > older_than:
+                # Same content as anything put() wrote meanwhile
+                os.replace(tombstone, path)
+                return False
+            tombstone.unlink()
+        return True
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+_store = BlobStore(Path(__file__).resolve().parents[2] / 'data' / 'blobs')
+
+
+def configure_blob_store(root):
+    """Point BlobText columns at the store under root"""
+    global _store
+    _store = BlobStore(root)
+    return _store
+
+
+def get_blob_store():
+    return _store
+
+
+class BlobText(TypeDecorator):
+    """
+    Text column whose large values live in the blob store
+
+    The row keeps a reference to the content hash. Values under
+    BLOB_MIN_BYTES, and rows written before the store existed, are kept
+    inline in the CompressedText format.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or len(value.encode('utf-8')) < BLOB_MIN_BYTES:
+            return compress_text(value)
+        return make_ref(_store.put(value))
+
+    def process_result_value(self, value, dialect):
+        digest = ref_digest(value)
+        if digest is None:
+            return decompress_text(value)
+        return _store.get(digest)
+
+
+# Reference counts, kept in the same transaction as the document rows
+
+def add_references(connection, digests, used_at=None):
+    used_at = used_at or datetime.utcnow()
+    for digest in digests:
+        statement = insert(blobs).values(digest=digest, refcount=1, tier=TIER_HOT, last_used_at=used_at)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['digest'],
+            set_={
+                'refcount': blobs.c.refcount + 1,
+                'tier': TIER_HOT,
+                'last_used_at': func.max(blobs.c.last_used_at, used_at),
+            },
+        ))
+
+
+def drop_references(connection, digests):
+    for digest in digests:
+        connection.execute(update(blobs).where(blobs.c.digest == digest).values(refcount=blobs.c.refcount - 1))
+
+
+def _stored_digests(connection, mapper, target, column_names):
+    """Blob digests a row currently references, read without loading the blobs"""
+    table = mapper.local_table
+    key = mapper.primary_key[0].name
+    row = connection.exec_driver_sql(
+        f"SELECT {', '.join(column_names)} FROM {table.name} WHERE {key} = ?",
+        (getattr(target, key),)
+    ).first()
+    if row is None:
+        return []
+    return [digest for digest in map(ref_digest, row) if digest]
+
+
+def register_blob_listeners(model, column_names):
+    """Maintain blob reference counts as rows of model are written"""
+    column_names = tuple(column_names)
+
+    def blob_columns_changed(target):
+        attrs = inspect(target).attrs
+        return any(attrs[name].history.has_changes() for name in column_names)
+
+    def after_insert(mapper, connection, target):
+        add_references(connection, _stored_digests(connection, mapper, target, column_names))
+
+    def before_update(mapper, connection, target):
+        if blob_columns_changed(target):
+            drop_references(connection, _stored_digests(connection, mapper, target, column_names))
+
+    def after_update(mapper, connection, target):
+        if blob_columns_changed(target):
+            add_references(connection, _stored_digests(connection, mapper, target, column_names))
+
+    def before_delete(mapper, connection, target):
+        drop_references(connection, _stored_digests(connection, mapper, target, column_names))
+
+    event.listen(model, 'after_insert', after_insert)
+    event.listen(model, 'before_update', before_update)
+    event.listen(model, 'after_update', after_update)
+    event.listen(model, 'before_delete', before_delete)
+
+
+def ensure_blob_tables(engine):
+    metadata.create_all(bind=engine)
+
+
+def archive_blobs(engine, older_than_days=None, store=None):
+    """Move blobs last referenced before the cutoff to the archive tier; returns the count moved"""
+    store = store or _store
+    days = BLOB_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    with engine.connect() as connection:
+        digests = connection.execute(
+            select(blobs.c.digest).where(blobs.c.tier == TIER_HOT, blobs.c.last_used_at < cutoff)
+        ).scalars().all()
+
+    moved = 0
+    for digest in digests:
+        if store.archive(digest):
+            moved += 1
+        with engine.begin() as connection:
+            # Skip blobs referenced again while they were being moved
+            connection.execute(
+                update(blobs)
+                .where(blobs.c.digest == digest, blobs.c.last_used_at < cutoff)
+                .values(tier=TIER_ARCHIVE)
+            )
+    return moved
+
+
+def collect_garbage(engine, grace_seconds=None, store=None):
+    """
+    Delete blobs no row references any more; returns the count removed
+
+    Besides blobs whose reference count fell to zero, this removes files
+    that never got a blobs row: BlobText writes the file before its
+    transaction commits, so a rolled back insert leaves one behind.
+    """
+    store = store or _store
+    grace = BLOB_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    older_than = time.time() - grace
+    with engine.connect() as connection:
+        digests = connection.execute(select(blobs.c.digest).where(blobs.c.refcount <= 0)).scalars().all()
+
+    removed = 0
+    for digest in digests:
+        with engine.connect() as connection, connection.begin() as transaction:
+            # Deleting the row first holds the write lock, so no upload can
+            # reference the blob again until the files are gone or kept
+            deleted = connection.execute(
+                blobs.delete().where(blobs.c.digest == digest, blobs.c.refcount <= 0)
+            ).rowcount
+            if not deleted:
+                continue
+            if not store.remove(digest, older_than=older_than):
+                transaction.rollback()
+                continue
+        removed += 1
+    return removed + _remove_orphan_files(engine, store, older_than)
+
+
+def _remove_orphan_files(engine, store, older_than, batch_size=500):
+    """Delete files older than older_than whose digest has no blobs row"""
+    candidates = {}
+    for digest, path in store.files():
+        try:
+            if path.stat().st_mtime > older_than:
+                continue
+        except FileNotFoundError:
+            continue
+        if digest is None:
+            path.unlink(missing_ok=True)
+        else:
+            candidates.setdefault(digest, []).append(path)
+
+    removed = 0
+    pending = list(candidates)
+    for offset in range(0, len(pending), batch_size):
+        batch = pending[offset:offset + batch_size]
+        with engine.connect() as connection:
+            known = set(connection.execute(select(blobs.c.digest).where(blobs.c.digest.in_(batch))).scalars())
+        for digest in batch:
+            if digest in known:
+                continue
+            # A put() since the scan refreshes the mtime; leave that file for the next run
+            if store.remove(digest, older_than=older_than):
+                removed += 1
+    return removed
+
+
+def run_blob_maintenance(engine, store=None):
+    """Archive cold blobs, then delete unreferenced ones"""
+    archived = archive_blobs(engine, store=store)
+    removed = collect_garbage(engine, store=store)
+    if archived or removed:
+        logger.info("Blob maintenance: archived %d, removed %d", archived, removed)
+    return archived, removed
+
+
+_maintenance_thread = None
+
+
+def _maintain_forever(engine):
+    while True:
+        time.sleep(BLOB_MAINTENANCE_SECONDS)
+        try:
+            run_blob_maintenance(engine)
+        except Exception:
+            logger.exception("Blob maintenance failed")
+
+
+def start_blob_maintenance(engine):
+    """Repeat run_blob_maintenance every BLOB_MAINTENANCE_SECONDS in a background thread of this process"""
+    global _maintenance_thread
+    if BLOB_MAINTENANCE_SECONDS > 0 and _maintenance_thread is None:
+        _maintenance_thread = threading.Thread(target=_maintain_forever, args=(engine,), name='blob-maintenance', daemon=True)
+        _maintenance_thread.start()
@@ -0,0 +1,303 @@
+"""Chart rendering in a dedicated worker process pool with a content-hash cache"""
+
+import base64
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from components.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+CHART_RENDER_WORKERS = int(os.environ.get("CHART_RENDER_WORKERS", "2"))
+CHART_CACHE_SIZE = int(os.environ.get("CHART_CACHE_SIZE", "256"))
+CHART_RENDER_TIMEOUT = float(os.environ.get("CHART_RENDER_TIMEOUT", "30"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_local_render_lock = threading.Lock()
+
+
+def chart_key(kind, data, title=None):
+    """Content hash of chart kind, data and title"""
+    payload = json.dumps({"kind": kind, "data": data, "title": title}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _get_pool():
+    """
+    Start the worker pool on first use (spawned, so no pyplot state is inherited)
+
+    Spawned workers re-import the entry script as __mp_main__; main.py and
+    app.py only prepare the database and models from their __main__ block
+    or wsgi.py, so that import does not repeat the app's startup.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=CHART_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _submit(kind, data, title):
+    """Queue a render on the pool; None if the pool is unavailable and the caller must render"""
+    try:
+        return _get_pool().submit(_render_in_worker, kind, data, title)
+    except (BrokenProcessPool, RuntimeError, OSError) as e:
+        logger.warning("Chart pool unavailable, rendering in-process: %s", e)
+        _reset_pool()
+        return None
+
+
+def _render_locally(future, kind, data, title):
+    try:
+        with _local_render_lock:
+            future.set_result(_render_in_worker(kind, data, title))
+    except Exception as render_error:
+        future.set_exception(render_error)
+
+
+def render_chart(kind, data, title=None):
+    """
+    Render a chart to a base64 PNG data URI
+
+    Identical (kind, data, title) requests share one render, including
+    requests that arrive while the first render is still in flight.
+
+    Returns:
+        Data URI string, or None if rendering failed
+    """
+    key = chart_key(kind, data, title)
+    render_here = False
+    with _cache_lock:
+        future = _cache.get(key)
+        record_cache('chart', future is not None)
+        if future is not None:
+            _cache.move_to_end(key)
+        else:
+            future = _submit(kind, data, title)
+            if future is None:
+                # Rendered below, once other requests can use the cache again
+                future, render_here = Future(), True
+            _cache[key] = future
+            while len(_cache) > CHART_CACHE_SIZE:
+                _cache.popitem(last=False)
+    if render_here:
+        _render_locally(future, kind, data, title)
+
+    try:
+        return future.result(timeout=CHART_RENDER_TIMEOUT)
+    except Exception as e:
+        with _cache_lock:
+            if _cache.get(key) is future:
+                del _cache[key]
+        if isinstance(e, BrokenProcessPool):
+            _reset_pool()
+        logger.error("Error rendering %s chart: %s", kind, e)
+        return None
+
+
+def clear_chart_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+# Renderers (run inside worker processes)
+
+def _render_in_worker(kind, data, title):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    # rc_context keeps style/theme changes local to this render
+    with matplotlib.rc_context():
+        try:
+            fig, savefig_kwargs = _RENDERERS[kind](plt, data, title)
+            buffer = BytesIO()
+            fig.savefig(buffer, format="png", bbox_inches="tight", **savefig_kwargs)
+            buffer.seek(0)
+            image_base64 = base64.b64encode(buffer.read()).decode("utf-8")
+        finally:
+            plt.close("all")
+
+    return f"data:image/png;base64,{image_base64}"
+
+
+def _render_app_pie(plt, data, title):
+    plt.style.use("seaborn-v0_8-whitegrid")
+    fig = plt.figure(figsize=(10, 7))
+    labels = list(data.keys())
+    sizes = list(data.values())
+    colors = ["#3b82f6", "#f59e0b", "#10b981", "#8b5cf6", "#ef4444", "#06b6d4", "#ec4899", "#14b8a6"]
+
+    # Simple 2D design
+    wedges, texts, autotexts = plt.pie(
+        sizes,
+        labels=labels,
+        autopct="%1.1f%%",
+        colors=colors[:len(labels)],
+        startangle=90,
+        textprops={"fontsize": 12, "weight": "bold", "color": "#1e293b"}
+    )
+
+    # Style percentages
+    for autotext in autotexts:
+        autotext.set_color("white")
+        autotext.set_fontsize(13)
+        autotext.set_weight("bold")
+
+    plt.title(title, fontsize=16, fontweight="bold", color="#1e293b", pad=25)
+    plt.axis("equal")
+    return fig, {"dpi": 120, "facecolor": "white", "edgecolor": "none"}
+
+
+def _render_app_comparison_bar(plt, data, title):
+    plt.style.use("seaborn-v0_8-whitegrid")
+    categories = list(data.keys())
+    original_values = [v[0] if isinstance(v, list) else v for v in data.values()]
+    simplified_values = [v[1] if isinstance(v, list) and len(v) > 1 else v * 0.7 for v in data.values()]
+
+    x = range(len(categories))
+    width = 0.38
+
+    fig, ax = plt.subplots(figsize=(10, 7))
+
+    # Create comparison bars
+    bars1 = ax.bar([i - width/2 for i in x], original_values, width,
+                   label="Original", color="#3b82f6", edgecolor="#1e40af", linewidth=2)
+    bars2 = ax.bar([i + width/2 for i in x], simplified_values, width,
+                   label="Simplified", color="#10b981", edgecolor="#059669", linewidth=2)
+
+    # Add value labels
+    for bars in [bars1, bars2]:
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height,
+                    f"{int(height)}",
+                    ha="center", va="bottom", fontweight="bold", fontsize=10)
+
+    ax.set_xlabel("Metrics", fontsize=13, fontweight="bold", color="#1e293b", labelpad=10)
+    ax.set_ylabel("Values", fontsize=13, fontweight="bold", color="#1e293b", labelpad=10)
+    ax.set_title(title, fontsize=16, fontweight="bold", color="#1e293b", pad=25)
+    ax.set_xticks(x)
+    ax.set_xticklabels(categories, rotation=0, ha="center", fontsize=11, fontweight="600")
+    ax.legend(fontsize=11, loc="upper right", framealpha=0.95, edgecolor="#cbd5e1")
+    ax.grid(True, alpha=0.2, linestyle="--", linewidth=0.5)
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+
+    fig.tight_layout()
+    return fig, {"dpi": 120, "facecolor": "white", "edgecolor": "none"}
+
+
+def _render_clause_type_pie(plt, data, title):
+    labels = list(data.keys())
+    sizes = list(data.values())
+
+    # Chart colors
+    colors = [
+        "#3B82F6", "#10B981", "#F59E0B", "#8B5CF6",
+        "#EC4899", "#0EA5E9", "#FB923C", "#22C55E"
+    ]
+
+    fig = plt.figure(figsize=(8, 6))
+
+    plt.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=90,
+            colors=colors[:len(labels)], textprops={"fontsize": 11, "weight": "bold"})
+    plt.title(title or "Clause Types Distribution", fontsize=14, weight="bold", pad=20)
+    plt.axis("equal")
+    return fig, {"dpi": 80}
+
+
+def _render_stats_bar(plt, data, title):
+    categories = data["categories"]
+    original_values = data["original"]
+    simplified_values = data["simplified"]
+
+    x = range(len(categories))
+    width = 0.35
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    # Create side-by-side bars
+    ax.bar([i - width/2 for i in x], original_values, width,
+           label="Original", color="#2563EB", edgecolor="#1E40AF", linewidth=1.5)
+    ax.bar([i + width/2 for i in x], simplified_values, width,
+           label="Simplified", color="#A855F7", edgecolor="#7C3AED", linewidth=1.5)
+
+    # Style chart
+    ax.set_xlabel("Metrics", fontsize=12, weight="bold")
+    ax.set_ylabel("Values", fontsize=12, weight="bold")
+    ax.set_title(title or "Text Statistics Comparison", fontsize=14, weight="bold", pad=20)
+    ax.set_xticks(x)
+    ax.set_xticklabels(categories, fontsize=10)
+    ax.legend(fontsize=11, loc="upper right")
+    ax.grid(axis="y", alpha=0.3, linestyle="--")
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
+
+    fig.tight_layout()
+    return fig, {"dpi": 80}
+
+
+def _render_admin_line(plt, data, title):
+    import seaborn as sns
+    sns.set_theme(style="whitegrid")
+    labels, values = data["labels"], data["values"]
+    fig, ax = plt.subplots(figsize=(7, 3.6))
+    sns.lineplot(x=labels, y=values, marker="o", linewidth=2, color="#2563EB", ax=ax)
+    ax.set_xlabel("")
+    ax.set_ylabel("Count", fontweight="bold")
+    ax.set_ylim(bottom=0)
+    for tick in ax.get_xticklabels():
+        tick.set_rotation(25)
+    fig.tight_layout()
+    return fig, {"dpi": 120}
+
+
+def _render_admin_bar(plt, data, title):
+    import seaborn as sns
+    sns.set_theme(style="whitegrid")
+    labels, values = data["labels"], data["values"]
+    fig, ax = plt.subplots(figsize=(7, 3.6))
+    palette = sns.color_palette("Blues", len(values))
+    sns.barplot(x=labels, y=values, palette=palette, ax=ax)
+    ax.set_xlabel("")
+    ax.set_ylabel("Count", fontweight="bold")
+    ax.set_ylim(bottom=0)
+    for index, value in enumerate(values):
+        ax.text(index, value + 0.05, str(value), ha="center", va="bottom", fontweight="bold")
+    for tick in ax.get_xticklabels():
+        tick.set_rotation(15)
+    fig.tight_layout()
+    return fig, {"dpi": 120}
+
+
+_RENDERERS = {
+    "app_pie": _render_app_pie,
+    "app_comparison_bar": _render_app_comparison_bar,
+    "clause_type_pie": _render_clause_type_pie,
+    "stats_bar": _render_stats_bar,
+    "admin_line": _render_admin_line,
+    "admin_bar": _render_admin_bar,
+}
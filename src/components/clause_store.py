@@ -0,0 +1,81 @@
+"""Row builders for the normalized clauses / legal_terms tables"""
+
+from components.module2_text_preprocessing import clean_text
+from components.module5_language_simplification import compose_simplified_document
+from components.serialization import dumps, loads
+
+
+def clause_rows(document_id, clauses, segments=None):
+    """
+    Insert rows for a document's clauses
+
+    Args:
+        document_id: Owning document
+        clauses: Clause dicts as produced by the processing pipeline
+        segments: Spans from compose_simplified_document, keyed by clause index
+    """
+    spans = {segment['index']: segment for segment in segments or []}
+    rows = []
+    for position, clause in enumerate(clauses, start=1):
+        index = clause.get('index', position)
+        span = spans.get(index, {})
+        rows.append({
+            'document_id': document_id,
+            'clause_index': index,
+            'clause_type': clause.get('type') or 'Other',
+            'original_start': span.get('original_start'),
+            'original_end': span.get('original_end'),
+            'cleaned_text': clause.get('cleaned_text') or clause.get('raw_text') or '',
+            'simplified_text': clause.get('simplified'),
+            'entities_json': dumps(clause.get('entities') or []),
+        })
+    return rows
+
+
+def legal_term_rows(document_id, legal_terms):
+    """Insert rows for a document's legal terms"""
+    rows = []
+    for term in legal_terms:
+        if not isinstance(term, dict) or not term.get('term'):
+            continue
+        rows.append({
+            'document_id': document_id,
+            'term': term['term'],
+            'category': term.get('category'),
+            'definition': term.get('definition'),
+            'simplified_explanation': term.get('simplified_explanation'),
+        })
+    return rows
+
+
+def report_rows(document_id, report, original_text):
+    """Clause and legal term rows recovered from a stored report (backfill)"""
+    clauses = [c for c in report.get('clauses', []) if isinstance(c, dict)]
+    segments = report.get('segments')
+    if segments is None and clauses and original_text:
+        _, segments = compose_simplified_document(clean_text(original_text), clauses)
+    return (
+        clause_rows(document_id, clauses, segments),
+        legal_term_rows(document_id, report.get('legal_terms', [])),
+    )
+
+
+def clause_to_dict(clause):
+    """Clause row in the shape of the report's clause dicts"""
+    return {
+        'index': clause.clause_index,
+        'type': clause.clause_type,
+        'cleaned_text': clause.cleaned_text,
+        'simplified': clause.simplified_text,
+        'entities': loads(clause.entities_json) if clause.entities_json else [],
+        'original_start': clause.original_start,
+        'original_end': clause.original_end,
+    }
+
+
+def legal_term_to_dict(term):
+    """Legal term row in the shape of the report's term dicts"""
+    result = {'term': term.term, 'category': term.category, 'definition': term.definition}
+    if term.simplified_explanation is not None:
+        result['simplified_explanation'] = term.simplified_explanation
+    return result
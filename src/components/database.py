@@ -0,0 +1,170 @@
+"""SQLite engine setup shared by both apps: WAL journaling, pragmas, a pooled engine and compressed columns"""
+
+import os
+import zlib
+
+from sqlalchemy import Text, create_engine, event, inspect
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Pragmas, overridable per deployment through the environment.
+# WAL lets history page reads proceed while an upload is being written;
+# synchronous=NORMAL is durable across application crashes in WAL mode
+# and only risks the last transactions on power loss.
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+# Connection pool for threaded workers (request threads plus the
+# background refinement and chart threads)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_MAX_OVERFLOW", "8"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        # Negative cache_size is a budget in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    finally:
+        cursor.close()
+
+
+def create_sqlite_engine(db_path, **overrides):
+    """
+    Create a pooled SQLAlchemy engine for a SQLite database file
+
+    Every new connection gets the configured journal mode, synchronous
+    level, busy timeout, mmap size and page cache budget.
+    """
+    options = {
+        "connect_args": {
+            "check_same_thread": False,
+            # sqlite3 module-level busy handler, in seconds
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        "poolclass": QueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_POOL_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "future": True,
+    }
+    options.update(overrides)
+    engine = create_engine(f"sqlite:///{db_path}", **options)
+    event.listen(engine, "connect", _apply_pragmas)
+    return engine
+
+
+def add_missing_columns(engine, table):
+    """
+    ALTER TABLE ADD COLUMN for columns of a model table the database lacks
+
+    create_all skips tables that already exist. New columns must be
+    nullable or have a server default; indexes on them are created
+    separately, as for any other index added later.
+    """
+    with engine.begin() as connection:
+        existing = {column['name'] for column in inspect(connection).get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+
+
+def sqlite_settings(engine):
+    """Effective pragma values on a pooled connection"""
+    settings = {}
+    with engine.connect() as connection:
+        for pragma in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size"):
+            settings[pragma] = connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+    return settings
+
+
+# Compressed text columns. Values are stored as BLOBs starting with a
+# format header (magic, version, codec id); rows written before
+# compression existed come back from SQLite as str and pass through.
+COMPRESSION_MAGIC = b"\x00CE"
+COMPRESSION_VERSION = 1
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+COLUMN_COMPRESSION = os.environ.get("COLUMN_COMPRESSION", "zstd" if zstandard is not None else "zlib")
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "512"))
+
+_HEADER_LENGTH = len(COMPRESSION_MAGIC) + 2
+
+
+def compress_text(value, codec=None):
+    """Compress a string into a headered blob; short or incompressible values stay str"""
+    if value is None:
+        return None
+    codec = codec or COLUMN_COMPRESSION
+    raw = value.encode("utf-8")
+    if codec == "none" or len(raw) < COMPRESSION_MIN_BYTES:
+        return value
+
+    packed = compress_bytes(raw, codec)
+    if len(packed) >= len(raw):
+        return value
+    return packed
+
+
+def compress_bytes(raw, codec=None):
+    """Headered compressed form of UTF-8 bytes, readable by decompress_text"""
+    codec = codec or COLUMN_COMPRESSION
+    if codec == "zstd" and zstandard is not None:
+        codec_id, payload = CODEC_ZSTD, zstandard.ZstdCompressor(level=3).compress(raw)
+    else:
+        codec_id, payload = CODEC_ZLIB, zlib.compress(raw, 6)
+    return COMPRESSION_MAGIC + bytes([COMPRESSION_VERSION]) + codec_id + payload
+
+
+def decompress_text(value):
+    """Inverse of compress_text, accepting legacy plain-text values"""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value.startswith(COMPRESSION_MAGIC):
+        return value.decode("utf-8")
+
+    version = value[len(COMPRESSION_MAGIC)]
+    codec_id = value[len(COMPRESSION_MAGIC) + 1:_HEADER_LENGTH]
+    payload = value[_HEADER_LENGTH:]
+    if version != COMPRESSION_VERSION:
+        raise ValueError(f"Unsupported compressed column version: {version}")
+    if codec_id == CODEC_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if codec_id == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Column was compressed with zstd; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown compressed column codec: {codec_id!r}")
+
+
+def is_compressed(value):
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:len(COMPRESSION_MAGIC)]) == COMPRESSION_MAGIC
+
+
+class CompressedText(TypeDecorator):
+    """Text column transparently compressed on write and decompressed on read"""
+
+    # Keeps the TEXT declaration, SQLite stores the compressed values as BLOBs
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
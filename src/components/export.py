@@ -0,0 +1,80 @@
+"""Streaming bulk export of a user's documents as NDJSON or a ZIP of JSON files"""
+
+import os
+import re
+import zipfile
+
+from components.serialization import dumps_bytes, iter_encode
+
+# Documents loaded per round trip while streaming an export
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "25"))
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'zip': ('application/zip', 'zip'),
+}
+
+_UNSAFE_NAME = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def iter_documents(query, chunk_size=None):
+    """
+    Walk a document query in id order, chunk_size rows per fetch
+
+    Rows are streamed from the cursor rather than loaded up front, so only
+    one chunk is held in memory at a time.
+    """
+    return query.execution_options(stream_results=True).yield_per(chunk_size or EXPORT_CHUNK_SIZE)
+
+
+def stream_ndjson(records):
+    """One compact JSON object per line, encoded as it is yielded"""
+    for record in records:
+        yield dumps_bytes(record) + b'\n'
+
+
+class _ChunkBuffer:
+    """Write-only sink for ZipFile; drained after every entry"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(named_records):
+    """
+    ZIP archive of (name, record) pairs, one pretty-printed JSON file each
+
+    The archive is written to a non-seekable sink, so entries use data
+    descriptors and the bytes of each one can be sent as soon as it is done.
+    """
+    sink = _ChunkBuffer()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, record in named_records:
+            with archive.open(name, mode='w', force_zip64=True) as entry:
+                for chunk in iter_encode(record, pretty=True):
+                    entry.write(chunk)
+            yield sink.drain()
+    # Central directory
+    yield sink.drain()
+
+
+def export_entry_name(document_id, title):
+    stem = _UNSAFE_NAME.sub('_', os.path.splitext(title or '')[0]).strip('._') or 'document'
+    return f"{document_id:06d}-{stem[:80]}.json"
+
+
+def export_filename(username, export_format, exported_at):
+    user = _UNSAFE_NAME.sub('_', username or 'user').strip('._') or 'user'
+    return f"clauseease-{user}-{exported_at:%Y%m%d-%H%M%S}.{EXPORT_FORMATS[export_format][1]}"
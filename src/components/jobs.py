@@ -0,0 +1,359 @@
+"""Background processing jobs, queued in SQLite and run by a local worker pool"""
+
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, MetaData, String, Table, Text, func, select, update
+
+from components.serialization import dumps, loads
+from components.structured_logging import set_log_context, set_stage
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per process
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Seconds an idle worker sleeps before checking the queue again (enqueueing wakes it sooner)
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "2"))
+# Running jobs refresh heartbeat_at this often; one silent for JOB_STALE_SECONDS lost its worker
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("JOB_HEARTBEAT_SECONDS", "10"))
+JOB_STALE_SECONDS = float(os.environ.get("JOB_STALE_SECONDS", "60"))
+# Runs a job gets (first run plus restarts after a lost worker) before it is marked failed
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+# Minimum seconds between progress writes while a job stays in one stage
+JOB_PROGRESS_INTERVAL = float(os.environ.get("JOB_PROGRESS_INTERVAL", "0.5"))
+# Finished jobs are deleted after this many days
+JOB_RETENTION_DAYS = float(os.environ.get("JOB_RETENTION_DAYS", "7"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+
+metadata = MetaData()
+
+jobs = Table(
+    'jobs', metadata,
+    Column('id', String(32), primary_key=True),
+    Column('kind', String(32), nullable=False),
+    Column('owner', String(150), nullable=False),
+    Column('status', String(16), nullable=False, default=QUEUED),
+    Column('stage', String(64)),
+    Column('progress', Float, nullable=False, default=0.0),
+    Column('payload', Text, nullable=False),
+    Column('result', Text),
+    Column('error', Text),
+    Column('attempts', Integer, nullable=False, default=0),
+    Column('worker', String(128)),
+    Column('created_at', DateTime, nullable=False),
+    Column('started_at', DateTime),
+    Column('heartbeat_at', DateTime),
+    Column('finished_at', DateTime),
+    Index('ix_jobs_status_created', 'status', 'created_at'),
+)
+
+
+def ensure_job_tables(engine):
+    metadata.create_all(bind=engine)
+
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+def enqueue_job(engine, kind, owner, payload, job_id=None):
+    """Add a job to the queue and return its id"""
+    job_id = job_id or new_job_id()
+    with engine.begin() as connection:
+        connection.execute(jobs.insert().values(
+            id=job_id, kind=kind, owner=str(owner), status=QUEUED, stage=QUEUED, progress=0.0,
+            payload=dumps(payload), attempts=0, created_at=datetime.utcnow(),
+        ))
+    return job_id
+
+
+def adopt_jobs(engine, old_kind, new_kind, payload_key):
+    """Move unfinished jobs of a retired kind whose payload has payload_key to new_kind"""
+    with engine.begin() as connection:
+        connection.execute(
+            update(jobs)
+            .where(jobs.c.kind == old_kind, jobs.c.status.in_((QUEUED, RUNNING)),
+                   func.json_extract(jobs.c.payload, f'$.{payload_key}').isnot(None))
+            .values(kind=new_kind)
+        )
+
+
+def claim_job(engine, worker, kinds):
+    """
+    Mark the oldest queued job of one of these kinds running for this worker and return it
+
+    A single UPDATE ... RETURNING picks and claims the row, so two workers
+    (threads or processes sharing the database) never run the same job.
+    Apps that share the database use different kinds, so neither claims a
+    job it has no handler for. Returns None when there is nothing to claim.
+    """
+    now = datetime.utcnow()
+    oldest = (
+        select(jobs.c.id).where(jobs.c.status == QUEUED, jobs.c.kind.in_(kinds))
+        .order_by(jobs.c.created_at, jobs.c.id).limit(1).scalar_subquery()
+    )
+    with engine.begin() as connection:
+        row = connection.execute(
+            update(jobs)
+            .where(jobs.c.id == oldest, jobs.c.status == QUEUED)
+            .values(status=RUNNING, stage='started', worker=worker, attempts=jobs.c.attempts + 1,
+                    started_at=now, heartbeat_at=now, error=None)
+            .returning(jobs.c.id, jobs.c.kind, jobs.c.owner, jobs.c.payload, jobs.c.attempts)
+        ).first()
+    if row is None:
+        return None
+    return {'id': row.id, 'kind': row.kind, 'owner': row.owner, 'payload': loads(row.payload), 'attempts': row.attempts}
+
+
+def _update_running(engine, job_id, worker, **values):
+    """Update a job this worker still holds; False if it was requeued or finished elsewhere"""
+    with engine.begin() as connection:
+        return connection.execute(
+            update(jobs).where(jobs.c.id == job_id, jobs.c.status == RUNNING, jobs.c.worker == worker).values(**values)
+        ).rowcount == 1
+
+
+def finish_job(engine, job_id, worker, result=None, error=None):
+    values = {'finished_at': datetime.utcnow(), 'heartbeat_at': datetime.utcnow()}
+    if error is None:
+        values.update(status=SUCCEEDED, stage='done', progress=1.0, result=dumps(result))
+    else:
+        values.update(status=FAILED, error=error)
+    return _update_running(engine, job_id, worker, **values)
+
+
+def touch_jobs(engine, job_ids):
+    """Refresh the heartbeat of running jobs"""
+    with engine.begin() as connection:
+        connection.execute(
+            update(jobs).where(jobs.c.id.in_(job_ids), jobs.c.status == RUNNING).values(heartbeat_at=datetime.utcnow())
+        )
+
+
+def recover_jobs(engine, stale_seconds=None, max_attempts=None):
+    """
+    Requeue running jobs whose worker stopped sending heartbeats
+
+    Jobs that already used max_attempts runs are marked failed instead.
+    Also deletes finished jobs older than JOB_RETENTION_DAYS. Returns
+    (requeued count, ids of jobs given up on).
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=JOB_STALE_SECONDS if stale_seconds is None else stale_seconds)
+    max_attempts = max_attempts or JOB_MAX_ATTEMPTS
+    stale = (jobs.c.status == RUNNING, jobs.c.heartbeat_at < cutoff)
+    with engine.begin() as connection:
+        given_up = list(connection.execute(
+            update(jobs).where(*stale, jobs.c.attempts >= max_attempts)
+            .values(status=FAILED, error='Worker stopped while processing', finished_at=now)
+            .returning(jobs.c.id)
+        ).scalars())
+        requeued = connection.execute(
+            update(jobs).where(*stale).values(status=QUEUED, stage=QUEUED, worker=None)
+        ).rowcount
+        connection.execute(jobs.delete().where(
+            jobs.c.status.in_((SUCCEEDED, FAILED)),
+            jobs.c.finished_at < now - timedelta(days=JOB_RETENTION_DAYS),
+        ))
+    return requeued, given_up
+
+
+def get_job(engine, job_id):
+    """Job row as a dict (with queue_position while queued), or None"""
+    with engine.connect() as connection:
+        row = connection.execute(select(jobs).where(jobs.c.id == job_id)).mappings().first()
+        if row is None:
+            return None
+        job = dict(row)
+        if job['status'] == QUEUED:
+            job['queue_position'] = connection.execute(
+                select(func.count()).select_from(jobs)
+                .where(jobs.c.status == QUEUED, jobs.c.kind == job['kind'], jobs.c.created_at <= job['created_at'])
+            ).scalar()
+    return job
+
+
+def job_status(job):
+    """Public fields of a job for the status endpoints"""
+    status = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': round(job['progress'] or 0.0, 3),
+        'attempts': job['attempts'],
+        'created_at': job['created_at'].isoformat() if job['created_at'] else None,
+        'started_at': job['started_at'].isoformat() if job['started_at'] else None,
+        'finished_at': job['finished_at'].isoformat() if job['finished_at'] else None,
+        'error': job['error'],
+        'result': loads(job['result']) if job['result'] else None,
+    }
+    if 'queue_position' in job:
+        status['queue_position'] = job['queue_position']
+    return status
+
+
+class JobContext:
+    """What a job handler sees: its payload, an upload directory, and progress reporting"""
+
+    def __init__(self, engine, job, worker, upload_dir):
+        self.engine = engine
+        self.id = job['id']
+        self.owner = job['owner']
+        self.payload = job['payload']
+        self.attempt = job['attempts']
+        self.upload_dir = upload_dir
+        self.stage = 'started'
+        self.progress = 0.0
+        self._worker = worker
+        self._stages_written = {self.stage}
+        self._last_write = 0.0
+
+    def report(self, stage=None, progress=None):
+        """Record the current stage and fraction done; at most one write per JOB_PROGRESS_INTERVAL within a stage"""
+        if stage is not None:
+            self.stage = stage
+            set_stage(stage)
+        if progress is not None:
+            self.progress = max(0.0, min(float(progress), 1.0))
+        now = time.monotonic()
+        if self.stage in self._stages_written and now - self._last_write < JOB_PROGRESS_INTERVAL:
+            return
+        self._stages_written.add(self.stage)
+        self._last_write = now
+        _update_running(self.engine, self.id, self._worker,
+                        stage=self.stage, progress=self.progress, heartbeat_at=datetime.utcnow())
+
+    def stage_progress(self):
+        """Progress dict for pipelines that record their stage as progress['step']"""
+        return _StageProgress(self)
+
+
+class _StageProgress(dict):
+    def __init__(self, context):
+        super().__init__()
+        self._context = context
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if key == 'step':
+            self._context.report(stage=value)
+
+
+class JobWorkerPool:
+    """
+    Worker threads that claim queued jobs and run the handler for their kind
+
+    Handlers take a JobContext and return a JSON-serializable result; an
+    exception fails the job with its message. Uploads for a job live under
+    upload_root/<job id> until the job finishes, so a job picked up again
+    after its worker died still has its input.
+    """
+
+    def __init__(self, engine, handlers, upload_root, workers=None):
+        self.engine = engine
+        self.handlers = handlers
+        self.upload_root = Path(upload_root)
+        self.workers = workers or JOB_WORKERS
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = set()
+
+    def upload_dir(self, job_id):
+        path = self.upload_root / job_id
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def start(self):
+        """Start the workers once per process, first requeueing jobs orphaned by a previous run"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            self._recover()
+            prefix = f"{socket.gethostname()}:{os.getpid()}"
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, args=(f"{prefix}:{n}",), name=f'job-worker-{n}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        """Wake an idle worker after enqueueing"""
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        """Stop claiming jobs and wait for the running ones to finish"""
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def _work(self, worker):
+        while not self._stop.is_set():
+            try:
+                job = claim_job(self.engine, worker, tuple(self.handlers))
+            except Exception as e:
+                logger.error("Job queue error: %s", e)
+                job = None
+            if job is None:
+                self._wake.wait(JOB_POLL_SECONDS)
+                self._wake.clear()
+                continue
+            self._run(job, worker)
+
+    def _run(self, job, worker):
+        handler = self.handlers.get(job['kind'])
+        context = JobContext(self.engine, job, worker, self.upload_root / job['id'])
+        with self._lock:
+            self._running.add(job['id'])
+        # Records logged while the job runs carry its id in place of a request id
+        set_log_context(job['id'], context.stage)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind {job['kind']}")
+            result = handler(context)
+        except Exception as e:
+            logger.exception("Job %s failed at %s", job['id'], context.stage)
+            finished = finish_job(self.engine, job['id'], worker, error=f"Processing error at {context.stage}: {str(e)}")
+        else:
+            finished = finish_job(self.engine, job['id'], worker, result=result)
+        finally:
+            with self._lock:
+                self._running.discard(job['id'])
+            set_log_context(None)
+        # A job requeued while it ran belongs to another worker now, keep its upload
+        if finished:
+            shutil.rmtree(context.upload_dir, ignore_errors=True)
+
+    def _heartbeat(self):
+        while not self._stop.wait(JOB_HEARTBEAT_SECONDS):
+            with self._lock:
+                running = list(self._running)
+            try:
+                if running:
+                    touch_jobs(self.engine, running)
+                self._recover()
+            except Exception as e:
+                logger.error("Job heartbeat error: %s", e)
+
+    def _recover(self):
+        requeued, given_up = recover_jobs(self.engine)
+        for job_id in given_up:
+            shutil.rmtree(self.upload_root / job_id, ignore_errors=True)
+        if requeued:
+            logger.warning("Requeued %d jobs from stopped workers", requeued)
+            self._wake.set()
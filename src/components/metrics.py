@@ -0,0 +1,404 @@
+"""
+In-process metrics in the Prometheus text format
+
+Stage latency, document size, cache and model batch metrics are plain
+counters and histograms updated under a per-metric lock, so recording one
+costs a dict lookup and an addition. Under gunicorn every worker keeps its
+own values, starting from zero after fork (reset_metrics). When METRICS_DIR
+is set, each process writes a snapshot there every METRICS_FLUSH_SECONDS
+under a per-process id, and /metrics adds up the snapshots of all workers,
+so a scrape sees the whole server whichever worker answers it. When a
+worker exits, the gunicorn master folds its snapshot into retired.json
+(retire_snapshots), so the directory holds one file per live worker.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Shared by the workers of one server; unset keeps metrics per process
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "5"))
+
+# Counts of exited workers, and the snapshot names already folded into them
+RETIRED_SNAPSHOT = 'retired.json'
+_RETIRED_NAMES_KEPT = 64
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; the pipeline stages run from microseconds (one clause) to minutes (model refinement)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+WORD_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+CLAUSE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+_registry = []
+
+# Names this process's snapshot. The pid lets the master find it once the
+# worker exits; the uuid keeps a worker that reuses a dead worker's pid from
+# overwriting a snapshot not yet retired
+_process_id = f'{os.getpid()}-{uuid.uuid4().hex}'
+
+
+def _new_process_id():
+    global _process_id
+    _process_id = f'{os.getpid()}-{uuid.uuid4().hex}'
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_new_process_id)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """(sample name, label pairs, value) for every recorded series"""
+        raise NotImplementedError
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children = {}
+
+    def labels(self, **labels):
+        """The series for these label values, for repeated observations without label lookups"""
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                # One count per bucket plus +Inf, then the sum
+                state = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+                child = self._children.setdefault(key, _HistogramSeries(self.buckets, state, self._lock))
+        return child
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels):
+        """Observe the seconds spent in a with block"""
+        return _Timer(self.labels(**labels))
+
+    def reset(self):
+        # Zeroed in place, callers keep the series returned by labels()
+        with self._lock:
+            for state in self._values.values():
+                state[:] = [0] * (len(state) - 1) + [0.0]
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        for key, state in items:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(bounds, state[:-1]):
+                cumulative += count
+                yield f'{self.name}_bucket', labels + (('le', bound),), cumulative
+            yield f'{self.name}_sum', labels, state[-1]
+            yield f'{self.name}_count', labels, cumulative
+
+
+class _HistogramSeries:
+    __slots__ = ('_buckets', '_state', '_lock')
+
+    def __init__(self, buckets, state, lock):
+        self._buckets = buckets
+        self._state = state
+        self._lock = lock
+
+    def observe(self, value):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._state[index] += 1
+            self._state[-1] += value
+
+
+class _Timer:
+    __slots__ = ('_series', '_started')
+
+    def __init__(self, series):
+        self._series = series
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._series.observe(time.perf_counter() - self._started)
+
+
+class _CacheCounter(Counter):
+    """Cache lookups by result, including functools.lru_cache statistics read at scrape time"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lru_caches = {}
+        self._lru_baseline = {}
+
+    def track_lru_cache(self, cache, function):
+        self._lru_caches[cache] = function
+
+    def reset(self):
+        super().reset()
+        # Keep the cached entries, count hits and misses from here on
+        for cache, function in self._lru_caches.items():
+            info = function.cache_info()
+            self._lru_baseline[cache] = (info.hits, info.misses)
+
+    def record(self, cache, hit):
+        key = (cache, 'hit' if hit else 'miss')
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + 1
+
+    def samples(self):
+        yield from super().samples()
+        for cache, function in self._lru_caches.items():
+            info = function.cache_info()
+            hits, misses = self._lru_baseline.get(cache, (0, 0))
+            yield self.name, (('cache', cache), ('result', 'hit')), info.hits - hits
+            yield self.name, (('cache', cache), ('result', 'miss')), info.misses - misses
+
+
+STAGE_SECONDS = Histogram(
+    'clauseease_stage_seconds', 'Time spent in each processing pipeline stage', ('stage',))
+DOCUMENT_WORDS = Histogram(
+    'clauseease_document_words', 'Words per processed document', buckets=WORD_BUCKETS)
+DOCUMENT_CLAUSES = Histogram(
+    'clauseease_document_clauses', 'Clauses per processed document', buckets=CLAUSE_BUCKETS)
+CACHE_REQUESTS = _CacheCounter(
+    'clauseease_cache_requests_total', 'Cache lookups by cache and result', ('cache', 'result'))
+MODEL_BATCH_SIZE = Histogram(
+    'clauseease_model_batch_size', 'Inputs per model call', ('model',), buckets=BATCH_BUCKETS)
+
+
+_stage_series = {}
+
+
+def _stage(stage):
+    series = _stage_series.get(stage)
+    if series is None:
+        series = _stage_series[stage] = STAGE_SECONDS.labels(stage=stage)
+    return series
+
+
+def stage_timer(stage):
+    """with stage_timer('extract'): ... records the block under clauseease_stage_seconds"""
+    return _Timer(_stage(stage))
+
+
+def observe_stage(stage, seconds):
+    _stage(stage).observe(seconds)
+
+
+def observe_document(word_count, clause_count):
+    DOCUMENT_WORDS.observe(word_count)
+    DOCUMENT_CLAUSES.observe(clause_count)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.record(cache, hit)
+
+
+def track_lru_cache(cache, function):
+    """Report a functools.lru_cache's hits and misses under clauseease_cache_requests_total"""
+    CACHE_REQUESTS.track_lru_cache(cache, function)
+
+
+def reset_metrics():
+    """
+    Zero every metric in this process
+
+    Called in each gunicorn worker after fork: values recorded by the
+    preloaded master (warm-up) would otherwise be counted once per worker.
+    """
+    for metric in _registry:
+        metric.reset()
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+def _collect():
+    """{(sample name, label pairs): value} for this process"""
+    values = {}
+    for metric in _registry:
+        for name, labels, value in metric.samples():
+            values[(name, labels)] = value
+    return values
+
+
+def _to_rows(values):
+    return [[name, [list(pair) for pair in labels], value] for (name, labels), value in values.items()]
+
+
+def _add_rows(values, rows):
+    for name, labels, value in rows:
+        key = (name, tuple(tuple(pair) for pair in labels))
+        values[key] = values.get(key, 0) + value
+
+
+def _read_json(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(directory, name, data):
+    temp_path = directory / f'.{name}.tmp'
+    temp_path.write_text(json.dumps(data))
+    os.replace(temp_path, directory / name)
+
+
+def write_snapshot():
+    """Write this process's values to METRICS_DIR for the other workers to add up"""
+    if not METRICS_DIR:
+        return
+    directory = Path(METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    _write_json(directory, f'{_process_id}.json', _to_rows(_collect()))
+
+
+def retire_snapshots(pid):
+    """
+    Fold the snapshots of exited process pid into retired.json and delete them
+
+    Runs in the gunicorn master (child_exit), the only writer of
+    retired.json. It is replaced before the snapshots are deleted and lists
+    their names, so render_metrics counts each snapshot once.
+    """
+    if not METRICS_DIR:
+        return
+    directory = Path(METRICS_DIR)
+    paths = list(directory.glob(f'{pid}-*.json'))
+    if not paths:
+        return
+    retired = _read_json(directory / RETIRED_SNAPSHOT) or {'snapshots': [], 'rows': []}
+    values = {}
+    _add_rows(values, retired['rows'])
+    for path in paths:
+        _add_rows(values, _read_json(path) or [])
+    names = retired['snapshots'] + [path.name for path in paths]
+    _write_json(directory, RETIRED_SNAPSHOT, {
+        'snapshots': names[-_RETIRED_NAMES_KEPT:],
+        'rows': _to_rows(values),
+    })
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def _flush_forever():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            write_snapshot()
+        except OSError as e:
+            logger.warning("Could not write metrics snapshot: %s", e)
+
+
+_flusher = None
+
+
+def start_metrics_flusher():
+    """Start the background snapshot writer for this process (no-op without METRICS_DIR)"""
+    global _flusher
+    if METRICS_DIR and _flusher is None:
+        _flusher = threading.Thread(target=_flush_forever, name='metrics-flush', daemon=True)
+        _flusher.start()
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    values = _collect()
+    if METRICS_DIR:
+        # Snapshots of the other workers, then the counts of exited ones
+        directory = Path(METRICS_DIR)
+        skipped = (f'{_process_id}.json', RETIRED_SNAPSHOT)
+        snapshots = {}
+        for path in directory.glob('*.json'):
+            if path.name not in skipped:
+                rows = _read_json(path)
+                if rows is not None:
+                    snapshots[path.name] = rows
+        # Read last: a snapshot deleted since the glob is already in it
+        retired = _read_json(directory / RETIRED_SNAPSHOT) or {'snapshots': [], 'rows': []}
+        for name in retired['snapshots']:
+            snapshots.pop(name, None)
+        _add_rows(values, retired['rows'])
+        for rows in snapshots.values():
+            _add_rows(values, rows)
+
+    by_name = {}
+    for (name, labels), value in values.items():
+        by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        suffixes = ('_bucket', '_sum', '_count') if metric.kind == 'histogram' else ('',)
+        for suffix in suffixes:
+            for labels, value in sorted(by_name.get(metric.name + suffix, ()), key=_series_order):
+                lines.append(f'{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _series_order(series):
+    labels, _ = series
+    # Buckets in ascending le order within each series
+    return tuple(float(value) if name == 'le' else value for name, value in labels)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
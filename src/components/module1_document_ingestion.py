@@ -1,11 +1,10 @@
 import os
-import fitz  # PyMuPDF
-from docx import Document
 
 def extract_text_from_pdf(pdf_path):
     """Extract text from PDF"""
     text = ""
     try:
+        import fitz  # PyMuPDF
         with fitz.open(pdf_path) as doc:
             for page in doc:
                 text += page.get_text()
@@ -17,6 +16,7 @@ def extract_text_from_docx(docx_path):
     """Extract text from DOCX"""
     text = ""
     try:
+        from docx import Document
         doc = Document(docx_path)
         for para in doc.paragraphs:
             if para.text.strip():
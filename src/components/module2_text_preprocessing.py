@@ -1,26 +1,46 @@
+import importlib.util
+import logging
 import re
 import nltk
-try:
-    import spacy
-except Exception:
-    spacy = None
 
 from nltk.tokenize import sent_tokenize
 
-# Download NLTK data
-nltk.download('punkt')
-nltk.download('punkt_tab')
+logger = logging.getLogger(__name__)
 
-# Load spaCy model
+
+def _ensure_nltk_data():
+    """Download NLTK tokenizer data only when it is missing"""
+    for resource, package in (("tokenizers/punkt", "punkt"), ("tokenizers/punkt_tab", "punkt_tab")):
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package)
+
+
+_ensure_nltk_data()
+
+# spaCy model, loaded on first use
+_HAS_SPACY = importlib.util.find_spec("spacy") is not None
 nlp = None
-if spacy is not None:
+_nlp_load_attempted = False
+
+
+def ensure_nlp_loaded():
+    """Load the spaCy model for entity extraction"""
+    global nlp, _nlp_load_attempted
+    if _nlp_load_attempted:
+        return nlp is not None
+    _nlp_load_attempted = True
+    if not _HAS_SPACY:
+        return False
     try:
+        import spacy
         nlp = spacy.load("en_core_web_sm")
-        print("spaCy model 'en_core_web_sm' loaded successfully for entity extraction")
+        logger.info("Loaded spaCy model en_core_web_sm for entity extraction")
     except Exception as e:
-        print(f"Could not load spaCy model: {e}")
-        print("Run: python -m spacy download en_core_web_sm")
+        logger.warning("Could not load spaCy model (run: python -m spacy download en_core_web_sm): %s", e)
         nlp = None
+    return nlp is not None
 
 
 # Text cleaning functions
@@ -80,11 +100,9 @@ def segment_clauses(text: str) -> list:
     
     if not splits:
         # Fallback to paragraphs
-        print("No clause markers found, using paragraph-based split...")
         paragraphs = [p.strip() for p in re.split(r'\n\s*\n+', text) if p.strip()]
         clauses = [p for p in paragraphs if len(p) > 20]
-        print(f"Raw text length: {len(text)} characters")
-        print(f"Text segmented into {len(clauses)} parts (paragraph-based)")
+        logger.debug("No clause markers in %d characters, split into %d paragraphs", len(text), len(clauses))
         return clauses if clauses else [text]
     
     # Extract clauses
@@ -104,9 +122,7 @@ def segment_clauses(text: str) -> list:
     # Clean up clauses
     clauses = [c.strip() for c in clauses if c.strip() and len(c.strip()) > 10]
     
-    print(f"Raw text length: {len(text)} characters")
-    print(f"Found {len(splits)} clause markers")
-    print(f"Text segmented into {len(clauses)} parts")
+    logger.debug("Found %d clause markers in %d characters, split into %d clauses", len(splits), len(text), len(clauses))
     
     return clauses if clauses else [text]
 
@@ -120,7 +136,7 @@ def split_sentences(text: str) -> list:
 
 def extract_entities(text: str) -> list:
     """Extract named entities"""
-    if nlp is None:
+    if not ensure_nlp_loaded():
         return []  # spaCy unavailable
     
     try:
@@ -128,7 +144,7 @@ def extract_entities(text: str) -> list:
         entities = [(ent.text, ent.label_) for ent in doc.ents]
         return entities
     except Exception as e:
-        print(f"Error extracting entities: {e}")
+        logger.error("Error extracting entities: %s", e)
         return []
 
 
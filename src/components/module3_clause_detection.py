@@ -1,3 +1,7 @@
+import importlib.util
+
+from components.metrics import MODEL_BATCH_SIZE
+
 # Clause type labels
 CLAUSE_LABELS = {
     0: "Confidentiality",
@@ -17,12 +21,8 @@ CLAUSE_LABELS = {
     14: "Notice"
 }
 
-try:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
-    import torch
-    _HAS_TRANSFORMERS = True
-except Exception:
-    _HAS_TRANSFORMERS = False
+# transformers/torch are imported on first model load, not at import time
+_HAS_TRANSFORMERS = all(importlib.util.find_spec(name) is not None for name in ("transformers", "torch"))
 
 _model = None
 _tokenizer = None
@@ -34,8 +34,12 @@ def _load_model(model_name="nlpaueb/legal-bert-base-uncased", num_labels=15):
     if not _HAS_TRANSFORMERS:
         return False
     try:
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
         _tokenizer = AutoTokenizer.from_pretrained(model_name)
         _model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=num_labels)
+        # Inference only: no autograd state, weights never written after load
+        _model.eval()
+        _model.requires_grad_(False)
         return True
     except Exception:
         _model = None
@@ -87,7 +91,9 @@ def detect_clause_type(text: str) -> str:
     # Try model-based prediction
     if _model and _tokenizer:
         try:
+            import torch
             inputs = _tokenizer(text, return_tensors="pt", truncation=True, padding=True)
+            MODEL_BATCH_SIZE.observe(inputs['input_ids'].shape[0], model='clause_detection')
             with torch.no_grad():
                 outputs = _model(**inputs)
             logits = outputs.logits
@@ -107,4 +113,6 @@ def detect_clause_types_batch(texts):
 
 def ensure_model_loaded(model_name="nlpaueb/legal-bert-base-uncased", num_labels=15):
     """Ensure model is loaded"""
+    if _model is not None and _tokenizer is not None:
+        return True
     return _load_model(model_name=model_name, num_labels=num_labels)
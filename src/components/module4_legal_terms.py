@@ -1,3 +1,4 @@
+import importlib.util
 import re
 
 # Legal term categories mapping
@@ -91,17 +92,29 @@ _DEFINITIONS = {
     "state": "A political territory with its own government and laws",
 }
 
-# Load spaCy model
-try:
-    import spacy
-    _HAS_SPACY = True
-    try:
-        _SPACY_NLP = spacy.load("en_core_web_sm")
-    except Exception:
-        _SPACY_NLP = None
-except Exception:
-    _HAS_SPACY = False
-    _SPACY_NLP = None
+# spaCy model, loaded on first use
+_HAS_SPACY = importlib.util.find_spec("spacy") is not None
+_SPACY_NLP = None
+_spacy_load_attempted = False
+
+
+def _get_spacy_nlp():
+    """Load the spaCy model once, on first use"""
+    global _SPACY_NLP, _spacy_load_attempted
+    if not _spacy_load_attempted:
+        _spacy_load_attempted = True
+        if _HAS_SPACY:
+            try:
+                import spacy
+                _SPACY_NLP = spacy.load("en_core_web_sm")
+            except Exception:
+                _SPACY_NLP = None
+    return _SPACY_NLP
+
+
+def ensure_nlp_loaded():
+    """Load the spaCy model used for term extraction"""
+    return _get_spacy_nlp() is not None
 
 
 def extract_legal_terms(text: str):
@@ -157,9 +170,10 @@ def extract_legal_terms(text: str):
                 seen.add(keyword)
     
     # Use spaCy NER
-    if _SPACY_NLP:
+    spacy_nlp = _get_spacy_nlp()
+    if spacy_nlp:
         try:
-            doc = _SPACY_NLP(text[:5000])  # Performance limit
+            doc = spacy_nlp(text[:5000])  # Performance limit
             for ent in doc.ents:
                 if ent.label_ in ['LAW', 'ORG', 'EVENT']:
                     ent_text = ent.text.strip()
@@ -1,56 +1,176 @@
+import importlib.util
+import logging
 import os
+import re
+import time
 from pathlib import Path
 
-try:
-    from transformers import pipeline
-    _HAS_HF = True
-except Exception:
-    _HAS_HF = False
+from components.metrics import MODEL_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# transformers/torch are imported on first model load, not at import time
+_HAS_HF = all(importlib.util.find_spec(name) is not None for name in ("transformers", "torch"))
 
 try:
     from dotenv import load_dotenv
     env_path = Path(__file__).resolve().parent.parent.parent / '.env'
     if env_path.exists():
         load_dotenv(env_path)
-        print(f"[OK] Loaded environment from {env_path}")
+        logger.info("Loaded environment from %s", env_path)
 except ImportError:
-    print("[WARN] python-dotenv not installed, skipping .env loading")
-    pass
+    logger.debug("python-dotenv not installed, skipping .env loading")
 
 # Get HF token
 HF_TOKEN = os.environ.get("HUGGINGFACE_HUB_TOKEN")
 
-_simplifier = None
-_load_attempted = False
+# Simplifier tiers, best quality first. seconds_per_word is the prior
+# estimate used until real throughput has been measured on this machine;
+# BART's BPE averages about 1.3 tokens per word of contract English, so the
+# priors are the per-token generation costs scaled by that.
+SIMPLIFIER_TIERS = {
+    "large": {
+        "model": os.environ.get("SIMPLIFIER_LARGE_MODEL", "facebook/bart-large-cnn"),
+        "seconds_per_word": 0.1,
+    },
+    "distilled": {
+        "model": os.environ.get("SIMPLIFIER_DISTILLED_MODEL", "sshleifer/distilbart-cnn-12-6"),
+        "seconds_per_word": 0.05,
+    },
+    "rules": {
+        "model": None,
+        "seconds_per_word": 0.00001,
+    },
+}
+TIER_ORDER = ("large", "distilled", "rules")
 
+# Default per-request latency budget in seconds
+DEFAULT_LATENCY_BUDGET = float(os.environ.get("SIMPLIFIER_LATENCY_BUDGET", "120"))
 
-def ensure_simplifier_loaded(model_name="facebook/bart-large-cnn"):
-    """Load simplification model"""
-    global _simplifier, _load_attempted
-    
-    if _load_attempted:
-        return _simplifier is not None
+# CPU inference mode: 'optimized' (int8 dynamic quantization, pinned
+# thread counts, inference_mode) or 'fp32' (stock PyTorch settings)
+SIMPLIFIER_CPU_MODE = os.environ.get("SIMPLIFIER_CPU_MODE", "optimized")
+
+_simplifiers = {}
+_load_attempted = set()
+_threads_configured = False
+_throughput = {tier: cfg["seconds_per_word"] for tier, cfg in SIMPLIFIER_TIERS.items()}
+_THROUGHPUT_SMOOTHING = 0.3
+
+
+def _configure_torch_threads():
+    """Split CPU cores between web workers instead of oversubscribing"""
+    global _threads_configured
+    if _threads_configured:
+        return
+    _threads_configured = True
+    import torch
+
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+    intra_op = int(os.environ.get("SIMPLIFIER_THREADS", max(1, (os.cpu_count() or 1) // workers)))
+    inter_op = int(os.environ.get("SIMPLIFIER_INTEROP_THREADS", "1"))
+    torch.set_num_threads(intra_op)
+    try:
+        torch.set_num_interop_threads(inter_op)
+    except RuntimeError:
+        # Only settable before the first parallel op in this process
+        pass
+    logger.info("Simplifier threads: intra-op=%d, inter-op=%d", intra_op, inter_op)
+
+
+def _optimize_for_cpu(simplifier):
+    """Quantize Linear layers to int8 for CPU generation"""
+    if simplifier.device.type != "cpu":
+        return simplifier
+    import torch
+    simplifier.model = torch.quantization.quantize_dynamic(
+        simplifier.model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    simplifier.model.eval()
+    return simplifier
+
+
+def ensure_simplifier_loaded(model_name=None, tier="large"):
+    """Load simplification model for a tier"""
+    if tier == "rules":
+        return True
+
+    if tier in _load_attempted:
+        return _simplifiers.get(tier) is not None
     
-    _load_attempted = True
+    _load_attempted.add(tier)
     
     if not _HAS_HF:
         return False
+    model_name = model_name or SIMPLIFIER_TIERS[tier]["model"]
     try:
+        from transformers import pipeline
         kwargs = {"use_fast": False}
         if HF_TOKEN:
             kwargs["token"] = HF_TOKEN
-        print("Using Hugging Face token from environment")
-        
-        _simplifier = pipeline("summarization", model=model_name, **kwargs)
-        print(f"Loaded simplification model: {model_name}")
+            logger.debug("Using Hugging Face token from environment")
+
+        if SIMPLIFIER_CPU_MODE == "optimized":
+            _configure_torch_threads()
+        simplifier = pipeline("summarization", model=model_name, **kwargs)
+        if SIMPLIFIER_CPU_MODE == "optimized":
+            simplifier = _optimize_for_cpu(simplifier)
+        # Inference only: no autograd state, weights never written after load
+        simplifier.model.requires_grad_(False)
+        _simplifiers[tier] = simplifier
+        logger.info("Loaded simplification model %s (%s)", model_name, tier)
         return True
     except Exception as e:
-        print(f"Failed to load simplifier: {e}")
-        _simplifier = None
+        logger.warning("Failed to load simplifier %s: %s", model_name, e)
+        _simplifiers.pop(tier, None)
+        return False
+
+
+def _tier_available(tier):
+    """Whether a tier can serve requests (loaded or not yet tried)"""
+    if tier == "rules":
+        return True
+    if not _HAS_HF:
         return False
+    return tier in _simplifiers or tier not in _load_attempted
+
+
+def _record_throughput(tier, words, seconds):
+    """Fold a measured generation time into the tier's per-word throughput estimate"""
+    if words <= 0:
+        return
+    observed = seconds / words
+    previous = _throughput[tier]
+    _throughput[tier] = previous + _THROUGHPUT_SMOOTHING * (observed - previous)
+
+
+def estimate_simplification_seconds(text: str, tier: str) -> float:
+    """Estimated time to simplify text with a tier"""
+    return len(text.split()) * _throughput[tier]
+
+
+def select_tier(text: str, latency_budget=None):
+    """
+    Pick the highest quality tier expected to finish within the budget
+
+    Args:
+        text: Text that will be simplified
+        latency_budget: Seconds allowed, defaults to DEFAULT_LATENCY_BUDGET
+
+    Returns:
+        (tier, estimated_seconds)
+    """
+    budget = DEFAULT_LATENCY_BUDGET if latency_budget is None else latency_budget
+    for tier in TIER_ORDER:
+        if not _tier_available(tier):
+            continue
+        estimate = estimate_simplification_seconds(text, tier)
+        if estimate <= budget or tier == "rules":
+            return tier, round(estimate, 3)
+    return "rules", round(estimate_simplification_seconds(text, "rules"), 3)
 
 
-def simplify_text(text: str, max_length=60, level="basic"):
+def simplify_text(text: str, max_length=60, level="basic", tier="large"):
     """
     Multi-level text simplification
     
@@ -58,22 +178,26 @@ def simplify_text(text: str, max_length=60, level="basic"):
         text: Input text
         max_length: Maximum output length
         level: Simplification intensity ('basic', 'intermediate', 'advanced')
+        tier: Simplifier tier from SIMPLIFIER_TIERS
     
     Returns:
         Simplified text string
     """
-    global _simplifier, _load_attempted
-    
     if not text or not text.strip():
         return text
+
+    if tier == "rules":
+        return lexical_simplify(text, level=level)
     
     # Auto-load model
-    if _HAS_HF and _simplifier is None and not _load_attempted:
-        print("Auto-loading AI simplification model (facebook/bart-large-cnn)...")
-        ensure_simplifier_loaded("facebook/bart-large-cnn")
-    
-    if _simplifier and len(text.split()) > 10:
+    if _HAS_HF and tier not in _simplifiers and tier not in _load_attempted:
+        logger.info("Auto-loading simplification model %s", SIMPLIFIER_TIERS[tier]['model'])
+        ensure_simplifier_loaded(tier=tier)
+
+    simplifier = _simplifiers.get(tier)
+    if simplifier and len(text.split()) > 10:
         try:
+            import torch
             from nltk.tokenize import sent_tokenize
             sentences = sent_tokenize(text)
             
@@ -101,15 +225,19 @@ def simplify_text(text: str, max_length=60, level="basic"):
                     sent_words = len(sent.split())
                     dynamic_max_length = max(15, min(int(sent_words * length_ratio), 50))
                     
-                    result = _simplifier(
-                        sent, 
-                        max_length=dynamic_max_length, 
-                        min_length=10,
-                        do_sample=True,
-                        temperature=temperature,
-                        top_p=0.95,
-                        truncation=True
-                    )
+                    MODEL_BATCH_SIZE.observe(1, model=f'simplifier_{tier}')
+                    started = time.perf_counter()
+                    with torch.inference_mode():
+                        result = simplifier(
+                            sent, 
+                            max_length=dynamic_max_length, 
+                            min_length=10,
+                            do_sample=True,
+                            temperature=temperature,
+                            top_p=0.95,
+                            truncation=True
+                        )
+                    _record_throughput(tier, sent_words, time.perf_counter() - started)
                     
                     if result and len(result) > 0 and 'summary_text' in result[0]:
                         ai_output = result[0]['summary_text'].strip()
@@ -132,12 +260,159 @@ def simplify_text(text: str, max_length=60, level="basic"):
             return ' '.join(simplified_sentences)
             
         except Exception as e:
-            print(f"[WARN] AI simplification failed: {e}")
+            logger.warning("Model simplification failed, keeping original text: %s", e)
             return text
     
     return text
 
 
+def compose_simplified_document(source_text: str, clauses):
+    """
+    Assemble the document-level simplification from per-clause results
+
+    Args:
+        source_text: Cleaned document text the clauses were segmented from
+            (stored as Document.cleaned_text, which the offsets index)
+        clauses: Clause dicts carrying 'index', 'cleaned_text' and 'simplified'
+
+    Returns:
+        (simplified_text, segments) where each segment maps a clause to its
+        character span in source_text and in simplified_text
+    """
+    parts = []
+    segments = []
+    cursor = 0
+    offset = 0
+
+    for clause in clauses:
+        original = clause.get('cleaned_text') or ''
+        simplified = (clause.get('simplified') or original).strip()
+        if not simplified:
+            continue
+
+        start = source_text.find(original, cursor) if original else -1
+        if start == -1:
+            original_span = (None, None)
+        else:
+            cursor = start + len(original)
+            original_span = (start, cursor)
+
+        if parts:
+            offset += 1  # joining space
+        segments.append({
+            'index': clause.get('index'),
+            'original_start': original_span[0],
+            'original_end': original_span[1],
+            'simplified_start': offset,
+            'simplified_end': offset + len(simplified),
+        })
+        parts.append(simplified)
+        offset += len(simplified)
+
+    return ' '.join(parts), segments
+
+
+# Lexical replacement tables (each level extends the previous one). Only
+# substitutions with the same legal effect in every clause; terms of art such
+# as 'shall', 'indemnify', 'provided that', 'deemed', 'forthwith' and
+# 'endeavour' are left for the model tiers.
+_BASIC_REPLACEMENTS = {
+    'aforementioned': 'mentioned',
+    'aforesaid': 'mentioned',
+    'herein': 'in this document',
+    'hereinafter': 'from now on',
+    'pursuant to': 'under',
+    'prior to': 'before',
+    'subsequent to': 'after',
+    'in the event that': 'if',
+    'in the event of': 'if there is',
+    'in order to': 'to',
+    'for the purpose of': 'for',
+    'with respect to': 'about',
+    'with regard to': 'about',
+    'in relation to': 'about',
+    'by means of': 'by',
+    'commence': 'start',
+    'commencement': 'start',
+    'utilize': 'use',
+    'utilise': 'use',
+}
+
+_MODERATE_REPLACEMENTS = {
+    **_BASIC_REPLACEMENTS,
+    'sufficient': 'enough',
+    'approximately': 'about',
+    'inter alia': 'among other things',
+    'mutatis mutandis': 'with the necessary changes',
+}
+
+_AGGRESSIVE_REPLACEMENTS = {
+    **_MODERATE_REPLACEMENTS,
+    'thereof': 'of it',
+    'therein': 'in it',
+    'thereto': 'to it',
+    'therefrom': 'from it',
+    'hereof': 'of this document',
+    'hereto': 'to this document',
+    'hereunder': 'under this document',
+    'whereby': 'by which',
+    'wherein': 'in which',
+    'notwithstanding': 'despite',
+    'save as': 'except as',
+    'force and effect': 'effect',
+}
+
+
+class _PhraseMatcher:
+    """Single-pass, word-bounded phrase replacer compiled from a table"""
+
+    def __init__(self, replacements):
+        self._table = {phrase.lower(): target for phrase, target in replacements.items()}
+        # Longest phrases first so a phrase wins over a shorter one it starts with
+        phrases = sorted(self._table, key=len, reverse=True)
+        self._pattern = re.compile(
+            r'\b(?:' + '|'.join(re.escape(p) for p in phrases) + r')\b',
+            re.IGNORECASE
+        )
+
+    def _replace(self, match):
+        found = match.group(0)
+        target = self._table[found.lower()]
+        if len(found) > 1 and found.isupper():
+            return target.upper()
+        if found[0].isupper():
+            return target[0].upper() + target[1:]
+        return target
+
+    def sub(self, text: str) -> str:
+        return self._pattern.sub(self._replace, text)
+
+
+_MATCHERS = {
+    'basic': _PhraseMatcher(_BASIC_REPLACEMENTS),
+    'intermediate': _PhraseMatcher(_MODERATE_REPLACEMENTS),
+    'advanced': _PhraseMatcher(_AGGRESSIVE_REPLACEMENTS),
+}
+
+
+def lexical_simplify(text: str, level="basic"):
+    """
+    Fast rule-based simplification used as an instant preview
+
+    Args:
+        text: Input text
+        level: Simplification intensity ('basic', 'intermediate', 'advanced')
+
+    Returns:
+        Text with legalese replaced by plain-language equivalents
+    """
+    if not text or not text.strip():
+        return text
+
+    matcher = _MATCHERS.get(level, _MATCHERS['basic'])
+    return matcher.sub(text)
+
+
 def _aggressive_simplification(text: str, max_length: int) -> str:
     words = text.split()
     if len(words) > max_length:
@@ -145,36 +420,9 @@ def _aggressive_simplification(text: str, max_length: int) -> str:
         if text and text[-1].isalnum():
             text += '.'
 
-    replacements = {
-        'aforementioned': 'mentioned',
-        'herein': 'here',
-        'thereof': 'of it',
-        'whereby': 'by which',
-        'hereunder': 'under this',
-        'thereto': 'to it',
-        'pursuant to': 'according to',
-        'notwithstanding': 'despite'
-    }
-
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-        text = text.replace(old.capitalize(), new.capitalize())
-
-    return text
+    return _MATCHERS['advanced'].sub(text)
 
 
 def _moderate_simplification(text: str, max_length: int) -> str:
     """Intermediate post-processing"""
-    # Basic term replacement
-    replacements = {
-        'aforementioned': 'mentioned',
-        'herein': 'here',
-        'pursuant to': 'according to'
-    }
-    
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-        text = text.replace(old.capitalize(), new.capitalize())
-    
-    return text
-
+    return _MATCHERS['intermediate'].sub(text)
@@ -0,0 +1,69 @@
+"""Keyset pagination cursors over (uploaded_at, id)"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(uploaded_at, document_id):
+    """Opaque cursor pointing just past a row"""
+    payload = json.dumps([uploaded_at.isoformat() if uploaded_at else None, document_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor
+
+    Returns:
+        (uploaded_at, document_id), or None for a missing or malformed cursor;
+        uploaded_at is None when the cursor row had no upload time
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        uploaded_at, document_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if uploaded_at is not None:
+            uploaded_at = datetime.fromisoformat(uploaded_at)
+        return uploaded_at, int(document_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_page(query, uploaded_at_column, id_column, position, limit):
+    """
+    Up to limit rows of query past a decoded cursor, newest first
+
+    Dated rows are read with the (uploaded_at, id) row-value predicate alone,
+    which SQLite answers with a range seek on the (user_id, uploaded_at, id)
+    index. Rows with no upload time sort after all of them and are read by
+    a second query, by id, only once the dated rows run out.
+    """
+    rows = []
+    uploaded_at, document_id = position or (None, None)
+    if position is None or uploaded_at is not None:
+        if position:
+            # A NULL upload time never satisfies the row-value comparison
+            dated = query.filter(tuple_(uploaded_at_column, id_column) < tuple_(uploaded_at, document_id))
+        else:
+            dated = query.filter(uploaded_at_column.isnot(None))
+        rows = dated.order_by(uploaded_at_column.desc(), id_column.desc()).limit(limit).all()
+    if len(rows) < limit:
+        undated = query.filter(uploaded_at_column.is_(None))
+        if uploaded_at is None and document_id is not None:
+            undated = undated.filter(id_column < document_id)
+        rows += undated.order_by(id_column.desc()).limit(limit - len(rows)).all()
+    return rows
+
+
+def page_size(requested):
+    """Clamp a requested page size"""
+    if not requested or requested < 1:
+        return HISTORY_PAGE_SIZE
+    return min(requested, HISTORY_MAX_PAGE_SIZE)
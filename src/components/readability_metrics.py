@@ -1,160 +1,215 @@
 """Text readability metrics calculation"""
 
 from nltk.tokenize import sent_tokenize, word_tokenize
-import matplotlib
-matplotlib.use('Agg')  # Non-GUI backend
-import matplotlib.pyplot as plt
-import seaborn as sns
-import base64
-from io import BytesIO
+import logging
+import math
 from collections import Counter
+from dataclasses import dataclass, asdict, astuple
+from functools import lru_cache
 
-def count_syllables(word):
-    """Count syllables in word"""
-    word = word.lower()
-    syllables = 0
-    vowels = "aeiouy"
-    
+import numpy as np
+
+from components.chart_rendering import render_chart
+from components.metrics import track_lru_cache
+
+logger = logging.getLogger(__name__)
+
+_VOWELS = frozenset("aeiouy")
+
+
+@lru_cache(maxsize=65536)
+def _syllables_lower(word):
+    """Count syllables in an already lower-cased word"""
     if len(word) <= 1:
         return 1
     
     if word.endswith('e'):
         word = word[:-1]
     
+    syllables = 0
     previous_was_vowel = False
     for char in word:
-        is_vowel = char in vowels
+        is_vowel = char in _VOWELS
         if is_vowel and not previous_was_vowel:
             syllables += 1
         previous_was_vowel = is_vowel
     
     return max(1, syllables)
 
+
+track_lru_cache('syllables', _syllables_lower)
+
+
+def count_syllables(word):
+    """Count syllables in word (memoized, legal vocabulary repeats a lot)"""
+    return _syllables_lower(word.lower())
+
+
+def token_arrays(tokens):
+    """Word length, syllable count and alphabetic mask arrays for tokens"""
+    count = len(tokens)
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int32, count=count)
+    syllables = np.fromiter((count_syllables(t) for t in tokens), dtype=np.int32, count=count)
+    is_alpha = np.fromiter((t.isalpha() for t in tokens), dtype=bool, count=count)
+    return lengths, syllables, is_alpha
+
+
 def count_complex_words(text):
     """Count 3+ syllable words"""
-    words = word_tokenize(text.lower())
-    complex_words = [w for w in words if len(w) > 2 and count_syllables(w) >= 3]
-    return len(complex_words)
+    lengths, syllables, _ = token_arrays(word_tokenize(text))
+    return int(np.count_nonzero((lengths > 2) & (syllables >= 3)))
 
-def calculate_all_metrics(text):
-    """Calculate text statistics"""
-    if not text or len(text.strip()) == 0:
-        return {
-            "sentence_count": 0,
-            "word_count": 0,
-            "avg_words_per_sentence": 0,
-            "complex_word_count": 0
-        }
-    
-    try:
-        sentences = sent_tokenize(text)
-        words = word_tokenize(text)
-        words = [w for w in words if w.isalpha()]
-        
+@dataclass
+class ReadabilityStats:
+    """Mergeable readability counts for a span of text (clause or document)"""
+    sentence_count: int = 0
+    word_count: int = 0
+    syllable_count: int = 0
+    complex_word_count: int = 0
+    polysyllable_count: int = 0
+    letter_count: int = 0
+
+    @classmethod
+    def from_text(cls, text):
+        """Tokenize once and count"""
+        if not text or len(text.strip()) == 0:
+            return cls()
+        try:
+            sentences = sent_tokenize(text)
+            lengths, syllables, is_alpha = token_arrays(word_tokenize(text))
+            return cls(
+                sentence_count=len(sentences),
+                word_count=int(np.count_nonzero(is_alpha)),
+                syllable_count=int(syllables[is_alpha].sum()),
+                complex_word_count=int(np.count_nonzero((lengths > 2) & (syllables >= 3))),
+                polysyllable_count=int(np.count_nonzero(is_alpha & (syllables >= 3))),
+                letter_count=int(lengths[is_alpha].sum())
+            )
+        except Exception as e:
+            logger.error("Error calculating metrics: %s", e)
+            return cls()
+
+    @classmethod
+    def from_dict(cls, data, text):
+        """
+        Rebuild from a stored to_dict() payload
+
+        Payloads saved before a field existed are recounted from text rather
+        than read as zeros, which later subtractions would carry forward.
+        """
+        if not data or any(name not in data for name in cls.__dataclass_fields__):
+            return cls.from_text(text)
+        return cls(**{name: int(data[name]) for name in cls.__dataclass_fields__})
+
+    def to_dict(self):
+        return asdict(self)
+
+    def __add__(self, other):
+        return ReadabilityStats(*(a + b for a, b in zip(astuple(self), astuple(other))))
+
+    def __sub__(self, other):
+        return ReadabilityStats(*(a - b for a, b in zip(astuple(self), astuple(other))))
+
+    def readability_scores(self):
+        """Standard readability formulas over the shared counts"""
+        if self.sentence_count == 0 or self.word_count == 0:
+            return {
+                "flesch_reading_ease": 0.0,
+                "flesch_kincaid_grade": 0.0,
+                "gunning_fog": 0.0,
+                "smog_index": 0.0,
+                "coleman_liau_index": 0.0
+            }
+
+        words_per_sentence = self.word_count / self.sentence_count
+        syllables_per_word = self.syllable_count / self.word_count
+        polysyllable_ratio = self.polysyllable_count / self.word_count
+        letters_per_100 = self.letter_count / self.word_count * 100
+        sentences_per_100 = self.sentence_count / self.word_count * 100
+
+        reading_ease = 206.835 - (1.015 * words_per_sentence) - (84.6 * syllables_per_word)
         return {
-            "sentence_count": len(sentences),
-            "word_count": len(words),
-            "avg_words_per_sentence": round(len(words) / len(sentences), 2) if len(sentences) > 0 else 0,
-            "complex_word_count": count_complex_words(text)
+            "flesch_reading_ease": round(max(min(reading_ease, 100.0), 0.0), 2),
+            "flesch_kincaid_grade": round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 2),
+            "gunning_fog": round(0.4 * (words_per_sentence + 100 * polysyllable_ratio), 2),
+            "smog_index": round(1.043 * math.sqrt(self.polysyllable_count * 30 / self.sentence_count) + 3.1291, 2),
+            "coleman_liau_index": round(0.0588 * letters_per_100 - 0.296 * sentences_per_100 - 15.8, 2)
         }
-    except Exception as e:
-        print(f"Error calculating metrics: {e}")
+
+    def to_metrics(self):
+        """Metrics dict in the calculate_all_metrics format"""
         return {
-            "sentence_count": 0,
-            "word_count": 0,
-            "avg_words_per_sentence": 0,
-            "complex_word_count": 0
+            "sentence_count": self.sentence_count,
+            "word_count": self.word_count,
+            "avg_words_per_sentence": round(self.word_count / self.sentence_count, 2) if self.sentence_count > 0 else 0,
+            "complex_word_count": self.complex_word_count,
+            **self.readability_scores()
         }
 
 
+def merge_stats(stats_list):
+    """Combine per-clause accumulators into document totals"""
+    return sum(stats_list, ReadabilityStats())
+
+
+def stored_simplified_totals(readability_totals, clauses):
+    """Simplified document totals of a stored report, summed from its clauses if missing or incomplete"""
+    stored = (readability_totals or {}).get('simplified')
+    if stored and all(name in stored for name in ReadabilityStats.__dataclass_fields__):
+        return ReadabilityStats.from_dict(stored, None)
+    return merge_stats(
+        ReadabilityStats.from_dict(clause.get('readability', {}).get('simplified'), clause.get('simplified'))
+        for clause in clauses
+    )
+
+
+def replace_clause_stats(totals, clause, simplified_text):
+    """Swap one clause's simplified text and counts into document totals in O(1)"""
+    readability = clause.setdefault('readability', {})
+    previous = ReadabilityStats.from_dict(readability.get('simplified'), clause.get('simplified'))
+    current = ReadabilityStats.from_text(simplified_text)
+    clause['simplified'] = simplified_text
+    readability['simplified'] = current.to_dict()
+    return totals - previous + current
+
+
+def calculate_all_metrics(text):
+    """Calculate text statistics"""
+    return ReadabilityStats.from_text(text).to_metrics()
+
+
+_STATS_CHART_FIELDS = [
+    ('Word Count', 'word_count'),
+    ('Sentence Count', 'sentence_count'),
+    ('Avg Words/Sentence', 'avg_words_per_sentence'),
+    ('Complex Words', 'complex_word_count'),
+]
+
+
+def build_chart_data(clause_type_summary, original_metrics, simplified_metrics):
+    """Compact chart series for client-side rendering"""
+    clause_type_summary = clause_type_summary or {}
+    return {
+        'clause_types': {
+            'labels': list(clause_type_summary.keys()),
+            'values': list(clause_type_summary.values()),
+        },
+        'stats': {
+            'categories': [label for label, _ in _STATS_CHART_FIELDS],
+            'original': [(original_metrics or {}).get(key, 0) for _, key in _STATS_CHART_FIELDS],
+            'simplified': [(simplified_metrics or {}).get(key, 0) for _, key in _STATS_CHART_FIELDS],
+        },
+    }
+
+
 def generate_clause_type_chart(clause_type_summary):
     """Generate clause pie chart"""
-    try:
-        if not clause_type_summary or len(clause_type_summary) == 0:
-            clause_type_summary = {'General': 100}
-        
-        labels = list(clause_type_summary.keys())
-        sizes = list(clause_type_summary.values())
-        
-        # Chart colors
-        colors = [
-            '#3B82F6', '#10B981', '#F59E0B', '#8B5CF6', 
-            '#EC4899', '#0EA5E9', '#FB923C', '#22C55E'
-        ]
-        
-        fig = plt.figure(figsize=(8, 6))
-        
-        plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90, 
-                colors=colors[:len(labels)], textprops={'fontsize': 11, 'weight': 'bold'})
-        plt.title('Clause Types Distribution', fontsize=14, weight='bold', pad=20)
-        plt.axis('equal')
-        
-        # Convert to base64
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=80, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-        plt.close(fig)
-        
-        return f"data:image/png;base64,{image_base64}"
-    except Exception as e:
-        print(f"Error generating clause type chart: {e}")
-        return None
+    if not clause_type_summary or len(clause_type_summary) == 0:
+        clause_type_summary = {'General': 100}
+    return render_chart('clause_type_pie', dict(clause_type_summary), 'Clause Types Distribution')
 
 
 def generate_stats_chart(original_metrics, simplified_metrics):
     """Generate comparison bar chart"""
-    try:
-        categories = ['Word Count', 'Sentence Count', 'Avg Words/Sentence', 'Complex Words']
-        
-        # Extract original values
-        original_values = [
-            original_metrics.get('word_count', 0),
-            original_metrics.get('sentence_count', 0),
-            original_metrics.get('avg_words_per_sentence', 0),
-            original_metrics.get('complex_word_count', 0)
-        ]
-        
-        # Extract simplified values
-        simplified_values = [
-            simplified_metrics.get('word_count', 0),
-            simplified_metrics.get('sentence_count', 0),
-            simplified_metrics.get('avg_words_per_sentence', 0),
-            simplified_metrics.get('complex_word_count', 0)
-        ]
-        
-        x = range(len(categories))
-        width = 0.35
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Create side-by-side bars
-        bars1 = ax.bar([i - width/2 for i in x], original_values, width, 
-                        label='Original', color='#2563EB', edgecolor='#1E40AF', linewidth=1.5)
-        bars2 = ax.bar([i + width/2 for i in x], simplified_values, width, 
-                        label='Simplified', color='#A855F7', edgecolor='#7C3AED', linewidth=1.5)
-        
-        # Style chart
-        ax.set_xlabel('Metrics', fontsize=12, weight='bold')
-        ax.set_ylabel('Values', fontsize=12, weight='bold')
-        ax.set_title('Text Statistics Comparison', fontsize=14, weight='bold', pad=20)
-        ax.set_xticks(x)
-        ax.set_xticklabels(categories, fontsize=10)
-        ax.legend(fontsize=11, loc='upper right')
-        ax.grid(axis='y', alpha=0.3, linestyle='--')
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        
-        plt.tight_layout()
-        
-        # Convert to base64
-        buffer = BytesIO()
-        plt.savefig(buffer, format='png', dpi=80, bbox_inches='tight')
-        buffer.seek(0)
-        image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
-        plt.close(fig)
-        
-        return f"data:image/png;base64,{image_base64}"
-    except Exception as e:
-        print(f"Error generating stats chart: {e}")
-        return None
+    data = build_chart_data({}, original_metrics, simplified_metrics)['stats']
+    return render_chart('stats_bar', data, 'Text Statistics Comparison')
@@ -0,0 +1,137 @@
+"""Admin rollup tables maintained at write time"""
+
+from datetime import date, datetime
+
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, delete, event, exists, func, select
+from sqlalchemy.dialects.sqlite import insert
+
+metadata = MetaData()
+
+daily_registrations = Table(
+    'daily_registrations', metadata,
+    Column('day', String(10), primary_key=True),
+    Column('count', Integer, nullable=False, default=0),
+)
+
+daily_documents = Table(
+    'daily_documents', metadata,
+    Column('day', String(10), primary_key=True),
+    Column('count', Integer, nullable=False, default=0),
+)
+
+daily_active_users = Table(
+    'daily_active_users', metadata,
+    Column('day', String(10), primary_key=True),
+    Column('user_id', Integer, primary_key=True),
+)
+
+user_document_counts = Table(
+    'user_document_counts', metadata,
+    Column('user_id', Integer, primary_key=True),
+    Column('document_count', Integer, nullable=False, default=0),
+    Index('ix_user_document_counts_count', 'document_count'),
+)
+
+
+def _day(value):
+    """Rollup key, matching SQLite date() on the stored timestamp"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return datetime.utcnow().date().isoformat()
+
+
+def _increment(connection, table, key_column, key, count_column='count', delta=1):
+    statement = insert(table).values({key_column: key, count_column: max(delta, 0)})
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[key_column],
+        set_={count_column: table.c[count_column] + delta},
+    ))
+
+
+def _on_user_insert(mapper, connection, target):
+    _increment(connection, daily_registrations, 'day', _day(target.created_at))
+    connection.execute(
+        insert(user_document_counts).values(user_id=target.id, document_count=0).on_conflict_do_nothing()
+    )
+
+
+def _on_document_insert(mapper, connection, target):
+    day = _day(target.uploaded_at)
+    _increment(connection, daily_documents, 'day', day)
+    _increment(connection, user_document_counts, 'user_id', target.user_id, count_column='document_count')
+    connection.execute(
+        insert(daily_active_users).values(day=day, user_id=target.user_id).on_conflict_do_nothing()
+    )
+
+
+def _on_document_delete(mapper, connection, target):
+    day = _day(target.uploaded_at)
+    _increment(connection, daily_documents, 'day', day, delta=-1)
+    _increment(connection, user_document_counts, 'user_id', target.user_id, count_column='document_count', delta=-1)
+    # The user stays active that day only through another document uploaded on it
+    documents = mapper.local_table
+    connection.execute(
+        delete(daily_active_users)
+        .where(daily_active_users.c.day == day, daily_active_users.c.user_id == target.user_id)
+        .where(~exists().where(documents.c.user_id == target.user_id, func.date(documents.c.uploaded_at) == day))
+    )
+
+
+def register_rollup_listeners(user_model, document_model):
+    """Keep the rollups current whenever the ORM inserts users or inserts or deletes documents"""
+    if not event.contains(user_model, 'after_insert', _on_user_insert):
+        event.listen(user_model, 'after_insert', _on_user_insert)
+    if not event.contains(document_model, 'after_insert', _on_document_insert):
+        event.listen(document_model, 'after_insert', _on_document_insert)
+        event.listen(document_model, 'after_delete', _on_document_delete)
+
+
+def ensure_rollup_tables(engine):
+    """Create the rollup tables, seeding them from existing rows on first run"""
+    with engine.begin() as connection:
+        existing = set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).scalars())
+        metadata.create_all(bind=connection)
+        if 'daily_registrations' in existing:
+            return
+
+        connection.exec_driver_sql(
+            "INSERT INTO daily_registrations (day, count) "
+            "SELECT date(created_at), COUNT(*) FROM users GROUP BY date(created_at)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO daily_documents (day, count) "
+            "SELECT date(uploaded_at), COUNT(*) FROM documents GROUP BY date(uploaded_at)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO daily_active_users (day, user_id) "
+            "SELECT DISTINCT date(uploaded_at), user_id FROM documents"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO user_document_counts (user_id, document_count) "
+            "SELECT u.id, COUNT(d.id) FROM users u LEFT JOIN documents d ON d.user_id = u.id GROUP BY u.id"
+        )
+
+
+# Readers used by the admin dashboard; each touches at most one row per day or per user shown
+
+def counts_by_day(connection, table, start_day, end_day):
+    """{ISO day: count} for days in [start_day, end_day]"""
+    rows = connection.execute(
+        select(table.c.day, table.c.count)
+        .where(table.c.day >= start_day.isoformat(), table.c.day <= end_day.isoformat())
+    )
+    return {day: count for day, count in rows}
+
+
+def total(connection, table):
+    return connection.execute(select(func.coalesce(func.sum(table.c.count), 0))).scalar()
+
+
+def active_users_on(connection, day):
+    return connection.execute(
+        select(func.count()).select_from(daily_active_users).where(daily_active_users.c.day == day.isoformat())
+    ).scalar()
@@ -0,0 +1,161 @@
+"""Full-text search over document titles and clause text (SQLite FTS5)"""
+
+import html
+import re
+
+from sqlalchemy import text
+
+# Porter stemming so "damages" also finds "damage"
+SEARCH_TOKENIZER = "porter unicode61 remove_diacritics 2"
+
+# Title matches weigh more than body matches in BM25
+TITLE_WEIGHT = 4.0
+BODY_WEIGHT = 1.0
+
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_PAGE_SIZE = 50
+
+# The index reads its content through this view, so clause text is not
+# stored a second time. The triggers keep it in step with the clauses
+# table, including the delete-and-reinsert done by background refinement.
+# user_id is indexed too, so the MATCH intersects the query with the
+# searching user's token list and other users' hits are never visited.
+# It comes last and has weight 0: it adds nothing to bm25() and loses ties
+# when snippet() picks a column.
+_SCHEMA = (
+    """
+    CREATE VIEW IF NOT EXISTS clause_search_source AS
+    SELECT c.id AS id, d.document_title AS document_title, c.cleaned_text AS clause_text, d.user_id AS user_id
+    FROM clauses c JOIN documents d ON d.id = c.document_id
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS clauses_fts USING fts5(
+        document_title, clause_text, user_id,
+        content='clause_search_source', content_rowid='id',
+        tokenize='{SEARCH_TOKENIZER}'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clauses_fts_insert AFTER INSERT ON clauses BEGIN
+        INSERT INTO clauses_fts(rowid, document_title, clause_text, user_id)
+        SELECT new.id, document_title, new.cleaned_text, user_id FROM documents WHERE id = new.document_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clauses_fts_delete AFTER DELETE ON clauses BEGIN
+        INSERT INTO clauses_fts(clauses_fts, rowid, document_title, clause_text, user_id)
+        SELECT 'delete', old.id, document_title, old.cleaned_text, user_id FROM documents WHERE id = old.document_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clauses_fts_update AFTER UPDATE OF cleaned_text ON clauses BEGIN
+        INSERT INTO clauses_fts(clauses_fts, rowid, document_title, clause_text, user_id)
+        SELECT 'delete', old.id, document_title, old.cleaned_text, user_id FROM documents WHERE id = old.document_id;
+        INSERT INTO clauses_fts(rowid, document_title, clause_text, user_id)
+        SELECT new.id, document_title, new.cleaned_text, user_id FROM documents WHERE id = new.document_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_title AFTER UPDATE OF document_title, user_id ON documents BEGIN
+        INSERT INTO clauses_fts(clauses_fts, rowid, document_title, clause_text, user_id)
+        SELECT 'delete', id, old.document_title, cleaned_text, old.user_id FROM clauses WHERE document_id = old.id;
+        INSERT INTO clauses_fts(rowid, document_title, clause_text, user_id)
+        SELECT id, new.document_title, cleaned_text, new.user_id FROM clauses WHERE document_id = new.id;
+    END
+    """,
+)
+
+# Objects of an index built before user_id was added, dropped and rebuilt by ensure_search_index
+_OUTDATED = (
+    "DROP TRIGGER IF EXISTS documents_fts_title",
+    "DROP TRIGGER IF EXISTS clauses_fts_update",
+    "DROP TRIGGER IF EXISTS clauses_fts_delete",
+    "DROP TRIGGER IF EXISTS clauses_fts_insert",
+    "DROP TABLE IF EXISTS clauses_fts",
+    "DROP VIEW IF EXISTS clause_search_source",
+)
+
+_SEARCH_QUERY = text(f"""
+    SELECT c.document_id, d.document_title, d.uploaded_at, c.clause_index, c.clause_type,
+           snippet(clauses_fts, -1, char(2), char(3), '…', 24) AS snippet,
+           bm25(clauses_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}, 0.0) AS score
+    FROM clauses_fts
+    JOIN clauses c ON c.id = clauses_fts.rowid
+    JOIN documents d ON d.id = c.document_id
+    WHERE clauses_fts MATCH :match AND d.user_id = :user_id
+    ORDER BY score
+    LIMIT :limit OFFSET :offset
+""")
+
+_TERM_PATTERN = re.compile(r'"([^"]+)"|(\w+)', re.UNICODE)
+
+# snippet() marks matches with control characters; the text is
+# HTML-escaped before they become <mark> tags
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+
+def ensure_search_index(engine):
+    """Create the FTS5 index and its triggers, indexing existing clauses on first run"""
+    with engine.begin() as connection:
+        definition = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE name = 'clauses_fts'"
+        ).scalar()
+        if definition is not None and 'user_id' not in definition:
+            for statement in _OUTDATED:
+                connection.exec_driver_sql(statement)
+            definition = None
+        for statement in _SCHEMA:
+            connection.exec_driver_sql(statement)
+        if definition is None:
+            connection.exec_driver_sql("INSERT INTO clauses_fts(clauses_fts) VALUES ('rebuild')")
+
+
+def build_match_query(query):
+    """
+    Turn free text into a safe FTS5 MATCH expression
+
+    Bare words and "quoted phrases" are each quoted and ANDed together,
+    so punctuation and FTS operators in user input cannot cause syntax errors.
+    """
+    terms = []
+    for phrase, word in _TERM_PATTERN.findall(query or ''):
+        words = re.findall(r'\w+', phrase or word, re.UNICODE)
+        if words:
+            terms.append('"' + ' '.join(words) + '"')
+    return ' '.join(terms)
+
+
+def highlight_snippet(snippet):
+    """HTML-escaped snippet with matches wrapped in <mark>"""
+    escaped = html.escape(snippet or '')
+    return escaped.replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+
+
+def search_clauses(connection, user_id, query, page=1, page_size=SEARCH_PAGE_SIZE):
+    """
+    Ranked clause matches across a user's documents
+
+    Returns:
+        (results, has_more) where each result carries a highlighted snippet
+        and its BM25 score (lower is better)
+    """
+    match = build_match_query(query)
+    if not match:
+        return [], False
+    page = max(1, page or 1)
+    page_size = min(max(1, page_size or SEARCH_PAGE_SIZE), SEARCH_MAX_PAGE_SIZE)
+
+    rows = connection.execute(_SEARCH_QUERY, {
+        # The user's terms only match title and clause text
+        'match': f'user_id : "{int(user_id)}" AND {{document_title clause_text}} : ({match})',
+        'user_id': user_id,
+        'limit': page_size + 1,
+        'offset': (page - 1) * page_size,
+    }).mappings().all()
+
+    results = [
+        dict(row, snippet=highlight_snippet(row['snippet']), score=round(row['score'], 6))
+        for row in rows[:page_size]
+    ]
+    return results, len(rows) > page_size
@@ -0,0 +1,219 @@
+"""JSON encoding and decoding for stored reports, API responses and downloads"""
+
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, TypedDict
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson when installed; JSON_BACKEND=stdlib forces the json module
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "orjson" if orjson is not None else "stdlib")
+_USE_ORJSON = JSON_BACKEND == "orjson" and orjson is not None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    _ORJSON_PRETTY = _ORJSON_OPTIONS | orjson.OPT_INDENT_2
+
+# Containers nested deeper than this are encoded in one piece by iter_encode
+STREAM_DEPTH = 2
+_INDENT = b'  '
+
+
+def _default(value):
+    """Types both backends serialize the same way"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    # numpy scalars
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj, pretty=False):
+    """UTF-8 JSON; compact, or indented by two spaces when pretty"""
+    if _USE_ORJSON:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_PRETTY if pretty else _ORJSON_OPTIONS)
+    # ASCII output keeps the stdlib encoder on its fast path
+    if pretty:
+        return json.dumps(obj, indent=2, default=_default).encode('ascii')
+    return json.dumps(obj, separators=(',', ':'), default=_default).encode('ascii')
+
+
+def dumps(obj, pretty=False):
+    return dumps_bytes(obj, pretty).decode('utf-8')
+
+
+def loads(data):
+    if _USE_ORJSON:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode('utf-8')
+    return json.loads(data)
+
+
+def iter_encode(obj, pretty=False):
+    """
+    Encode obj as a sequence of byte chunks
+
+    The output joins to exactly dumps_bytes(obj, pretty). Top-level
+    containers and their direct children are split into separate chunks
+    (one per clause of a report), so a download can start sending before
+    the whole document is encoded and no single buffer holds all of it.
+    """
+    yield from _iter_encode(obj, pretty, STREAM_DEPTH, 0)
+
+
+def _iter_encode(obj, pretty, depth, level):
+    if depth == 0 or not isinstance(obj, (dict, list)) or not obj:
+        data = dumps_bytes(obj, pretty)
+        if pretty and level:
+            data = data.replace(b'\n', b'\n' + _INDENT * level)
+        yield data
+        return
+
+    item_prefix = b'\n' + _INDENT * (level + 1) if pretty else b''
+    closing = b'\n' + _INDENT * level if pretty else b''
+    is_dict = isinstance(obj, dict)
+    items = obj.items() if is_dict else enumerate(obj)
+    yield b'{' if is_dict else b'['
+    for position, (key, value) in enumerate(items):
+        prefix = (b',' if position else b'') + item_prefix
+        if is_dict:
+            prefix += dumps_bytes(_json_key(key)) + (b': ' if pretty else b':')
+        yield prefix
+        yield from _iter_encode(value, pretty, depth - 1, level + 1)
+    yield closing + (b'}' if is_dict else b']')
+
+
+def _json_key(key):
+    """Object keys the way json.dumps writes them"""
+    if isinstance(key, str):
+        return key
+    if isinstance(key, bool):
+        return 'true' if key else 'false'
+    if key is None:
+        return 'null'
+    return str(key)
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by this module, used by jsonify"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+
+# Report schema. Stored reports are decoded into these shapes; keys a
+# report lacks are absent, and values of the wrong type are dropped so
+# callers can rely on the container types below.
+
+class ReadabilityTotals(TypedDict, total=False):
+    original: Dict[str, int]
+    simplified: Dict[str, int]
+
+
+class SimplificationTiming(TypedDict, total=False):
+    tier: str
+    budget_seconds: Optional[float]
+    estimated_seconds: Optional[float]
+    actual_seconds: Optional[float]
+
+
+class ClauseReport(TypedDict, total=False):
+    index: int
+    type: str
+    raw_text: str
+    cleaned_text: str
+    simplified: str
+    sentences: List[str]
+    entities: List[Any]
+    readability: Dict[str, Dict[str, int]]
+
+
+class LegalTermReport(TypedDict, total=False):
+    term: str
+    category: Optional[str]
+    definition: Optional[str]
+    simplified_explanation: Optional[str]
+
+
+class Report(TypedDict, total=False):
+    document_id: int
+    filename: str
+    raw_text: str
+    word_count: int
+    clause_count: int
+    clauses: List[ClauseReport]
+    legal_terms: List[LegalTermReport]
+    segments: List[Dict[str, Any]]
+    simplified_text: str
+    highlighted_text: str
+    clause_type_summary: Dict[str, int]
+    original_metrics: Dict[str, Any]
+    simplified_metrics: Dict[str, Any]
+    original_readability: Dict[str, Any]
+    simplified_readability: Dict[str, Any]
+    readability_totals: ReadabilityTotals
+    chart_data: Dict[str, Any]
+    simplification_level: str
+    simplification_status: str
+    simplification_timing: SimplificationTiming
+    original_sentences: int
+    simplified_sentences: int
+
+
+class DocumentStats(TypedDict, total=False):
+    original_metrics: Dict[str, Any]
+    simplified_metrics: Dict[str, Any]
+    clause_type_summary: Dict[str, int]
+    legal_terms_count: int
+
+
+_REPORT_LISTS = ('clauses', 'legal_terms', 'segments')
+_REPORT_DICTS = (
+    'clause_type_summary', 'original_metrics', 'simplified_metrics', 'original_readability',
+    'simplified_readability', 'readability_totals', 'chart_data', 'simplification_timing',
+)
+_STATS_DICTS = ('original_metrics', 'simplified_metrics', 'clause_type_summary')
+
+
+def _decode_object(data):
+    if not data:
+        return {}
+    value = loads(data) if isinstance(data, (str, bytes, bytearray, memoryview)) else data
+    return value if isinstance(value, dict) else {}
+
+
+def _drop_mistyped(payload, list_keys=(), dict_keys=()):
+    for key in list_keys:
+        if key in payload and not isinstance(payload[key], list):
+            del payload[key]
+    for key in dict_keys:
+        if key in payload and not isinstance(payload[key], dict):
+            del payload[key]
+    return payload
+
+
+def decode_report(data) -> Report:
+    """Stored report_json (or an already decoded dict) as a Report; {} when missing"""
+    report = _drop_mistyped(_decode_object(data), _REPORT_LISTS, _REPORT_DICTS)
+    for key in ('clauses', 'legal_terms'):
+        if key in report:
+            report[key] = [item for item in report[key] if isinstance(item, dict)]
+    return report
+
+
+def decode_stats(data) -> DocumentStats:
+    """Stored stats_json as DocumentStats; {} when missing"""
+    return _drop_mistyped(_decode_object(data), dict_keys=_STATS_DICTS)
@@ -0,0 +1,172 @@
+"""
+Logging setup: JSON records written off the request thread
+
+Every log call only puts the record on an in-memory queue; a listener
+thread formats it and writes it to stderr. Records carry the id of the
+request (or job) and the pipeline stage they were logged from, taken from
+context variables set by init_request_logging and the job workers.
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+
+from flask import request
+
+# DEBUG enables the per-request and per-document detail
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# 'json' for one object per line, 'text' for a readable console format
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+stage_var = contextvars.ContextVar('stage', default=None)
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_traceback_formatter = logging.Formatter()
+_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+
+
+class _ContextFilter(logging.Filter):
+    """Stamp records with the request id and stage while still on the logging thread"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        if not hasattr(record, 'stage'):
+            record.stage = stage_var.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The default prepare folds the traceback into the message; keep it separate for 'exc'
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'stage': getattr(record, 'stage', None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s [%(request_id)s %(stage)s] %(message)s')
+
+
+def _start_listener():
+    """(Re)create the queue, its handler on the root logger and the writer thread"""
+    global _listener, _queue_handler
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        root.removeHandler(_queue_handler)
+
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JSONFormatter() if LOG_FORMAT == 'json' else _TextFormatter())
+    _queue_handler = _QueueHandler(records)
+    _queue_handler.addFilter(_ContextFilter())
+    root.addHandler(_queue_handler)
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # The writer thread does not exist in a forked child (gunicorn workers)
+    global _listener
+    if _listener is not None:
+        _listener = None
+        _start_listener()
+
+
+def configure_logging(level=None):
+    """Route all logging through the queue; safe to call more than once"""
+    with _lock:
+        root = logging.getLogger()
+        root.setLevel(level or LOG_LEVEL)
+        if _listener is not None:
+            return
+        # Replace basicConfig or framework handlers that write synchronously
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        _start_listener()
+        atexit.register(stop_logging)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def set_log_context(request_id=None, stage=None):
+    """Set the request id and stage for records logged from this context; returns reset tokens"""
+    return request_id_var.set(request_id), stage_var.set(stage)
+
+
+def reset_log_context(tokens):
+    request_token, stage_token = tokens
+    stage_var.reset(stage_token)
+    request_id_var.reset(request_token)
+
+
+def set_stage(stage):
+    stage_var.set(stage)
+
+
+def init_request_logging(app):
+    """Give every request an id (X-Request-ID if the client sent one) and echo it back"""
+
+    @app.before_request
+    def _bind_request_id():
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        set_log_context(request_id[:64])
+
+    @app.after_request
+    def _send_request_id(response):
+        request_id = request_id_var.get()
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
+
+    @app.teardown_request
+    def _unbind_request_id(exc):
+        # Runs after a streamed response finishes, so records from the stream keep the id
+        set_log_context(None)
@@ -0,0 +1,94 @@
+"""Model loading ahead of traffic, and readiness for the health endpoints"""
+
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+
+from nltk.tokenize import sent_tokenize
+
+from components.module2_text_preprocessing import ensure_nlp_loaded as ensure_entity_nlp_loaded
+from components.module3_clause_detection import ensure_model_loaded
+from components.module4_legal_terms import ensure_nlp_loaded as ensure_term_nlp_loaded
+from components.module5_language_simplification import ensure_simplifier_loaded
+
+logger = logging.getLogger(__name__)
+
+# Simplifier tiers loaded before serving; other tiers still load on first use
+PRELOAD_SIMPLIFIER_TIERS = [
+    tier.strip() for tier in os.environ.get("PRELOAD_SIMPLIFIER_TIERS", "large").split(",") if tier.strip()
+]
+
+_ready = threading.Event()
+_lock = threading.Lock()
+_background_warmup = None
+_background_lock = threading.Lock()
+_models = {}
+_warmup_seconds = None
+
+
+def warm_models(tiers=None):
+    """
+    Load every model this process serves with; returns {model: loaded}
+
+    Models that fail to load are reported as False and the pipeline falls
+    back to rules for them, so the process is ready either way once this
+    returns. Only weights are loaded, no inference is run: torch thread
+    pools started before a fork are not safe to use in the children.
+    """
+    global _warmup_seconds
+    with _lock:
+        if _ready.is_set():
+            return dict(_models)
+        started = time.perf_counter()
+        _models['clause_detection'] = ensure_model_loaded()
+        _models['entities'] = ensure_entity_nlp_loaded()
+        _models['legal_terms'] = ensure_term_nlp_loaded()
+        for tier in (PRELOAD_SIMPLIFIER_TIERS if tiers is None else tiers):
+            _models[f'simplifier_{tier}'] = ensure_simplifier_loaded(tier=tier)
+        # Punkt parameters are unpickled on first use
+        sent_tokenize("Warm up. Done.")
+        _warmup_seconds = round(time.perf_counter() - started, 2)
+        _ready.set()
+        logger.info("Models ready in %ss", _warmup_seconds, extra={'models': dict(_models)})
+    return dict(_models)
+
+
+def models_ready():
+    return _ready.is_set()
+
+
+def worker_memory():
+    """This process's pid and resident set size in MB"""
+    try:
+        with open('/proc/self/statm') as statm:
+            rss_bytes = int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Peak rather than current RSS, in bytes on macOS and kilobytes elsewhere
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        rss_bytes = max_rss if sys.platform == 'darwin' else max_rss * 1024
+    return {'pid': os.getpid(), 'rss_mb': round(rss_bytes / 1024 / 1024, 1)}
+
+
+def readiness():
+    """
+    (ready, details) for /api/health
+
+    wsgi.py and the __main__ blocks warm up before serving. When the app
+    was started some other way (flask run, an import in a shell), the
+    first health check starts the warm-up in the background instead, so
+    the endpoint turns ready rather than reporting 503 forever.
+    """
+    global _background_warmup
+    if not _ready.is_set() and _background_warmup is None:
+        with _background_lock:
+            if not _ready.is_set() and _background_warmup is None:
+                _background_warmup = threading.Thread(target=warm_models, name='model-warmup', daemon=True)
+                _background_warmup.start()
+    return _ready.is_set(), {
+        'models': dict(_models),
+        'warmup_seconds': _warmup_seconds,
+        'worker': worker_memory(),
+    }
@@ -1,20 +1,25 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context, url_for
 from flask_cors import CORS
+import base64
 import hashlib
 import json
+import logging
 import os
+import shutil
+import time
 import sys
 from pathlib import Path
 import jwt
 from datetime import datetime, timedelta
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from io import BytesIO
+from collections import Counter
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, DateTime, ForeignKey, or_
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker, scoped_session
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Index, or_, func, insert, exists
+from sqlalchemy.orm import declarative_base, deferred, relationship, sessionmaker, scoped_session, undefer
 
-from nltk.tokenize import sent_tokenize, word_tokenize
 
 # Add components to path
 CURRENT_DIR = Path(__file__).resolve().parent
@@ -22,20 +27,53 @@ if str(CURRENT_DIR) not in sys.path:
     sys.path.insert(0, str(CURRENT_DIR))
 
 from components.module1_document_ingestion import extract_text
-from components.module2_text_preprocessing import preprocess_contract_text
-from components.module3_clause_detection import detect_clause_type, ensure_model_loaded
-from components.module5_language_simplification import simplify_text, ensure_simplifier_loaded
+from components.module2_text_preprocessing import clean_text, preprocess_contract_text
+from components.module3_clause_detection import detect_clause_type
+from components.module5_language_simplification import (
+    simplify_text,
+    lexical_simplify,
+    ensure_simplifier_loaded,
+    compose_simplified_document,
+    select_tier,
+)
 from components.module4_legal_terms import extract_legal_terms
+from components.database import add_missing_columns, create_sqlite_engine
+from components.blob_store import (
+    BlobText,
+    configure_blob_store,
+    ensure_blob_tables,
+    register_blob_listeners,
+    run_blob_maintenance,
+    start_blob_maintenance,
+)
+from components.rollups import ensure_rollup_tables, register_rollup_listeners
+from components.warmup import readiness, warm_models
+from components.structured_logging import configure_logging, init_request_logging
+from components.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, observe_document, observe_stage, render_metrics, stage_timer
+from components.auth_cache import TokenCache, ensure_auth_tables, is_revoked, register_user_listeners, revoke_token
+from components.jobs import JobWorkerPool, adopt_jobs, enqueue_job, ensure_job_tables, get_job, job_status, new_job_id
+from components.search import ensure_search_index, search_clauses
+from components.pagination import encode_cursor, decode_cursor, keyset_page, page_size
+from components.serialization import FastJSONProvider, decode_report, decode_stats, dumps, iter_encode
+from components.export import EXPORT_FORMATS, export_entry_name, export_filename, iter_documents, stream_ndjson, stream_zip
+from components.clause_store import clause_rows, legal_term_rows, report_rows, clause_to_dict, legal_term_to_dict
 from components.readability_metrics import (
-    calculate_all_metrics,
+    ReadabilityStats,
+    replace_clause_stats,
+    stored_simplified_totals,
+    build_chart_data,
     generate_clause_type_chart,
     generate_stats_chart,
-    count_syllables,
 )
 
+configure_logging()
+logger = logging.getLogger(__name__)
+
 # Flask app setup
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app, supports_credentials=True)
+init_request_logging(app)
 app.config['SECRET_KEY'] = 'clauseease-secret-key-change-in-production'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
@@ -43,10 +81,14 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 ROOT = CURRENT_DIR.parent
 USERS_FILE = ROOT / 'data' / 'users.json'
 
-DB_PATH = ROOT / 'data' / 'clauseease.db'
+DB_PATH = Path(os.environ.get('CLAUSEEASE_DB', ROOT / 'data' / 'clauseease.db'))
 DB_PATH.parent.mkdir(exist_ok=True)
+# Job kind of this app's uploads; the other app queues 'web_process' jobs in the same table
+PROCESS_JOB = 'api_process'
 
-engine = create_engine(f'sqlite:///{DB_PATH}', connect_args={'check_same_thread': False}, future=True)
+engine = create_sqlite_engine(DB_PATH)
+# Document text and reports, deduplicated by content hash
+configure_blob_store(DB_PATH.parent / 'blobs')
 SessionLocal = scoped_session(sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True))
 Base = declarative_base()
 
@@ -66,22 +108,61 @@ class User(Base):
 
 class Document(Base):
     __tablename__ = 'documents'
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first
+        Index('ix_documents_user_uploaded', 'user_id', 'uploaded_at', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
     document_title = Column(String(255), nullable=False)
-    original_text = Column(Text, nullable=False)
+    # Loaded on first access, archived blobs are only decompressed when viewed
+    original_text = deferred(Column(BlobText, nullable=False))
+    # clean_text(original_text), the text clause offsets (original_start/end) index
+    cleaned_text = deferred(Column(BlobText))
     simplified_text_basic = Column(Text)
     simplified_text_intermediate = Column(Text)
     simplified_text_advanced = Column(Text)
     original_readability_score = Column(Float)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
-    report_json = Column(Text)
+    report_json = deferred(Column(BlobText))
     stats_json = Column(Text)
     clause_count = Column(Integer, default=0)
     word_count = Column(Integer, default=0)
+    # Processing job that stored the document, so a retried job finds it instead of storing it twice
+    job_id = Column(String(32), index=True, unique=True)
 
     user = relationship('User', back_populates='documents')
+    clauses = relationship('Clause', back_populates='document', cascade='all, delete-orphan', order_by='Clause.clause_index')
+    legal_terms = relationship('LegalTerm', back_populates='document', cascade='all, delete-orphan')
+
+class Clause(Base):
+    __tablename__ = 'clauses'
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey('documents.id'), nullable=False, index=True)
+    clause_index = Column(Integer, nullable=False)
+    clause_type = Column(String(100), nullable=False, index=True)
+    original_start = Column(Integer)
+    original_end = Column(Integer)
+    cleaned_text = Column(Text, nullable=False)
+    simplified_text = Column(Text)
+    entities_json = Column(Text)
+
+    document = relationship('Document', back_populates='clauses')
+
+
+class LegalTerm(Base):
+    __tablename__ = 'legal_terms'
+
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey('documents.id'), nullable=False, index=True)
+    term = Column(String(255), nullable=False, index=True)
+    category = Column(String(100))
+    definition = Column(Text)
+    simplified_explanation = Column(Text)
+
+    document = relationship('Document', back_populates='legal_terms')
 
 
 class Glossary(Base):
@@ -96,6 +177,15 @@ class Glossary(Base):
     creator = relationship('User', back_populates='glossary_entries')
 
 
+# Admin dashboard counts are kept up to date as users and documents are written
+register_rollup_listeners(User, Document)
+# Blob reference counts follow the document rows
+register_blob_listeners(Document, ('original_text', 'cleaned_text', 'report_json'))
+# Verified tokens and the user they belong to, see resolve_token
+_token_cache = TokenCache()
+register_user_listeners(User, _token_cache)
+
+
 @contextmanager
 def get_db():
     db = SessionLocal()
@@ -147,27 +237,83 @@ def migrate_legacy_users():
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips columns and indexes added to tables that already exist
+    add_missing_columns(engine, Document.__table__)
+    for index in Document.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    ensure_search_index(engine)
+    ensure_rollup_tables(engine)
+    ensure_blob_tables(engine)
+    run_blob_maintenance(engine)
+    ensure_job_tables(engine)
+    # Uploads queued while both apps shared the 'process' kind
+    adopt_jobs(engine, 'process', PROCESS_JOB, 'username')
+    ensure_auth_tables(engine)
     migrate_legacy_users()
+    backfill_clause_tables()
+    backfill_cleaned_text()
 
 
-def calculate_reading_ease(text):
-    if not text or not text.strip():
-        return 0.0
+def store_clause_rows(db, document_id, clauses, segments, legal_terms=None):
+    """Bulk insert a document's clause (and optionally legal term) rows"""
+    rows = clause_rows(document_id, clauses, segments)
+    if rows:
+        db.execute(insert(Clause), rows)
+    if legal_terms is not None:
+        term_rows = legal_term_rows(document_id, legal_terms)
+        if term_rows:
+            db.execute(insert(LegalTerm), term_rows)
 
-    try:
-        sentences = sent_tokenize(text)
-        words = [word for word in word_tokenize(text) if word.isalpha()]
 
-        if len(sentences) == 0 or len(words) == 0:
-            return 0.0
+def backfill_cleaned_text(batch_size=100):
+    """Store the cleaned text of documents saved before the column existed"""
+    with get_db() as db:
+        pending = [row.id for row in db.query(Document.id).filter(Document.cleaned_text.is_(None)).order_by(Document.id)]
+
+    for start in range(0, len(pending), batch_size):
+        with get_db() as db:
+            documents = db.query(Document).options(undefer(Document.original_text)).filter(
+                Document.id.in_(pending[start:start + batch_size])
+            )
+            for document in documents:
+                document.cleaned_text = clean_text(document.original_text or '')
+            db.commit()
+    if pending:
+        logger.info("Stored cleaned text for %d documents", len(pending))
 
-        syllable_count = sum(count_syllables(word) for word in words)
-        words_per_sentence = len(words) / max(len(sentences), 1)
-        syllables_per_word = syllable_count / max(len(words), 1)
-        score = 206.835 - (1.015 * words_per_sentence) - (84.6 * syllables_per_word)
-        return round(max(min(score, 100.0), 0.0), 2)
-    except Exception:
-        return 0.0
+
+def backfill_clause_tables(batch_size=100):
+    """Populate clauses/legal_terms for documents stored before the tables existed"""
+    with get_db() as db:
+        pending = [row.id for row in db.query(Document.id).filter(
+            Document.clause_count > 0,
+            ~exists().where(Clause.document_id == Document.id)
+        ).order_by(Document.id)]
+
+    for start in range(0, len(pending), batch_size):
+        with get_db() as db:
+            clause_batch, term_batch = [], []
+            documents = db.query(Document).filter(Document.id.in_(pending[start:start + batch_size]))
+            for document in documents:
+                report = decode_report(document.report_json)
+                clauses, terms = report_rows(document.id, report, document.original_text)
+                clause_batch.extend(clauses)
+                term_batch.extend(terms)
+            if clause_batch:
+                db.execute(insert(Clause), clause_batch)
+            if term_batch:
+                db.execute(insert(LegalTerm), term_batch)
+            db.commit()
+    if pending:
+        logger.info("Backfilled clause tables for %d documents", len(pending))
+
+
+def load_clause_rows(document_id):
+    """Clause and legal term dicts for a document from the normalized tables"""
+    with get_db() as db:
+        clauses = db.query(Clause).filter(Clause.document_id == document_id).order_by(Clause.clause_index).all()
+        terms = db.query(LegalTerm).filter(LegalTerm.document_id == document_id).order_by(LegalTerm.id).all()
+        return [clause_to_dict(c) for c in clauses], [legal_term_to_dict(t) for t in terms]
 
 
 def get_user_by_email(db, email):
@@ -178,9 +324,11 @@ def get_user_by_username(db, username):
     return db.query(User).filter(User.username == username).first()
 
 
-def store_document_record(username, filename, raw_text, simplified_texts, results, original_metrics, simplified_metrics):
-    combined_simplified = " ".join(simplified_texts) if simplified_texts else ''
-    readability_score = calculate_reading_ease(raw_text)
+def store_document_record(username, filename, raw_text, simplified_texts, results, original_metrics, simplified_metrics, job_id=None, cleaned_text=None):
+    combined_simplified = results.get('simplified_text')
+    if combined_simplified is None:
+        combined_simplified = " ".join(simplified_texts) if simplified_texts else ''
+    readability_score = original_metrics.get('flesch_reading_ease')
 
     stats_payload = {
         'original_metrics': original_metrics,
@@ -202,48 +350,84 @@ def store_document_record(username, filename, raw_text, simplified_texts, result
             user_id=user.id,
             document_title=filename,
             original_text=raw_text,
+            cleaned_text=clean_text(raw_text) if cleaned_text is None else cleaned_text,
             simplified_text_basic=combined_simplified,
             original_readability_score=readability_score,
-            report_json=json.dumps(report_payload),
-            stats_json=json.dumps(stats_payload),
+            report_json=dumps(report_payload),
+            stats_json=dumps(stats_payload),
             clause_count=results.get('clause_count', 0),
-            word_count=results.get('word_count', 0)
+            word_count=results.get('word_count', 0),
+            job_id=job_id
         )
 
         db.add(document)
+        db.flush()
+        store_clause_rows(db, document.id, results.get('clauses', []), results.get('segments'), results.get('legal_terms', []))
         db.commit()
         db.refresh(document)
         return document
 
 
-def load_document_history(user_id):
+def load_document_history(user_id, cursor=None, limit=None):
+    """
+    One keyset page of a user's history, newest first
+
+    Returns:
+        (history, next_cursor), next_cursor is None on the last page
+    """
+    limit = page_size(limit)
+    position = decode_cursor(cursor)
     with get_db() as db:
-        docs = (
-            db.query(Document)
+        # Summary columns only; the simplified word count is read in SQL
+        # instead of decoding stats_json in Python
+        query = (
+            db.query(
+                Document.id,
+                Document.document_title,
+                Document.uploaded_at,
+                Document.original_readability_score,
+                Document.clause_count,
+                Document.word_count,
+                func.json_extract(Document.stats_json, '$.simplified_metrics.word_count').label('simplified_word_count'),
+            )
             .filter(Document.user_id == user_id)
-            .order_by(Document.uploaded_at.desc())
-            .all()
         )
+        docs = keyset_page(query, Document.uploaded_at, Document.id, position, limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1].uploaded_at, docs[-1].id)
+
+        # Clause types per document in one grouped query
+        clause_types = {}
+        type_counts = (
+            db.query(Clause.document_id, Clause.clause_type, func.count(Clause.id))
+            .filter(Clause.document_id.in_([doc.id for doc in docs]))
+            .group_by(Clause.document_id, Clause.clause_type)
+        )
+        for document_id, clause_type, count in type_counts:
+            clause_types.setdefault(document_id, {})[clause_type] = count
 
         history = []
         for doc in docs:
-            stats_payload = json.loads(doc.stats_json) if doc.stats_json else {}
             history.append({
                 'id': doc.id,
                 'document_title': doc.document_title,
-                'uploaded_at': doc.uploaded_at.isoformat(),
+                'uploaded_at': doc.uploaded_at.isoformat() if doc.uploaded_at else None,
                 'original_readability_score': doc.original_readability_score,
                 'clause_count': doc.clause_count,
                 'word_count': doc.word_count,
-                'simplified_word_count': stats_payload.get('simplified_metrics', {}).get('word_count', 0),
+                'simplified_word_count': doc.simplified_word_count or 0,
+                'clause_types': clause_types.get(doc.id, {}),
             })
 
-        return history
+        return history, next_cursor
 
 
 def build_document_report(document):
-    report_payload = json.loads(document.report_json) if document.report_json else {}
-    stats_payload = json.loads(document.stats_json) if document.stats_json else {}
+    report_payload = decode_report(document.report_json)
+    stats_payload = decode_stats(document.stats_json)
 
     if not report_payload:
         report_payload = {
@@ -270,11 +454,9 @@ def build_document_report(document):
     if 'clause_type_summary' not in report_payload:
         report_payload['clause_type_summary'] = stats_payload.get('clause_type_summary', {})
 
-    if 'clause_type_chart' not in report_payload:
-        report_payload['clause_type_chart'] = generate_clause_type_chart(report_payload.get('clause_type_summary', {}))
-
-    if 'stats_chart' not in report_payload:
-        report_payload['stats_chart'] = generate_stats_chart(
+    if 'chart_data' not in report_payload:
+        report_payload['chart_data'] = build_chart_data(
+            report_payload.get('clause_type_summary', {}),
             report_payload.get('original_readability', {}),
             report_payload.get('simplified_readability', {})
         )
@@ -283,7 +465,71 @@ def build_document_report(document):
     return report_payload
 
 
-init_db()
+# Background model refinement (single worker keeps model calls serialized)
+_refinement_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='simplifier')
+
+
+def _refine_document(document_id):
+    """Replace a stored lexical preview with model simplification"""
+    try:
+        with get_db() as db:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if not document or not document.report_json:
+                return
+            report_payload = decode_report(document.report_json)
+            stats_payload = decode_stats(document.stats_json)
+            raw_text = document.original_text
+            cleaned_text = document.cleaned_text or clean_text(raw_text)
+
+        clauses = report_payload.get('clauses', [])
+        timing = report_payload.get('simplification_timing') or {}
+        tier = timing.get('tier', 'large')
+        totals = report_payload.setdefault('readability_totals', {})
+        simplified_totals = stored_simplified_totals(totals, clauses)
+        started = time.perf_counter()
+        if tier != 'rules' and ensure_simplifier_loaded(tier=tier):
+            for clause in clauses:
+                refined = simplify_text(clause['cleaned_text'], tier=tier)
+                # Keep the preview where the model declined to rewrite
+                if refined and refined != clause['cleaned_text']:
+                    simplified_totals = replace_clause_stats(simplified_totals, clause, refined)
+            status = 'refined'
+        else:
+            status = 'lexical'
+        refine_seconds = time.perf_counter() - started
+        timing['actual_seconds'] = round(refine_seconds, 3)
+        observe_stage('refine', refine_seconds)
+
+        combined_simplified, segments = compose_simplified_document(cleaned_text, clauses)
+        totals['simplified'] = simplified_totals.to_dict()
+        simplified_metrics = simplified_totals.to_metrics()
+        report_payload.update({
+            'clauses': clauses,
+            'simplified_text': combined_simplified,
+            'segments': segments,
+            'simplified_readability': simplified_metrics,
+            'simplification_status': status,
+            'simplification_timing': timing,
+        })
+        stats_payload['simplified_metrics'] = simplified_metrics
+        report_payload['chart_data'] = build_chart_data(
+            report_payload.get('clause_type_summary', {}),
+            report_payload.get('original_readability', {}),
+            simplified_metrics
+        )
+
+        with get_db() as db:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if not document:
+                return
+            document.simplified_text_basic = combined_simplified
+            document.report_json = dumps(report_payload)
+            document.stats_json = dumps(stats_payload)
+            db.query(Clause).filter(Clause.document_id == document_id).delete(synchronize_session=False)
+            store_clause_rows(db, document_id, clauses, segments)
+            db.commit()
+    except Exception:
+        logger.exception("Refinement failed for document %s", document_id)
 
 
 @app.teardown_appcontext
@@ -329,31 +575,50 @@ def _extract_token_from_request():
     return None
 
 
+def resolve_token(token):
+    """
+    The user record ({user_id, username, email}) a token belongs to
+
+    Raises jwt.InvalidTokenError for a bad, expired or revoked token, or
+    one whose user no longer exists. Verified tokens are cached, so
+    repeated calls with the same token skip the decode and the queries.
+    """
+    user = _token_cache.get(token)
+    if user is not None:
+        return user
+
+    data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+    if is_revoked(engine, token):
+        raise jwt.InvalidTokenError('Token has been revoked')
+    with get_db() as db:
+        query = db.query(User.id, User.username, User.email)
+        if data.get('user_id') is not None:
+            row = query.filter(User.id == data['user_id']).first()
+        else:
+            row = query.filter(User.username == data.get('username')).first()
+    if row is None:
+        raise jwt.InvalidTokenError('User no longer exists')
+
+    user = {'user_id': row.id, 'username': row.username, 'email': row.email}
+    _token_cache.put(token, user, data.get('exp'))
+    return user
+
+
 def token_required(f):
-    """Decorator to protect routes with JWT token"""
+    """Decorator to protect routes with JWT token; the route gets the user record as its first argument"""
     @wraps(f)
     def decorated(*args, **kwargs):
         if request.method == 'OPTIONS':
             return '', 204
         token = _extract_token_from_request()
-
-        print(f"\n🔐 TOKEN CHECK")
-        print(f"Token present: {bool(token)}")
-
         if not token:
-            print("❌ Token missing")
+            logger.debug("Token missing for %s", request.path)
             return jsonify({'message': 'Token is missing'}), 401
 
         try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_user = {
-                'username': data.get('username'),
-                'email': data.get('email'),
-                'user_id': data.get('user_id')
-            }
-            print(f"✅ Token valid for user: {current_user['username']}\n")
-        except Exception as e:
-            print(f"❌ Token invalid: {str(e)}\n")
+            current_user = resolve_token(token)
+        except jwt.InvalidTokenError as e:
+            logger.debug("Token rejected for %s: %s", request.path, e)
             return jsonify({'message': 'Token is invalid'}), 401
 
         return f(current_user, *args, **kwargs)
@@ -369,7 +634,6 @@ def register():
     
     try:
         data = request.get_json()
-        print(f"[REGISTER] Received data: {data}")  # Debug logging
         
         username = data.get('username', '').strip()
         email = data.get('email', '').strip()
@@ -399,14 +663,14 @@ def register():
             db.add(user)
             db.commit()
 
-        print(f"[REGISTER] User {username} registered successfully")  # Debug logging
+        logger.info("Registered user %s", username)
         return jsonify({
             'message': 'Registration successful',
             'username': username
         }), 201
         
     except Exception as e:
-        print(f"[REGISTER ERROR] {str(e)}")  # Debug logging
+        logger.exception("Registration failed")
         return jsonify({'message': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/login', methods=['POST', 'OPTIONS'])
@@ -421,8 +685,6 @@ def login():
         email = data.get('email', '').strip()
         password = data.get('password', '')
         
-        print(f"[LOGIN] Email: {email}, Password entered: {password}")  # Debug
-        
         if not email or not password:
             return jsonify({'message': 'Email and password required'}), 400
         
@@ -430,18 +692,11 @@ def login():
             user = get_user_by_email(db, email)
 
             if not user:
-                print(f"[LOGIN ERROR] Email {email} not found in database")  # Debug
+                logger.info("Login failed: unknown email")
                 return jsonify({'message': 'Invalid credentials'}), 401
 
-            input_hash = hash_password(password)
-            stored_hash = user.password_hash
-
-            print(f"[LOGIN DEBUG] Input hash: {input_hash}")  # Debug
-            print(f"[LOGIN DEBUG] Stored hash: {stored_hash}")  # Debug
-            print(f"[LOGIN DEBUG] Match: {input_hash == stored_hash}")  # Debug
-
-            if stored_hash != input_hash:
-                print(f"[LOGIN ERROR] Password mismatch for {email}")  # Debug
+            if user.password_hash != hash_password(password):
+                logger.info("Login failed: wrong password for user %s", user.username)
                 return jsonify({'message': 'Invalid credentials'}), 401
 
             user_id = user.id
@@ -454,7 +709,7 @@ def login():
             'exp': datetime.utcnow() + timedelta(days=1)
         }, app.config['SECRET_KEY'], algorithm='HS256')
         
-        print(f"[LOGIN] User {username} logged in successfully")  # Debug
+        logger.info("User %s logged in", username)
         response = jsonify({
             'message': 'Login successful',
             'token': token,
@@ -480,213 +735,524 @@ def login():
         return response, 200
         
     except Exception as e:
-        print(f"[LOGIN ERROR] {str(e)}")  # Debug
+        logger.exception("Login failed")
         return jsonify({'message': f'Server error: {str(e)}'}), 500
 
-@app.route('/api/process', methods=['POST', 'OPTIONS'])
-@token_required
-def process_document(current_user):
-    """Process uploaded document through all 5 modules"""
+@app.route('/api/logout', methods=['POST', 'OPTIONS'])
+def logout():
+    """Revoke the current token and clear the auth cookies"""
     if request.method == 'OPTIONS':
         return '', 204
-    print(f"\n{'='*60}")
-    print(f"📥 PROCESSING REQUEST RECEIVED")
-    user_name = current_user.get('username') if isinstance(current_user, dict) else str(current_user)
-    print(f"User: {user_name}")
-    print(f"Files in request: {list(request.files.keys())}")
-    print(f"{'='*60}\n")
-    step = 'initial'
+
+    token = _extract_token_from_request()
+    if token:
+        _token_cache.invalidate_token(token)
+        try:
+            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+        except jwt.InvalidTokenError:
+            data = None
+        # Tokens that no longer verify need no revocation
+        if data and data.get('exp'):
+            revoke_token(engine, token, datetime.utcfromtimestamp(data['exp']))
+            logger.info("User %s logged out", data.get('username'))
+
+    response = jsonify({'message': 'Logged out'})
+    response.delete_cookie('token')
+    response.delete_cookie('Authorization')
+    return response, 200
+
+def run_processing_pipeline(user_name, filename, raw_text, latency_budget=None, progress=None, started_at=None, job_id=None):
+    """
+    Run modules 2-5 over extracted text, yielding results as they are ready
+
+    Yields:
+        ('start', {...}) once clauses are segmented,
+        ('clause', {...}) for each clause as soon as it is classified and simplified,
+        ('document', results) with document-level metrics, chart data and timings
+    """
+    progress = progress if progress is not None else {}
+    started_at = started_at if started_at is not None else time.perf_counter()
+    time_to_first_clause = None
+
+    # Module 2: Text Preprocessing
+    progress['step'] = 'preprocess_contract_text'
+    with stage_timer('preprocess'):
+        clauses = preprocess_contract_text(raw_text)
+    tier, estimated_seconds = select_tier(raw_text, latency_budget)
+    yield 'start', {'filename': filename, 'clause_count': len(clauses)}
+
+    # Modules 3 and 5 per clause: Clause Detection and Language Simplification
+    clause_results = []
+    original_totals = ReadabilityStats()
+    simplified_totals = ReadabilityStats()
+    for i, c in enumerate(clauses):
+        progress['step'] = 'detect_clause_type'
+        with stage_timer('classify'):
+            clause_type = detect_clause_type(c['cleaned_text'])
+
+        progress['step'] = 'simplify_text'
+        # Instant preview, refined by the model in the background
+        with stage_timer('simplify'):
+            simplified = lexical_simplify(c['cleaned_text'])
+
+        # Readability accumulators, merged into document metrics below
+        progress['step'] = 'clause_metrics'
+        with stage_timer('metrics'):
+            original_stats = ReadabilityStats.from_text(c['cleaned_text'])
+            simplified_stats = ReadabilityStats.from_text(simplified)
+        original_totals += original_stats
+        simplified_totals += simplified_stats
+
+        clause_result = {
+            'index': i + 1,
+            'raw_text': c['raw_text'],
+            'cleaned_text': c['cleaned_text'],
+            'sentences': c['sentences'],
+            'entities': c['entities'],
+            'type': clause_type,
+            'simplified': simplified,
+            'readability': {
+                'original': original_stats.to_dict(),
+                'simplified': simplified_stats.to_dict()
+            }
+        }
+        clause_results.append(clause_result)
+        if time_to_first_clause is None:
+            time_to_first_clause = time.perf_counter() - started_at
+        yield 'clause', clause_result
+
+    # Module 4: Legal Terms Extraction
+    progress['step'] = 'extract_legal_terms'
+    with stage_timer('terms'):
+        legal_terms = extract_legal_terms(raw_text)
+
+    # Combine all simplified text; both metrics come from the per-clause
+    # accumulators, so they count the cleaned clause text rather than raw_text
+    progress['step'] = 'simplified_metrics'
+    simplified_texts = [c['simplified'] for c in clause_results]
+    with stage_timer('metrics'):
+        cleaned_text = clean_text(raw_text)
+        combined_simplified, segments = compose_simplified_document(cleaned_text, clause_results)
+        original_metrics = original_totals.to_metrics()
+        simplified_metrics = simplified_totals.to_metrics()
+
+    # Prepare results
+    progress['step'] = 'prepare_response'
+    results = {
+        'filename': filename,
+        'raw_text': raw_text,
+        'word_count': len(raw_text.split()),
+        'clause_count': len(clause_results),
+        'original_readability': original_metrics,
+        'simplified_readability': simplified_metrics,
+        'readability_totals': {
+            'original': original_totals.to_dict(),
+            'simplified': simplified_totals.to_dict()
+        },
+        'simplified_text': combined_simplified,
+        'segments': segments,
+        'clauses': clause_results,
+        'legal_terms': [
+            {
+                'term': t['term'] if isinstance(t, dict) else t[0],
+                'category': t.get('category') if isinstance(t, dict) else (t[1] if len(t) > 1 else ''),
+                'definition': t.get('definition') if isinstance(t, dict) else (t[2] if len(t) > 2 else None)
+            }
+            for t in legal_terms
+        ],
+        'clause_type_summary': dict(Counter(c['type'] for c in clause_results)),
+        'simplification_status': 'preview',
+        'simplification_timing': {
+            'tier': tier,
+            'budget_seconds': latency_budget,
+            'estimated_seconds': estimated_seconds,
+            'actual_seconds': None
+        }
+    }
+
+    with stage_timer('charts'):
+        results['chart_data'] = build_chart_data(results['clause_type_summary'], original_metrics, simplified_metrics)
+
+    progress['step'] = 'save_session'
+    with stage_timer('db_write'):
+        document_record = store_document_record(user_name, filename, raw_text, simplified_texts, results, original_metrics, simplified_metrics, job_id, cleaned_text)
+    observe_document(results['word_count'], results['clause_count'])
+    results['document_id'] = document_record.id
+    _refinement_executor.submit(_refine_document, document_record.id)
+
+
+    results['timings'] = {
+        'time_to_first_clause_seconds': round(time_to_first_clause, 3) if time_to_first_clause is not None else None,
+        'total_seconds': round(time.perf_counter() - started_at, 3)
+    }
+    yield 'document', results
+
+
+def _save_upload(temp_dir=None):
+    """Validate and store the uploaded file, returning (filename, temp_path) or an error response"""
     if 'file' not in request.files:
-        print("❌ ERROR: No file in request.files")
-        return jsonify({'message': 'No file uploaded'}), 400
-    
+        logger.info("Upload rejected: no file in request")
+        return None, (jsonify({'message': 'No file uploaded'}), 400)
+
     file = request.files['file']
-    
+
     if file.filename == '':
-        print("❌ ERROR: Empty filename")
-        return jsonify({'message': 'No file selected'}), 400
-    
-    print(f"✅ File received: {file.filename}")
-    
-    temp_dir = ROOT / 'temp_uploads'
-    temp_dir.mkdir(exist_ok=True)
-    
-    temp_path = temp_dir / file.filename
+        logger.info("Upload rejected: empty filename")
+        return None, (jsonify({'message': 'No file selected'}), 400)
+
+    logger.debug("File received: %s", file.filename)
+
+    if temp_dir is None:
+        temp_dir = ROOT / 'temp_uploads'
+        temp_dir.mkdir(exist_ok=True)
+
+    temp_path = temp_dir / Path(file.filename).name
     file.save(str(temp_path))
-    
-    try:
-        step = 'save_upload'
-        # Module 1: Document Ingestion
-        step = 'extract_text'
-        raw_text = extract_text(str(temp_path))
-        
-        if raw_text.startswith('[ERROR]'):
-            return jsonify({'message': raw_text}), 400
-        
-        # Module 2: Text Preprocessing
-        step = 'preprocess_contract_text'
-        clauses = preprocess_contract_text(raw_text)
-        
-        # Calculate readability metrics for original text
-        step = 'calculate_original_metrics'
-        original_metrics = calculate_all_metrics(raw_text)
-        
-        # Module 3: Clause Detection
-        step = 'detect_clause_type'
-        clause_types = []
-        for clause in clauses:
-            clause_type = detect_clause_type(clause['cleaned_text'])
-            clause_types.append(clause_type)
-        
-        # Module 4: Legal Terms Extraction
-        step = 'extract_legal_terms'
-        legal_terms = extract_legal_terms(raw_text)
-        
-        # Module 5: Language Simplification
-        step = 'simplify_text'
-        simplified_texts = []
-        for clause in clauses:
-            simplified = simplify_text(clause['cleaned_text'])
-            simplified_texts.append(simplified)
-        
-        # Combine all simplified text
-        step = 'simplified_metrics'
-        combined_simplified = " ".join(simplified_texts)
-        simplified_metrics = calculate_all_metrics(combined_simplified)
-        
-        # Save session
-        step = 'save_session'
-        # Prepare results
-        step = 'prepare_response'
-        results = {
-            'filename': file.filename,
-            'raw_text': raw_text,
-            'word_count': len(raw_text.split()),
-            'clause_count': len(clauses),
-            'original_readability': original_metrics,
-            'simplified_readability': simplified_metrics,
-            'clauses': [
-                {
-                    'index': i + 1,
-                    'raw_text': c['raw_text'],
-                    'cleaned_text': c['cleaned_text'],
-                    'sentences': c['sentences'],
-                    'entities': c['entities'],
-                    'type': clause_types[i],
-                    'simplified': simplified_texts[i]
-                }
-                for i, c in enumerate(clauses)
-            ],
-            'legal_terms': [
-                {
-                    'term': t['term'] if isinstance(t, dict) else t[0],
-                    'category': t.get('category') if isinstance(t, dict) else (t[1] if len(t) > 1 else ''),
-                    'definition': t.get('definition') if isinstance(t, dict) else (t[2] if len(t) > 2 else None)
-                }
-                for t in legal_terms
-            ],
-            'clause_type_summary': {}
+    return (file.filename, temp_path), None
+
+
+def _sse(event, payload):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {dumps(payload)}\n\n"
+
+
+def _document_for_job(job_id):
+    """Job result for a document a previous run of the job already stored, or None"""
+    with get_db() as db:
+        document = (
+            db.query(Document)
+            .options(undefer(Document.report_json))
+            .filter(Document.job_id == job_id)
+            .first()
+        )
+        if document is None:
+            return None
+        if decode_report(document.report_json).get('simplification_status') == 'preview':
+            # The refinement queued by the lost run went with it
+            _refinement_executor.submit(_refine_document, document.id)
+        return {
+            'document_id': document.id,
+            'filename': document.document_title,
+            'clause_count': document.clause_count,
+            'timings': None
         }
-        
-        from collections import Counter
-        type_counts = Counter(clause_types)
-        results['clause_type_summary'] = dict(type_counts)
-        
-        document_record = store_document_record(user_name, file.filename, raw_text, simplified_texts, results, original_metrics, simplified_metrics)
-        results['document_id'] = document_record.id
-        
-        # Generate charts using matplotlib/seaborn
-        step = 'generate_charts'
-        results['clause_type_chart'] = generate_clause_type_chart(results['clause_type_summary'])
-        results['stats_chart'] = generate_stats_chart(original_metrics, simplified_metrics)
-        
-        return jsonify(results), 200
-        
-    except Exception as e:
-        import traceback
-        error_message = f"Processing error at {step}: {str(e)}"
-        print(error_message)
-        print(traceback.format_exc())
-        return jsonify({'message': error_message}), 500
-    
-    finally:
-        if temp_path.exists():
-            temp_path.unlink()
+
+
+def _run_process_job(job):
+    """Job handler: modules 1-5 for an upload queued by /api/process"""
+    payload = job.payload
+    # A retry after the document was stored (worker lost before the job was marked done)
+    stored = _document_for_job(job.id)
+    if stored is not None:
+        return stored
+    progress = job.stage_progress()
+    started_at = time.perf_counter()
+
+    # Module 1: Document Ingestion
+    progress['step'] = 'extract_text'
+    with stage_timer('extract'):
+        raw_text = extract_text(payload['path'])
+    if raw_text.startswith('[ERROR]'):
+        raise ValueError(raw_text)
+
+    clause_count = 0
+    results = None
+    for event, data in run_processing_pipeline(payload['username'], payload['filename'], raw_text,
+                                               payload.get('latency_budget'), progress, started_at, job.id):
+        if event == 'start':
+            clause_count = data['clause_count']
+        elif event == 'clause' and clause_count:
+            job.report(progress=data['index'] / clause_count)
+        elif event == 'document':
+            results = data
+
+    return {
+        'document_id': results['document_id'],
+        'filename': results['filename'],
+        'clause_count': results['clause_count'],
+        'timings': results['timings']
+    }
+
+
+# Uploads are processed by a local worker pool; the queue lives in the jobs table
+_job_pool = JobWorkerPool(engine, {PROCESS_JOB: _run_process_job}, upload_root=ROOT / 'temp_uploads' / 'jobs')
+
+
+@app.route('/api/process', methods=['POST', 'OPTIONS'])
+@token_required
+def process_document(current_user):
+    """Queue an uploaded document for processing; poll /api/jobs/<id> for progress"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    user_name = current_user['username']
+
+    job_id = new_job_id()
+    upload_dir = _job_pool.upload_dir(job_id)
+    upload, error_response = _save_upload(upload_dir)
+    if error_response:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        return error_response
+    filename, temp_path = upload
+
+    enqueue_job(engine, PROCESS_JOB, user_name, {
+        'username': user_name,
+        'filename': filename,
+        'path': str(temp_path),
+        'latency_budget': request.form.get('latency_budget', type=float)
+    }, job_id=job_id)
+    logger.info("Queued %s from %s as job %s", filename, user_name, job_id)
+    _job_pool.start()
+    _job_pool.notify()
+
+    status_url = url_for('get_job_status', job_id=job_id)
+    return jsonify({'job_id': job_id, 'status': 'queued', 'status_url': status_url}), 202, {'Location': status_url}
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_job_status(current_user, job_id):
+    """Status, current stage and progress of a processing job"""
+    job = get_job(engine, job_id)
+    if not job or job['kind'] != PROCESS_JOB or job['owner'] != current_user['username']:
+        return jsonify({'message': 'Job not found'}), 404
+
+    payload = job_status(job)
+    if payload['result'] and payload['result'].get('document_id'):
+        payload['document_url'] = url_for('get_document', document_id=payload['result']['document_id'])
+    return jsonify(payload), 200
+
+
+@app.route('/api/process/stream', methods=['POST', 'OPTIONS'])
+@token_required
+def process_document_stream(current_user):
+    """Process a document, streaming clause results as server-sent events"""
+    if request.method == 'OPTIONS':
+        return '', 204
+    started_at = time.perf_counter()
+    user_name = current_user['username']
+
+    upload, error_response = _save_upload()
+    if error_response:
+        return error_response
+    filename, temp_path = upload
+    latency_budget = request.form.get('latency_budget', type=float)
+
+    def generate():
+        progress = {'step': 'extract_text'}
+        try:
+            # Module 1: Document Ingestion
+            with stage_timer('extract'):
+                raw_text = extract_text(str(temp_path))
+            if raw_text.startswith('[ERROR]'):
+                yield _sse('error', {'message': raw_text})
+                return
+
+            for event, payload in run_processing_pipeline(user_name, filename, raw_text, latency_budget, progress, started_at):
+                yield _sse(event, payload)
+        except Exception as e:
+            error_message = f"Processing error at {progress['step']}: {str(e)}"
+            logger.exception("Processing failed", extra={'stage': progress['step']})
+            yield _sse('error', {'message': error_message})
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'ok', 'message': 'ClauseEase API is running'}), 200
+    ready, details = readiness()
+    if not ready:
+        # Not ready until models are loaded, so load balancers hold traffic back
+        return jsonify({'status': 'starting', 'message': 'Loading models', **details}), 503
+    return jsonify({'status': 'ok', 'message': 'ClauseEase API is running', **details}), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: stage latencies, document sizes, cache hits, model batch sizes"""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
 
 
 @app.route('/api/history', methods=['GET'])
 @token_required
 def get_history(current_user):
-    username = current_user.get('username') if isinstance(current_user, dict) else None
-    if not username:
-        return jsonify({'history': []}), 200
+    history, next_cursor = load_document_history(
+        current_user['user_id'],
+        cursor=request.args.get('cursor'),
+        limit=request.args.get('limit', type=int)
+    )
+    return jsonify({'history': history, 'next_cursor': next_cursor}), 200
+
+
+@app.route('/api/history/<int:document_id>', methods=['GET'])
+@token_required
+def get_document(current_user, document_id):
+    with get_db() as db:
+        document = db.query(Document).filter(Document.id == document_id, Document.user_id == current_user['user_id']).first()
+        if not document:
+            return jsonify({'message': 'Document not found'}), 404
+        report_payload = build_document_report(document)
+
+    clauses, legal_terms = load_clause_rows(document.id)
+    if clauses:
+        report_payload['clauses'] = clauses
+    if legal_terms:
+        report_payload['legal_terms'] = legal_terms
+    return jsonify({'document': report_payload}), 200
+
+
+@app.route('/api/search', methods=['GET'])
+@token_required
+def search_documents(current_user):
+    """
+    Full-text search over the user's documents, ranked by BM25
+
+    Only document titles and the cleaned text of the detected clauses are
+    indexed, not the raw upload: text that clause segmentation drops cannot
+    be found.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'message': 'Query parameter q is required'}), 400
+    page = max(1, request.args.get('page', 1, type=int))
+    page_size = request.args.get('page_size', type=int)
 
     with get_db() as db:
-        user = get_user_by_username(db, username)
-        if not user:
-            return jsonify({'history': []}), 200
-        user_id = user.id
+        results, has_more = search_clauses(db.connection(), current_user['user_id'], query, page=page, page_size=page_size)
 
-    history = load_document_history(user_id)
-    return jsonify({'history': history}), 200
+    return jsonify({'query': query, 'page': page, 'results': results, 'has_more': has_more}), 200
 
 
-@app.route('/api/history/<int:document_id>', methods=['GET'])
+@app.route('/api/clauses', methods=['GET'])
 @token_required
-def get_document(current_user, document_id):
-    username = current_user.get('username') if isinstance(current_user, dict) else None
-    if not username:
-        return jsonify({'message': 'Unauthorized'}), 401
+def list_clauses(current_user):
+    """Clauses across the user's documents, optionally filtered by type"""
+    clause_type = request.args.get('type')
+    limit = min(request.args.get('limit', 100, type=int), 500)
+    with get_db() as db:
+        query = (
+            db.query(Clause, Document.document_title)
+            .join(Document, Clause.document_id == Document.id)
+            .filter(Document.user_id == current_user['user_id'])
+        )
+        if clause_type:
+            query = query.filter(Clause.clause_type == clause_type)
+        rows = query.order_by(Clause.document_id.desc(), Clause.clause_index).limit(limit).all()
+
+        clauses = [
+            dict(clause_to_dict(clause), document_id=clause.document_id, document_title=title)
+            for clause, title in rows
+        ]
+    return jsonify({'clauses': clauses}), 200
+
 
+@app.route('/api/history/<int:document_id>/charts', methods=['GET'])
+@token_required
+def get_document_charts(current_user, document_id):
+    """Compact chart series for client-side rendering"""
     with get_db() as db:
-        user = get_user_by_username(db, username)
-        if not user:
-            return jsonify({'message': 'Unauthorized'}), 401
+        document = db.query(Document).filter(Document.id == document_id, Document.user_id == current_user['user_id']).first()
+        if not document:
+            return jsonify({'message': 'Document not found'}), 404
+        chart_data = build_document_report(document)['chart_data']
+
+    return jsonify(chart_data), 200
+
+
+@app.route('/api/history/<int:document_id>/charts/<chart_name>.png', methods=['GET'])
+@token_required
+def export_document_chart(current_user, document_id, chart_name):
+    """Explicit server-side PNG export of one chart"""
+    if chart_name not in ('clause_types', 'stats'):
+        return jsonify({'message': 'Unknown chart'}), 404
 
-        document = db.query(Document).filter(Document.id == document_id, Document.user_id == user.id).first()
+    with get_db() as db:
+        document = db.query(Document).filter(Document.id == document_id, Document.user_id == current_user['user_id']).first()
         if not document:
             return jsonify({'message': 'Document not found'}), 404
+        report_payload = build_document_report(document)
 
-    report_payload = build_document_report(document)
-    return jsonify({'document': report_payload}), 200
+    if chart_name == 'clause_types':
+        data_uri = generate_clause_type_chart(report_payload.get('clause_type_summary', {}))
+    else:
+        data_uri = generate_stats_chart(
+            report_payload.get('original_readability', {}),
+            report_payload.get('simplified_readability', {})
+        )
+    if not data_uri:
+        return jsonify({'message': 'Chart rendering failed'}), 500
+
+    return send_file(
+        BytesIO(base64.b64decode(data_uri.split(',', 1)[1])),
+        mimetype='image/png',
+        as_attachment=True,
+        download_name=f"{Path(document.document_title or 'contract').stem}-{chart_name}.png"
+    )
 
 
 @app.route('/api/history/<int:document_id>/download', methods=['GET'])
 @token_required
 def download_document(current_user, document_id):
-    username = current_user.get('username') if isinstance(current_user, dict) else None
-    if not username:
-        return jsonify({'message': 'Unauthorized'}), 401
-
     with get_db() as db:
-        user = get_user_by_username(db, username)
-        if not user:
-            return jsonify({'message': 'Unauthorized'}), 401
-
-        document = db.query(Document).filter(Document.id == document_id, Document.user_id == user.id).first()
+        document = db.query(Document).filter(Document.id == document_id, Document.user_id == current_user['user_id']).first()
         if not document:
             return jsonify({'message': 'Document not found'}), 404
+        report_payload = build_document_report(document)
 
-    report_payload = build_document_report(document)
-    buffer = BytesIO()
-    buffer.write(json.dumps(report_payload, indent=2).encode('utf-8'))
-    buffer.seek(0)
     safe_filename = document.document_title or f'document-{document.id}.txt'
     if not safe_filename.lower().endswith('.json'):
         safe_filename = f"{Path(safe_filename).stem or 'contract'}-report.json"
 
-    return send_file(
-        buffer,
+    return Response(
+        iter_encode(report_payload, pretty=True),
         mimetype='application/json',
-        as_attachment=True,
-        download_name=safe_filename
+        headers={'Content-Disposition': f'attachment; filename={safe_filename}'}
+    )
+
+@app.route('/api/export', methods=['GET'])
+@token_required
+def export_documents(current_user):
+    """Stream every document report of the account as NDJSON (default) or a ZIP of JSON files"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'message': f"Unsupported export format: {export_format}"}), 400
+
+    user_id = current_user['user_id']
+
+    def reports():
+        with get_db() as db:
+            query = (
+                db.query(Document)
+                .options(undefer(Document.report_json))
+                .filter(Document.user_id == user_id)
+                .order_by(Document.id)
+            )
+            for document in iter_documents(query):
+                yield document, build_document_report(document)
+
+    if export_format == 'zip':
+        body = stream_zip(
+            (export_entry_name(document.id, document.document_title), report)
+            for document, report in reports()
+        )
+    else:
+        body = stream_ndjson(report for _, report in reports())
+
+    mimetype = EXPORT_FORMATS[export_format][0]
+    filename = export_filename(current_user['username'], export_format, datetime.utcnow())
+    return Response(
+        body,
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}', 'X-Accel-Buffering': 'no'}
     )
 
+
 if __name__ == '__main__':
     print("\n" + "="*80)
     print("CLAUSEEASE AI - CONTRACT LANGUAGE SIMPLIFIER")
@@ -696,8 +1262,10 @@ if __name__ == '__main__':
     print("Frontend should connect to: http://localhost:5000/api")
     print("="*80 + "\n")
     
-    # Load models on startup
-    ensure_model_loaded()
-    ensure_simplifier_loaded()
+    # Prepare the database and load models, then resume any queued jobs
+    init_db()
+    warm_models()
+    _job_pool.start()
+    start_blob_maintenance(engine)
     
     app.run(debug=False, port=5000, host='0.0.0.0', use_reloader=False)
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+WSGI entry point for gunicorn (settings in gunicorn.conf.py at the repository root)
+
+CLAUSEEASE_APP picks the app: 'main' (JSON API, the default) or 'app'
+(server-rendered web UI). Importing this module prepares the database and
+loads every model, so with preload_app the gunicorn master holds the only
+copy of the weights and forked workers share those pages copy-on-write.
+"""
+
+import gc
+import importlib
+import os
+
+from components.blob_store import start_blob_maintenance
+from components.metrics import reset_metrics, start_metrics_flusher
+from components.warmup import warm_models
+
+CLAUSEEASE_APP = os.environ.get("CLAUSEEASE_APP", "main")
+
+_module = importlib.import_module(CLAUSEEASE_APP)
+# Neither app prepares its database on import, so processes that only
+# import it (spawned chart workers re-import the entry script) stay cheap
+_module.init_db()
+warm_models()
+# Drop garbage from model loading before the heap is frozen and shared
+gc.collect()
+
+app = _module.app
+
+
+def start_worker():
+    """Per-worker setup after fork"""
+    # Counts from the master's warm-up are not this worker's
+    reset_metrics()
+    # Pooled SQLite connections opened in the master must not be shared with children
+    _module.engine.dispose(close=False)
+    # Threads do not survive fork, so each worker starts its own job workers
+    _module._job_pool.start()
+    start_blob_maintenance(_module.engine)
+    start_metrics_flusher()
@@ -61,13 +61,62 @@ function triggerFileInput() {
     document.getElementById('file-input').click();
 }
 
-// Handle form submission with progress indication
+// Handle form submission: queue the upload, then poll the job for progress
+const STAGE_LABELS = {
+    queued: 'Waiting in queue',
+    started: 'Starting',
+    extract_text: 'Extracting text',
+    preprocess: 'Splitting clauses',
+    clauses: 'Analysing clauses',
+    extract_legal_terms: 'Finding legal terms',
+    document_metrics: 'Scoring readability',
+    save_document: 'Saving results',
+    done: 'Done'
+};
+
+function showUploadError(message) {
+    alert(message || 'An error occurred during processing');
+    document.querySelector('.btn-process').style.display = '';
+    document.getElementById('progress-section').style.display = 'none';
+}
+
+function updateJobProgress(job) {
+    const percent = Math.round((job.progress || 0) * 100);
+    document.getElementById('progress-fill').style.width = percent + '%';
+    document.getElementById('progress-percentage').textContent = percent + '%';
+    let label = STAGE_LABELS[job.stage] || 'Processing';
+    if (job.status === 'queued' && job.queue_position > 1) {
+        label += ` (${job.queue_position - 1} ahead)`;
+    }
+    document.querySelector('.progress-label-text').textContent = label;
+}
+
+function pollJob(statusUrl) {
+    fetch(statusUrl, { headers: { 'Accept': 'application/json' } })
+        .then(response => response.json().then(job => ({ ok: response.ok, job })))
+        .then(({ ok, job }) => {
+            if (!ok) {
+                showUploadError(job.message);
+                return;
+            }
+            updateJobProgress(job);
+            if (job.status === 'succeeded') {
+                window.location.href = job.result_url;
+            } else if (job.status === 'failed') {
+                showUploadError(job.error);
+            } else {
+                setTimeout(() => pollJob(statusUrl), 1000);
+            }
+        })
+        .catch(() => setTimeout(() => pollJob(statusUrl), 3000));
+}
+
 const uploadForm = document.getElementById('upload-form');
 if (uploadForm) {
     uploadForm.addEventListener('submit', function(e) {
+        e.preventDefault();
         const fileInput = document.getElementById('file-input');
         if (!fileInput.files.length) {
-            e.preventDefault();
             alert('Please select a file first');
             return;
         }
@@ -75,27 +124,22 @@ if (uploadForm) {
         // Show progress section
         document.querySelector('.btn-process').style.display = 'none';
         document.getElementById('progress-section').style.display = 'block';
-        
-        // Animate progress bar
-        const progressFill = document.getElementById('progress-fill');
-        const progressPercentage = document.getElementById('progress-percentage');
-        
-        let progress = 0;
-        const progressInterval = setInterval(() => {
-            progress += 1;
-            if (progress <= 98) {
-                progressFill.style.width = progress + '%';
-                progressPercentage.textContent = progress + '%';
-            } else {
-                // Keep at 98% until actual redirect happens
-                clearInterval(progressInterval);
-                progressFill.style.width = '98%';
-                progressPercentage.textContent = '98%';
-            }
-        }, 200);
-        
-        // Form will redirect automatically when server responds
-        // No need to manually redirect - let the form submission handle it
+        updateJobProgress({ status: 'queued', stage: 'queued', progress: 0 });
+
+        fetch(uploadForm.action, {
+            method: 'POST',
+            body: new FormData(uploadForm),
+            headers: { 'Accept': 'application/json' }
+        })
+            .then(response => response.json().then(data => ({ status: response.status, data })))
+            .then(({ status, data }) => {
+                if (status !== 202) {
+                    showUploadError(data.message);
+                    return;
+                }
+                pollJob(data.status_url);
+            })
+            .catch(() => showUploadError());
     });
 }
 
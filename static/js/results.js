@@ -1,7 +1,7 @@
 // Results page JavaScript for Flask templates
 document.addEventListener('DOMContentLoaded', () => {
     // Data is passed from template via script tags
-    if (typeof chartData !== 'undefined' && typeof statsData !== 'undefined') {
+    if (typeof chartData !== 'undefined') {
         createCharts();
     }
 });
@@ -247,18 +247,47 @@ function highlightLegalTerms(text) {
 let readabilityChart = null;
 let statsChart = null;
 
+const CHART_COLORS = ['#3b82f6', '#f59e0b', '#10b981', '#8b5cf6', '#ef4444', '#06b6d4', '#ec4899', '#14b8a6'];
+
 function createCharts() {
-    // Create placeholder charts - in a full implementation, you would use Chart.js
+    // Render compact chart series from the report with Chart.js
+    if (typeof Chart === 'undefined' || !chartData) return;
+
     const clauseTypeCanvas = document.getElementById('clauseTypeChart');
-    if (clauseTypeCanvas) {
-        const container = clauseTypeCanvas.parentElement;
-        container.innerHTML = '<p style="color: #64748b; text-align: center; padding: 2rem;">Charts will be implemented with Chart.js</p>';
+    const clauseTypes = chartData.clause_types;
+    if (clauseTypeCanvas && clauseTypes && clauseTypes.labels.length > 0) {
+        readabilityChart = new Chart(clauseTypeCanvas, {
+            type: 'pie',
+            data: {
+                labels: clauseTypes.labels,
+                datasets: [{
+                    data: clauseTypes.values,
+                    backgroundColor: clauseTypes.labels.map((_, i) => CHART_COLORS[i % CHART_COLORS.length])
+                }]
+            },
+            options: {
+                plugins: { legend: { position: 'bottom' } }
+            }
+        });
     }
-    
+
     const statsCanvas = document.getElementById('statsChart');
-    if (statsCanvas) {
-        const container = statsCanvas.parentElement;
-        container.innerHTML = '<p style="color: #64748b; text-align: center; padding: 2rem;">Charts will be implemented with Chart.js</p>';
+    const stats = chartData.stats;
+    if (statsCanvas && stats) {
+        statsChart = new Chart(statsCanvas, {
+            type: 'bar',
+            data: {
+                labels: stats.categories,
+                datasets: [
+                    { label: 'Original', data: stats.original, backgroundColor: '#3b82f6', borderColor: '#1e40af', borderWidth: 2 },
+                    { label: 'Simplified', data: stats.simplified, backgroundColor: '#10b981', borderColor: '#059669', borderWidth: 2 }
+                ]
+            },
+            options: {
+                scales: { y: { beginAtZero: true } },
+                plugins: { legend: { position: 'top' } }
+            }
+        });
     }
 }
 